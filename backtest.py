@@ -0,0 +1,192 @@
+import argparse
+import hashlib
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import calc_elo
+import columnar
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "team_strength"))
+import add_tss_active
+import calc_tss
+
+# Walk-forward backtest of the pre-game win probabilities.
+# Every season in GAME_FILES is replayed once, in order, with calc_elo's replay; each
+# game keeps the ratings both teams had *before* it, so nothing a model sees comes
+# from that game or later. The per-game frame is cached in backtest_cache/ (keyed by
+# the game files and calc_elo.py), so scoring another model is one vectorized pass
+# over it instead of a rebuild of the history csvs.
+# A model is a function games -> home win probability (NaN where it has no opinion).
+GAME_FILES = ["master_nfl_2000_2016_fixed.csv", "master_nfl_2018_2024_fixed_2.csv"]
+# Files whose home/away columns are still reversed as scraped (swap_teams.py only
+# fixed the 2018-2024 file): swapped back on load
+SWAPPED_FILES = {"master_nfl_2000_2016_fixed.csv"}
+CACHE_DIR = "backtest_cache"
+REPORT_DIR = "backtest_reports"
+PLAYOFF_ROUNDS = 4  # wildcard, divisional, conference, super bowl: the last 4 weeks of a season
+N_BINS = 10         # calibration bins of width 0.1
+EPS = 1e-15         # probabilities are clipped to [EPS, 1 - EPS] for log-loss
+
+
+def load_games(paths=GAME_FILES):
+    frames = []
+    for path in paths:
+        df = columnar.read_table(path)
+        if os.path.basename(path) in SWAPPED_FILES:
+            df = df.rename(columns={"home-team": "away-team", "away-team": "home-team",
+                                    "home-score": "away-score", "away-score": "home-score"})
+        frames.append(df)
+    games = pd.concat(frames, ignore_index=True)
+    return games.sort_values(by=["year", "week", "id"]).reset_index(drop=True)
+
+
+def _cache_file(paths):
+    h = hashlib.sha256()
+    h.update(repr(sorted(SWAPPED_FILES)).encode())
+    for path in [calc_elo.__file__] + list(paths):
+        with open(path, "rb") as f:
+            h.update(f.read())
+    return os.path.join(CACHE_DIR, f"pregame_{h.hexdigest()[:16]}.npz")
+
+
+def replay_pregame(games):
+    """Replay every game once and return one row per game with both teams' Elo
+       before it, the home expected win and the outcome."""
+    history, _, _ = calc_elo.replay_games(games)
+    played = history[~history["is_regression"]]  # home row, then away row, game by game
+
+    out = games[["id", "year", "week", "date", "home-team", "away-team", "home-score", "away-score"]].copy()
+    out["elo_home"] = played["elo_before"][0::2]
+    out["elo_away"] = played["elo_before"][1::2]
+    out["expected_win"] = played["expected_win"][0::2]
+    out["home_win"] = np.select([out["home-score"] > out["away-score"], out["home-score"] < out["away-score"]],
+                                [1.0, 0.0], 0.5)
+    last_week = out.groupby("year")["week"].transform("max")
+    out["week_type"] = np.where(out["week"] > last_week - PLAYOFF_ROUNDS, "playoff", "regular")
+    return out
+
+
+def pregame_frame(paths=GAME_FILES, refresh=False):
+    """replay_pregame for the game files, from the cache when the inputs are unchanged."""
+    cache_file = _cache_file(paths)
+    if not refresh and os.path.exists(cache_file):
+        with np.load(cache_file, allow_pickle=False) as data:
+            return pd.DataFrame({col: data[col] for col in data["columns"].tolist()})
+
+    frame = replay_pregame(load_games(paths))
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    arrays = {col: frame[col].to_numpy() if pd.api.types.is_numeric_dtype(frame[col])
+              else frame[col].to_numpy(dtype=str) for col in frame.columns}
+    np.savez(cache_file + ".tmp.npz", columns=np.array(frame.columns, dtype=str), **arrays)
+    os.replace(cache_file + ".tmp.npz", cache_file)
+    return frame
+
+
+def add_tss(games, history_file=calc_tss.HISTORY_FILE):
+    """Both teams' TSS as of each game (last snapshot before the game date), NaN
+       when there is no TSS history for that game."""
+    games = games.copy()
+    games["tss_home"] = np.nan
+    games["tss_away"] = np.nan
+    if os.path.exists(history_file):
+        timeline = calc_tss.load_timeline(pd.read_csv(history_file))
+        dates = pd.to_datetime(games["date"], format="%b %d, %Y", errors="coerce")
+        games["tss_home"] = calc_tss.tss_as_of_games(timeline, games["home-team"], dates)
+        games["tss_away"] = calc_tss.tss_as_of_games(timeline, games["away-team"], dates)
+    return games
+
+
+def tss_model(games):
+    return add_tss_active.tss_win_prob(games["tss_home"], games["tss_away"])
+
+
+def total_edge_model(games):
+    # add_tss_active's total edge (average of the Elo and TSS edges) as a probability
+    return 0.5 + ((games["expected_win"] - 0.5) + (tss_model(games) - 0.5)) / 2
+
+
+MODELS = {
+    "expected_win": lambda games: games["expected_win"],
+    "tss_win_prob": tss_model,
+    "total_edge": total_edge_model,
+}
+
+
+def score_rows(games, models=MODELS):
+    """Long frame of (model, game) rows with the per-game losses, for grouping."""
+    frames = []
+    for name, model in models.items():
+        p = np.asarray(model(games), dtype=float)
+        keep = ~np.isnan(p)
+        p, y = np.clip(p[keep], EPS, 1 - EPS), games["home_win"].to_numpy()[keep]
+        frames.append(pd.DataFrame({
+            "model": name,
+            "year": games["year"].to_numpy()[keep],
+            "week_type": games["week_type"].to_numpy()[keep],
+            "p": p,
+            "y": y,
+            "log_loss": -(y * np.log(p) + (1 - y) * np.log(1 - p)),
+            "brier": (p - y) ** 2,
+            # ties count toward log-loss and Brier but not accuracy
+            "correct": np.where(y == 0.5, np.nan, (p >= 0.5) == (y == 1)),
+            "bin": np.minimum((p * N_BINS).astype(int), N_BINS - 1),
+        }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def summarize(rows, by):
+    """log-loss, Brier, accuracy and expected calibration error per model and `by`."""
+    keys = ["model"] + list(by)
+    summary = rows.groupby(keys, sort=True).agg(
+        games=("p", "size"), log_loss=("log_loss", "mean"), brier=("brier", "mean"),
+        accuracy=("correct", "mean"), mean_p=("p", "mean"), home_win_rate=("y", "mean"))
+
+    # ECE: game-weighted gap between mean prediction and outcome rate per bin
+    bins = rows.groupby(keys + ["bin"]).agg(n=("p", "size"), p=("p", "mean"), y=("y", "mean"))
+    bins["gap"] = bins["n"] * (bins["p"] - bins["y"]).abs()
+    summary["ece"] = bins.groupby(keys)["gap"].sum() / summary["games"]
+    return summary.reset_index()
+
+
+def calibration_table(rows):
+    """Reliability bins per model: games, mean predicted and observed home win rate."""
+    table = rows.groupby(["model", "bin"]).agg(games=("p", "size"), mean_p=("p", "mean"), observed=("y", "mean"))
+    table = table.reset_index()
+    table["bin_low"] = table["bin"] / N_BINS
+    table["bin_high"] = (table["bin"] + 1) / N_BINS
+    return table[["model", "bin_low", "bin_high", "games", "mean_p", "observed"]]
+
+
+def backtest(models=MODELS, paths=GAME_FILES, refresh=False, output_dir=REPORT_DIR):
+    """Score each model on every game; writes per-season, per-week-type and
+       calibration reports to output_dir and returns them."""
+    games = add_tss(pregame_frame(paths, refresh))
+    rows = score_rows(games, models)
+
+    reports = {
+        "overall": summarize(rows, []),
+        "by_week_type": summarize(rows, ["week_type"]),
+        "by_season": summarize(rows, ["year", "week_type"]),
+        "calibration": calibration_table(rows),
+    }
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+        for name, report in reports.items():
+            report.to_csv(os.path.join(output_dir, f"backtest_{name}.csv"), index=False)
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Walk-forward backtest of expected_win / tss_win_prob / total_edge")
+    parser.add_argument("--refresh", action="store_true", help="Replay the games again instead of using the cache")
+    args = parser.parse_args()
+
+    reports = backtest(refresh=args.refresh)
+    pd.set_option("display.width", 120)
+    print(reports["overall"].to_string(index=False, float_format="%.4f"))
+    print()
+    print(reports["by_week_type"].to_string(index=False, float_format="%.4f"))
+    print(f"\n✅ Reports saved to {REPORT_DIR}/ (per season in backtest_by_season.csv)")
@@ -0,0 +1,62 @@
+import glob
+import os
+import time
+from io import StringIO
+
+import pandas as pd
+from bs4 import BeautifulSoup
+
+from game_summaries import parse_game_summaries
+
+FIXTURE_DIR = "fixtures/pfr"
+
+
+def legacy_parse(html):
+    """The previous approach: BeautifulSoup, then pd.read_html on every game table."""
+    soup = BeautifulSoup(html, "html.parser")
+    games = []
+    for block in soup.find_all("div", class_="game_summaries"):
+        tables = [t for t in block.find_all("table") if "stats" not in t.get("class", [])]
+        for table in tables:
+            df = pd.read_html(StringIO(str(table)))[0]
+            scores = []
+            for r in (1, 2):
+                try:
+                    scores.append(int(df.iloc[r, 1]))
+                except (ValueError, TypeError):
+                    scores.append(None)
+            games.append((df.iloc[0, 0], df.iloc[1, 0], scores[0], df.iloc[2, 0], scores[1]))
+    return games
+
+
+def time_per_page(parse, pages, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for html in pages.values():
+            parse(html)
+    return (time.perf_counter() - start) / (repeat * len(pages))
+
+
+def run_benchmark(fixture_dir=FIXTURE_DIR, repeat=5):
+    pages = {}
+    for path in sorted(glob.glob(os.path.join(fixture_dir, "*.htm"))):
+        with open(path, encoding="utf-8") as f:
+            pages[os.path.basename(path)] = f.read()
+
+    # Both parsers must agree before timing means anything
+    for name, html in pages.items():
+        old, new = legacy_parse(html), parse_game_summaries(html)
+        if old != new:
+            raise AssertionError(f"{name}: parsers disagree\n{old}\n{new}")
+        print(f"{name}: {len(new)} games, {sum(g[2] is not None for g in new)} final")
+
+    before = time_per_page(legacy_parse, pages, repeat)
+    after = time_per_page(parse_game_summaries, pages, repeat)
+    print(f"\nBeautifulSoup + read_html: {before * 1000:.1f} ms/page")
+    print(f"game_summaries (lxml):     {after * 1000:.1f} ms/page")
+    print(f"Speedup: {before / after:.0f}x")
+    return before, after
+
+
+if __name__ == "__main__":
+    run_benchmark()
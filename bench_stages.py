@@ -0,0 +1,239 @@
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+# Benchmarks for the pipeline stages, offline (nothing is scraped).
+# Each benchmark runs in a fresh interpreter inside a scratch copy of the repo, so
+# the real outputs and the active store are never touched and peak memory is per
+# stage. The shipped csvs are used as they are; synthetic leagues (more teams, more
+# seasons) show how the season-sized stages scale. Results are compared against
+# bench_baseline.json: a stage fails when it is more than TIME_TOLERANCE slower or
+# MEMORY_TOLERANCE bigger than its baseline. `--save-baseline` records a new one
+# (timings are machine-specific, so re-save on a new machine).
+ROOT = os.path.dirname(os.path.abspath(__file__))
+BASELINE_FILE = os.path.join(ROOT, "bench_baseline.json")
+TIME_TOLERANCE = 0.30    # fraction slower than baseline before failing
+TIME_SLACK = 0.05        # seconds; below this, timer noise dominates
+MEMORY_TOLERANCE = 0.20  # fraction more peak memory than baseline before failing
+
+# Synthetic leagues: (teams, seasons). Each season has 18 regular weeks of random
+# pairings plus 4 playoff weeks ending in a single-game final.
+SCALES = {
+    "small": (32, 25),     # about the shipped 2000-2024 history, ~6.9k games
+    "medium": (64, 100),   # ~60k games
+    "large": (256, 200),   # ~460k games
+    "xl": (512, 250),      # ~1.15M games
+}
+DEFAULT_SCALES = ["shipped", "small", "medium"]
+PLAYOFF_GAMES = [6, 4, 2, 1]
+COPY_IGNORE = shutil.ignore_patterns(".git", "__pycache__", "page_cache", "backtest_cache", "backtest_reports",
+                                     "pipeline_logs", "*.png", "*.db", "*.db-*", "bench_output.txt")
+
+# name: cwd, scales it runs at, untimed setup, timed run, and the item count
+# (throughput) evaluated afterwards. {games}/{history}/{warehouse} are replaced by
+# the shipped or synthetic inputs of the scale.
+BENCHES = [
+    {"name": "compute_elo", "cwd": ".", "unit": "games", "scales": "all",
+     "setup": "import calc_elo",
+     "run": "hist = calc_elo.compute_elo('{games}', 'bench_history.csv')",
+     "items": "int((hist['type'] == 'game').sum()) // 2"},
+    {"name": "generate_elo_summaries", "cwd": ".", "unit": "rows", "scales": "all",
+     "setup": "import elo_profile, pandas as pd",
+     "run": "elo_profile.generate_elo_summaries('{history}', 'bench_matchup.csv', 'bench_profile.csv')",
+     "items": "len(pd.read_csv('{history}', usecols=['id']))"},
+    {"name": "team_expected_win_percentages", "cwd": ".", "unit": "rows", "scales": ["shipped", "small"],
+     "setup": "import win_report, pandas as pd",
+     "run": "win_report.team_expected_win_percentages('{history}', 'bench_win_report', workers=1)",
+     "items": "len(pd.read_csv('{history}', usecols=['id']))"},
+    {"name": "calc_tss", "cwd": "team_strength", "unit": "team-snapshots", "scales": "all",
+     "setup": "import calc_tss",
+     "run": "calc_tss.main('{warehouse}')",
+     "items": "len(pd.read_csv(calc_tss.HISTORY_FILE))"},
+    {"name": "predict_week", "cwd": "prediction", "unit": "games", "scales": ["shipped"],
+     "setup": "import predict, pandas as pd",
+     "run": "predict.predict_week(6)",
+     "items": "int((pd.read_csv('schedule.csv')['week'] == 6).sum())"},
+    {"name": "update_week", "cwd": "prediction", "unit": "games", "scales": ["shipped"],
+     # the week is predicted first (untimed); its page comes from the saved fixture
+     "setup": "import predict, update\npredict.predict_week(6)\nresults = update.final_results(open('../fixtures/pfr/2025_week_6.htm').read())",
+     "run": "applied, skipped = update.apply_week_results(2025, 6, results)",
+     "items": "len(applied)"},
+    {"name": "add_tss_to_active", "cwd": "team_strength", "unit": "games", "scales": ["shipped"],
+     "setup": "import add_tss_active",
+     "run": "rows = add_tss_active.add_tss_to_active(6)",
+     "items": "len(rows) // 2"},
+]
+
+CHILD = """
+import contextlib, io, json, time
+import pandas as pd
+{setup}
+with contextlib.redirect_stdout(io.StringIO()):
+    start = time.perf_counter()
+{run}
+    seconds = time.perf_counter() - start
+items = {items}
+# VmHWM rather than ru_maxrss, which keeps the parent's peak across exec
+with open("/proc/self/status") as f:
+    peak_kb = next(int(line.split()[1]) for line in f if line.startswith("VmHWM"))
+print("BENCH " + json.dumps({{"seconds": seconds, "items": items,
+                             "peak_mb": peak_kb / 1024}}))
+"""
+
+
+def synthetic_league(n_teams, n_seasons, seed=0, first_year=2000):
+    """Game rows in the master csv layout for a made-up league."""
+    rng = np.random.default_rng(seed)
+    teams = np.array([f"Team {i:04d}" for i in range(n_teams)], dtype=object)
+    frames = []
+    for season in range(n_seasons):
+        year = first_year + season
+        weeks = [n_teams // 2] * 18 + [min(n, n_teams // 2) for n in PLAYOFF_GAMES]
+        for week, n_games in enumerate(weeks, start=1):
+            order = rng.permutation(n_teams)[:2 * n_games]
+            home_score = rng.integers(0, 45, n_games)
+            away_score = rng.integers(0, 45, n_games)
+            home, away = teams[order[0::2]], teams[order[1::2]]
+            frames.append(pd.DataFrame({
+                "id": [f"{year}-{week}-{k + 1}" for k in range(n_games)],
+                "year": year, "week": week,
+                "home-team": home, "home-score": home_score,
+                "away-team": away, "away-score": away_score,
+                "winner": np.where(home_score > away_score, home,
+                                   np.where(home_score < away_score, away, "Tie")),
+                "date": f"Sep 7, {year}",
+            }))
+    return pd.concat(frames, ignore_index=True)
+
+
+def synthetic_warehouse(path, n_seasons, seed=0, first_year=2000):
+    """A stat warehouse with 23 weekly snapshots of every stat for n_seasons."""
+    sys.path.append(os.path.join(ROOT, "team_strength"))
+    import calc_tss
+    import stat_warehouse
+    import team_registry
+
+    rng = np.random.default_rng(seed)
+    conn = stat_warehouse.connect(path)
+    with conn:
+        stat_warehouse._add_columns(conn, calc_tss.ALL_STATS)
+        rows = []
+        for season in range(first_year, first_year + n_seasons):
+            for week in range(23):
+                snapshot = str(pd.Timestamp(f"{season}-09-10") + pd.Timedelta(days=7 * week))[:10]
+                values = rng.normal(20, 5, (team_registry.N_TEAMS, len(calc_tss.ALL_STATS)))
+                rows += [(season, snapshot, team, *values[team]) for team in range(team_registry.N_TEAMS)]
+        columns = ", ".join(stat_warehouse.KEY + calc_tss.ALL_STATS)
+        conn.executemany(f"INSERT INTO stats ({columns}) VALUES ({', '.join('?' * (3 + len(calc_tss.ALL_STATS)))})",
+                         rows)
+    conn.close()
+
+
+def scale_inputs(scale, workdir):
+    """Input paths of a scale inside the scratch copy."""
+    if scale == "shipped":
+        warehouse = os.path.join(workdir, "bench_warehouse_shipped.db")
+        if not os.path.exists(warehouse):
+            synthetic_warehouse(warehouse, 1, first_year=2025)  # no tables ship with the repo
+        return {"games": os.path.join(workdir, "master_nfl_2018_2024_fixed_2.csv"),
+                "history": os.path.join(workdir, "nfl_elo_history_2018_2024.csv"),
+                "warehouse": warehouse}
+
+    n_teams, n_seasons = SCALES[scale]
+    games = os.path.join(workdir, f"bench_games_{scale}.csv")
+    history = os.path.join(workdir, f"bench_history_{scale}.csv")
+    warehouse = os.path.join(workdir, f"bench_warehouse_{scale}.db")
+    if not os.path.exists(games):
+        synthetic_league(n_teams, n_seasons).to_csv(games, index=False)
+        # the history the readers take is compute_elo's output for the same league
+        subprocess.run([sys.executable, "-c", f"import calc_elo; calc_elo.compute_elo({games!r}, {history!r})"],
+                       cwd=workdir, check=True, stdout=subprocess.DEVNULL)
+        synthetic_warehouse(warehouse, n_seasons)
+    return {"games": games, "history": history, "warehouse": warehouse}
+
+
+def run_bench(bench, inputs, workdir):
+    """Run one benchmark in a fresh interpreter; returns its measurements."""
+    code = CHILD.format(setup=bench["setup"].format(**inputs),
+                        run="\n".join("    " + line for line in bench["run"].format(**inputs).splitlines()),
+                        items=bench["items"].format(**inputs))
+    env = dict(os.environ, NFL_PAGE_CACHE_OFFLINE="1",
+               PYTHONPATH=os.pathsep.join([os.path.join(workdir, bench["cwd"]), workdir,
+                                           os.path.join(workdir, "prediction"), os.path.join(workdir, "team_strength")]))
+    result = subprocess.run([sys.executable, "-c", code], cwd=os.path.join(workdir, bench["cwd"]), env=env,
+                            capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"{bench['name']} failed:\n{result.stderr[-2000:]}")
+    line = [l for l in result.stdout.splitlines() if l.startswith("BENCH ")][-1]
+    measured = json.loads(line[len("BENCH "):])
+    measured["throughput"] = measured["items"] / measured["seconds"] if measured["seconds"] else float("inf")
+    return measured
+
+
+def compare(measured, baseline):
+    """'ok', 'new', or what regressed against the baseline entry."""
+    if baseline is None:
+        return "new"
+    problems = []
+    if measured["seconds"] > baseline["seconds"] * (1 + TIME_TOLERANCE) + TIME_SLACK:
+        problems.append(f"{measured['seconds'] / baseline['seconds']:.1f}x slower")
+    if measured["peak_mb"] > baseline["peak_mb"] * (1 + MEMORY_TOLERANCE):
+        problems.append(f"{measured['peak_mb'] / baseline['peak_mb']:.1f}x memory")
+    return ", ".join(problems) or "ok"
+
+
+def run_suite(scales=DEFAULT_SCALES, names=None, save_baseline=False):
+    """Run the benchmarks; returns {"stage@scale": measurements + status}."""
+    baseline = {}
+    if os.path.exists(BASELINE_FILE):
+        with open(BASELINE_FILE) as f:
+            baseline = json.load(f)
+
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="nfl_bench_") as tmp:
+        workdir = os.path.join(tmp, "repo")
+        shutil.copytree(ROOT, workdir, ignore=COPY_IGNORE)
+        for scale in scales:
+            inputs = scale_inputs(scale, workdir)
+            for bench in BENCHES:
+                if names and bench["name"] not in names:
+                    continue
+                if bench["scales"] != "all" and scale not in bench["scales"]:
+                    continue
+                key = f"{bench['name']}@{scale}"
+                measured = run_bench(bench, inputs, workdir)
+                measured["unit"] = bench["unit"]
+                measured["status"] = compare(measured, baseline.get(key))
+                results[key] = measured
+                print(f"{key:<42}{measured['seconds']:9.3f}s {measured['peak_mb']:8.1f} MB "
+                      f"{measured['throughput']:12,.0f} {bench['unit']}/s  {measured['status']}")
+
+    if save_baseline:
+        baseline.update({key: {k: r[k] for k in ("seconds", "peak_mb", "throughput", "items", "unit")}
+                         for key, r in results.items()})
+        with open(BASELINE_FILE, "w") as f:
+            json.dump(baseline, f, indent=1, sort_keys=True)
+        print(f"✅ Saved baseline for {len(results)} benchmarks to {BASELINE_FILE}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the pipeline stages against bench_baseline.json")
+    parser.add_argument("stages", nargs="*", help="Only these stages (default: all)")
+    parser.add_argument("--scale", nargs="+", default=DEFAULT_SCALES, choices=["shipped"] + list(SCALES),
+                        help="Inputs to run on (large/xl take minutes)")
+    parser.add_argument("--save-baseline", action="store_true", help="Record these results as the new baseline")
+    args = parser.parse_args()
+
+    results = run_suite(args.scale, args.stages or None, args.save_baseline)
+    failed = [key for key, r in results.items() if r["status"] not in ("ok", "new")]
+    if failed and not args.save_baseline:
+        print(f"❌ Slower or bigger than baseline: {', '.join(failed)}")
+        sys.exit(1)
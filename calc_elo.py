@@ -1,10 +1,21 @@
 import pandas as pd
+import numpy as np
 import math
+import logging
+import argparse
+import json
+import os
+
+import columnar
+
+# [GAME]/[UPDATE] lines log at DEBUG, [CLAMP]/[CAP] at INFO; silent unless configured
+logger = logging.getLogger(__name__)
 
 # Parameters
 INITIAL_ELO = 1500
 HOME_FIELD_ADV = 65
 ALPHA = 0.3  # scaling factor for number-of-scores multiplier
+SUPER_BOWL_MIN_WEEK = 21  # week 21 (17-game seasons) or 22 (18-game seasons)
 
 # K-factors by week
 def get_k_factor(week: int) -> int:
@@ -21,9 +32,9 @@ def get_k_factor(week: int) -> int:
     else:
         return 20
 
-# Expected win probability (with clamp logging)
-def expected_score(rating_a, rating_b, home_advantage=0, is_home=True,
-                   game_id=None, year=None, week=None, team_a=None, team_b=None):
+# Expected win probability plus whether the ±10 clamp fired
+def _expected_and_clamp(rating_a, rating_b, home_advantage=0, is_home=True,
+                        game_id=None, year=None, week=None, team_a=None, team_b=None):
     if is_home:
         ra = rating_a + home_advantage
         rb = rating_b
@@ -33,12 +44,19 @@ def expected_score(rating_a, rating_b, home_advantage=0, is_home=True,
 
     raw_diff = (rb - ra) / 400
 
-    if raw_diff > 10 or raw_diff < -10:
-        print(f"[CLAMP] {game_id} {year} W{week}: Elo diff too large ({raw_diff:.2f}) "
-              f"({team_a} {rating_a:.1f} vs {team_b} {rating_b:.1f}) -> clamped to ±10")
+    clamped = raw_diff > 10 or raw_diff < -10
+    if clamped:
+        logger.info("[CLAMP] %s %s W%s: Elo diff too large (%.2f) (%s %.1f vs %s %.1f) -> clamped to ±10",
+                    game_id, year, week, raw_diff, team_a, rating_a, team_b, rating_b)
 
     diff = max(min(raw_diff, 10), -10)
-    return 1 / (1 + 10 ** diff)
+    return 1 / (1 + 10 ** diff), clamped
+
+# Expected win probability (with clamp logging)
+def expected_score(rating_a, rating_b, home_advantage=0, is_home=True,
+                   game_id=None, year=None, week=None, team_a=None, team_b=None):
+    return _expected_and_clamp(rating_a, rating_b, home_advantage, is_home,
+                               game_id, year, week, team_a, team_b)[0]
 
 # Number-of-scores multiplier (capped)
 def score_multiplier(score_diff, alpha=ALPHA, cap=1.75):
@@ -52,15 +70,15 @@ def surprise_factor(expected, cap=3.0):
     val = 2.2 / (0.001 + (expected * (1 - expected)))
     return min(val, cap)
 
-# Elo update (with swing cap and logging)
-def update_elo(rating_a, rating_b, score_a, score_b, is_home_a, k_factor,
-               game_id=None, year=None, week=None, home_team=None, away_team=None):
-    print(f"[GAME] {game_id} {year} W{week}: "
-          f"{home_team} {rating_a:.1f} vs {away_team} {rating_b:.1f}, "
-          f"score {score_a}-{score_b}, K={k_factor}")
+# Elo update returning the per-game components: (exp_a, mult, adj, raw_change, capped, clamped)
+def update_elo_traced(rating_a, rating_b, score_a, score_b, is_home_a, k_factor,
+                      game_id=None, year=None, week=None, home_team=None, away_team=None):
+    logger.debug("[GAME] %s %s W%s: %s %.1f vs %s %.1f, score %s-%s, K=%s",
+                 game_id, year, week, home_team, rating_a, away_team, rating_b,
+                 score_a, score_b, k_factor)
 
-    exp_a = expected_score(rating_a, rating_b, HOME_FIELD_ADV, is_home_a,
-                           game_id, year, week, home_team, away_team)
+    exp_a, clamped = _expected_and_clamp(rating_a, rating_b, HOME_FIELD_ADV, is_home_a,
+                                         game_id, year, week, home_team, away_team)
 
     if score_a > score_b:
         s_a, s_b = 1, 0
@@ -73,113 +91,361 @@ def update_elo(rating_a, rating_b, score_a, score_b, is_home_a, k_factor,
     mult = score_multiplier(diff)
     adj = surprise_factor(exp_a)
 
-    change_a = k_factor * mult * adj * (s_a - exp_a)
-    if abs(change_a) > 50:
-        print(f"[CAP] {game_id} {year} W{week}: change {change_a:.1f} capped to ±50")
-    change_a = max(min(change_a, 50), -50)
+    raw_change = k_factor * mult * adj * (s_a - exp_a)
+    capped = abs(raw_change) > 50
+    if capped:
+        logger.info("[CAP] %s %s W%s: change %.1f capped to ±50", game_id, year, week, raw_change)
+    change_a = max(min(raw_change, 50), -50)
 
     change_b = -change_a
 
     new_a = rating_a + change_a
     new_b = rating_b + change_b
 
-    print(f"[UPDATE] {game_id}: {home_team} -> {new_a:.1f}, {away_team} -> {new_b:.1f}, "
-          f"mult={mult:.2f}, adj={adj:.2f}, exp_a={exp_a:.3f}")
+    logger.debug("[UPDATE] %s: %s -> %.1f, %s -> %.1f, mult=%.2f, adj=%.2f, exp_a=%.3f",
+                 game_id, home_team, new_a, away_team, new_b, mult, adj, exp_a)
 
-    return new_a, new_b, exp_a
+    return new_a, new_b, (exp_a, mult, adj, raw_change, capped, clamped)
 
-                                                                                                            # input/output
-def compute_elo(csv_path="master_nfl_2018_2024_fixed_2.csv", output_path="nfl_elo_history_2018_2024.csv"): # using 2018 - 2024 seasons 
-    df = pd.read_csv(csv_path)
-    df = df.sort_values(by=["year", "week", "id"]).reset_index(drop=True)
+# Elo update (with swing cap and logging)
+def update_elo(rating_a, rating_b, score_a, score_b, is_home_a, k_factor,
+               game_id=None, year=None, week=None, home_team=None, away_team=None):
+    new_a, new_b, trace = update_elo_traced(rating_a, rating_b, score_a, score_b, is_home_a,
+                                            k_factor, game_id, year, week, home_team, away_team)
+    return new_a, new_b, trace[0]
+
+# Preallocated history record (teams and game rows stored as integer codes)
+HISTORY_DTYPE = np.dtype([
+    ("game", np.int32),         # row into the sorted games frame, -1 for regression rows
+    ("year", np.int64),
+    ("week", np.int64),
+    ("team", np.int32),         # code into the team index
+    ("elo_before", np.float64),
+    ("elo_after", np.float64),
+    ("expected_win", np.float64),
+    ("season_start_elo", np.float64),
+    ("next_season_start_elo", np.float64),
+    ("is_regression", np.bool_),
+    # per-game trace (team perspective), exported with compute_elo(trace=True)
+    ("mult", np.float64),
+    ("adj", np.float64),
+    ("raw_change", np.float64),
+    ("capped", np.bool_),
+    ("clamped", np.bool_),
+])
+
+TRACE_COLUMNS = ["mult", "adj", "raw_change", "capped", "clamped"]
+
+
+def season_end_mask(df):
+    """True for games after which the season regression applies: the games of a
+       season's last week, once that week is the single-game Super Bowl.
+       A season still in progress therefore never regresses early."""
+    last_week = df.groupby("year")["week"].transform("max")
+    games_in_week = df.groupby(["year", "week"])["week"].transform("size")
+    return ((df["week"] == last_week) &
+            (last_week >= SUPER_BOWL_MIN_WEEK) &
+            (games_in_week == 1)).to_numpy()
+
+
+def replay_games(df, state=None, season_end=None):
+    """Replay sorted games over integer-coded teams.
+       state resumes from a previous replay (see load_checkpoint); season_end
+       defaults to season_end_mask(df).
+       Returns (history structured array, end state dict, per-week snapshots)
+       where each snapshot is the rating state before a week's first game."""
+    n_games = len(df)
+    if season_end is None:
+        season_end = season_end_mask(df)
+
+    # Integer-code teams in first-appearance order (home before away, game by game),
+    # keeping the codes of teams already in the resumed state
+    known = list(state["teams"]) if state else []
+    pairs = np.empty(2 * n_games, dtype=object)
+    pairs[0::2] = df["home-team"].to_numpy()
+    pairs[1::2] = df["away-team"].to_numpy()
+    known_set = set(known)
+    teams = known + [t for t in pd.unique(pairs) if t not in known_set]
+    codes = pd.Index(teams).get_indexer(pairs)
+    home_codes = codes[0::2].tolist()
+    away_codes = codes[1::2].tolist()
+    n_teams = len(teams)
 
-    ratings = {}
-    season_start_elos = {}
-    history = []
+    years = df["year"].tolist()
+    weeks = df["week"].tolist()
+    home_scores = df["home-score"].tolist()
+    away_scores = df["away-score"].tolist()
+    game_ids = df["id"].tolist()
 
-    for _, row in df.iterrows():
-        year, week = row["year"], row["week"]
-        home, away = row["home-team"], row["away-team"]
-        hs, as_ = row["home-score"], row["away-score"]
-        game_id, date = row["id"], row["date"]
+    # Season-end boundaries computed once up front
+    n_regressions = int(season_end.sum())
 
-        # Ensure both teams exist with proper season baseline
-        for team in [home, away]:
-            if team not in ratings:
-                ratings[team] = INITIAL_ELO
+    history = np.empty(2 * n_games + n_regressions * n_teams, dtype=HISTORY_DTYPE)
+    history["next_season_start_elo"] = np.nan
 
-            if (year, team) not in season_start_elos:
-                if (year - 1, team) in season_start_elos:
-                    season_start_elos[(year, team)] = ratings[team]  # carry over last regressed rating
-                else:
-                    season_start_elos[(year, team)] = INITIAL_ELO
+    ratings = np.full(n_teams, float(INITIAL_ELO))
+    season_start = ratings.copy()
+    n_seen = len(known)  # teams enter the rating pool in code order
+    current_year = None
+    if state:
+        ratings[:n_seen] = state["ratings"]
+        season_start[:n_seen] = state["season_start"]
+        current_year = state["current_year"]
+    pos = 0
+    snap_keys, snap_ratings, snap_starts = [], [], []
 
-        r_home, r_away = ratings[home], ratings[away]
+    for i in range(n_games):
+        year, week = years[i], weeks[i]
+        home, away = home_codes[i], away_codes[i]
+
+        # Week snapshot, used to restart a replay from this week
+        if i == 0 or week != weeks[i - 1] or year != years[i - 1]:
+            snap_keys.append((year, week, -1 if current_year is None else current_year, n_seen))
+            snap_ratings.append(ratings.copy())
+            snap_starts.append(season_start.copy())
+
+        # New season: every team's baseline is its (already regressed) rating
+        if year != current_year:
+            season_start[:] = ratings
+            current_year = year
+        n_seen = max(n_seen, home + 1, away + 1)
+
+        r_home, r_away = float(ratings[home]), float(ratings[away])
         k = get_k_factor(week)
 
-        new_home, new_away, exp_home = update_elo(
-            r_home, r_away, hs, as_, True, k,
-            game_id, year, week, home, away
+        new_home, new_away, (exp_home, mult, adj, raw_change, capped, clamped) = update_elo_traced(
+            r_home, r_away, home_scores[i], away_scores[i], True, k,
+            game_ids[i], year, week, teams[home], teams[away]
         )
-        exp_away = 1 - exp_home
 
         ratings[home] = new_home
         ratings[away] = new_away
 
-        # Record for home
-        history.append({
-            "id": game_id,
-            "year": year,
-            "week": week,
-            "date": date,
-            "team": home,
-            "elo_before": r_home,
-            "elo_after": new_home,
-            "expected_win": exp_home,
-            "season_start_elo": season_start_elos[(year, home)],
-            "type": "game"
-        })
-        # Record for away
-        history.append({
-            "id": game_id,
-            "year": year,
-            "week": week,
-            "date": date,
-            "team": away,
-            "elo_before": r_away,
-            "elo_after": new_away,
-            "expected_win": exp_away,
-            "season_start_elo": season_start_elos[(year, away)],
-            "type": "game"
-        })
+        history[pos] = (i, year, week, home, r_home, new_home, exp_home,
+                         season_start[home], np.nan, False,
+                         mult, adj, raw_change, capped, clamped)
+        history[pos + 1] = (i, year, week, away, r_away, new_away, 1 - exp_home,
+                            season_start[away], np.nan, False,
+                            mult, adj, -raw_change, capped, clamped)
+        pos += 2
 
         # Apply regression after Super Bowl
-        if week == df[df["year"] == year]["week"].max():
-            regression_records = []
-            for team, rating in ratings.items():
-                new_rating = 0.75 * rating + 0.25 * INITIAL_ELO
-                regression_records.append({
-                    "id": f"{year}-regression",
-                    "year": year,
-                    "week": 23,
-                    "date": f"offseason {year}",
-                    "team": team,
-                    "elo_before": rating,                     # end of season
-                    "elo_after": new_rating,                  # regressed value
-                    "expected_win": None,
-                    "season_start_elo": season_start_elos[(year, team)],  # start of finished season
-                    "next_season_start_elo": new_rating,      # start of next season
-                    "type": "regression"
-                })
-                ratings[team] = new_rating
-                season_start_elos[(year + 1, team)] = new_rating  # baseline for next season
-            history.extend(regression_records)
-
-    hist_df = pd.DataFrame(history)
-    hist_df.to_csv(output_path, index=False)
-    print(f"Saved Elo history to {output_path}")
+        if season_end[i]:
+            block = history[pos:pos + n_seen]
+            before = ratings[:n_seen].copy()
+            ratings[:n_seen] = 0.75 * before + 0.25 * INITIAL_ELO
+            block["game"] = -1
+            block["year"] = year
+            block["week"] = 23
+            block["team"] = np.arange(n_seen)
+            block["elo_before"] = before                    # end of season
+            block["elo_after"] = ratings[:n_seen]           # regressed value
+            block["expected_win"] = np.nan
+            block["season_start_elo"] = season_start[:n_seen]  # start of finished season
+            block["next_season_start_elo"] = ratings[:n_seen]  # start of next season
+            block["is_regression"] = True
+            block["mult"] = np.nan
+            block["adj"] = np.nan
+            block["raw_change"] = np.nan
+            block["capped"] = False
+            block["clamped"] = False
+            season_start[:n_seen] = ratings[:n_seen]        # baseline for next season
+            pos += n_seen
+
+    last_game = state.get("last_game") if state else None
+    if n_games:
+        last_game = {"year": years[-1], "week": weeks[-1], "id": game_ids[-1]}
+
+    end_state = {
+        "teams": teams,
+        "ratings": ratings,
+        "season_start": season_start,
+        "current_year": current_year,
+        "last_game": last_game,
+    }
+    keys = np.array(snap_keys, dtype=np.int64).reshape(-1, 4)
+    snapshots = {
+        "year": keys[:, 0],
+        "week": keys[:, 1],
+        "current_year": keys[:, 2],
+        "n_seen": keys[:, 3],
+        "ratings": np.array(snap_ratings).reshape(-1, n_teams),
+        "season_start": np.array(snap_starts).reshape(-1, n_teams),
+    }
+    return history[:pos], end_state, snapshots
+
+
+def save_checkpoint(state, path):
+    """Persist the end-of-replay state (ratings, season starts, last game) as JSON."""
+    checkpoint = {
+        "last_game": state["last_game"],
+        "current_year": state["current_year"],
+        "teams": list(state["teams"]),
+        "ratings": [float(r) for r in state["ratings"]],
+        "season_start": [float(r) for r in state["season_start"]],
+    }
+    with open(path, "w") as f:
+        json.dump(checkpoint, f, indent=2)
+
+
+def load_checkpoint(path):
+    with open(path) as f:
+        state = json.load(f)
+    state["ratings"] = np.array(state["ratings"], dtype=np.float64)
+    state["season_start"] = np.array(state["season_start"], dtype=np.float64)
+    return state
+
+
+def checkpoint_path_for(output_path):
+    return os.path.splitext(output_path)[0] + "_checkpoint.json"
+
+
+def snapshot_path_for(output_path):
+    return os.path.splitext(output_path)[0] + "_snapshots.npz"
+
+
+def save_snapshots(snapshots, teams, path):
+    np.savez(path, teams=np.array(teams, dtype=str), **snapshots)
+
+
+def load_snapshots(path):
+    with np.load(path) as data:
+        snapshots = {key: data[key] for key in data.files}
+    teams = snapshots.pop("teams").tolist()
+    return snapshots, teams
+
+
+def combine_snapshots(earlier, later, n_teams):
+    """Stack two snapshot sets, padding rating columns of teams not seen yet.
+       If later starts mid-way through earlier's last week, earlier's
+       start-of-week snapshot is kept."""
+    if (len(earlier["year"]) and len(later["year"]) and
+            earlier["year"][-1] == later["year"][0] and earlier["week"][-1] == later["week"][0]):
+        later = {key: value[1:] for key, value in later.items()}
+
+    combined = {}
+    for key in ["year", "week", "current_year", "n_seen"]:
+        combined[key] = np.concatenate([earlier[key], later[key]])
+    for key in ["ratings", "season_start"]:
+        block = np.full((len(combined["year"]), n_teams), float(INITIAL_ELO))
+        n_earlier = len(earlier[key])
+        block[:n_earlier, :earlier[key].shape[1]] = earlier[key]
+        block[n_earlier:, :later[key].shape[1]] = later[key]
+        combined[key] = block
+    return combined
+
+
+def state_from_snapshot(snapshots, teams, index):
+    """Rebuild replay_games' resume state from one week snapshot."""
+    n_seen = int(snapshots["n_seen"][index])
+    current_year = int(snapshots["current_year"][index])
+    return {
+        "teams": teams[:n_seen],
+        "ratings": snapshots["ratings"][index, :n_seen].copy(),
+        "season_start": snapshots["season_start"][index, :n_seen].copy(),
+        "current_year": None if current_year < 0 else current_year,
+    }
+
+
+def games_after(df, last_game):
+    """Games strictly after last_game in (year, week, id) replay order."""
+    year, week, game_id = last_game["year"], last_game["week"], last_game["id"]
+    ids = df["id"].astype(str)  # .npz input loads id as an unordered categorical
+    newer = ((df["year"] > year) |
+             ((df["year"] == year) & ((df["week"] > week) |
+                                      ((df["week"] == week) & (ids > game_id)))))
+    return newer.to_numpy()
+
+
+def history_to_frame(history, df, teams, trace=False):
+    """Expand a replayed history array into the nfl_elo_history CSV layout.
+       With trace=True the per-game components are appended as extra columns."""
+    game_rows = history["game"]
+    is_reg = history["is_regression"]
+    years = history["year"]
+
+    ids = np.empty(len(history), dtype=object)
+    dates = np.empty(len(history), dtype=object)
+    ids[~is_reg] = df["id"].to_numpy()[game_rows[~is_reg]]
+    dates[~is_reg] = df["date"].to_numpy()[game_rows[~is_reg]]
+    ids[is_reg] = [f"{y}-regression" for y in years[is_reg]]
+    dates[is_reg] = [f"offseason {y}" for y in years[is_reg]]
+
+    hist_df = pd.DataFrame({
+        "id": ids,
+        "year": years,
+        "week": history["week"],
+        "date": dates,
+        "team": np.asarray(teams, dtype=object)[history["team"]],
+        "elo_before": history["elo_before"],
+        "elo_after": history["elo_after"],
+        "expected_win": history["expected_win"],
+        "season_start_elo": history["season_start_elo"],
+        "type": np.where(is_reg, "regression", "game").astype(object),
+        "next_season_start_elo": history["next_season_start_elo"],
+    })
+    if trace:
+        for col in TRACE_COLUMNS:
+            hist_df[col] = history[col]
+    return hist_df
+
+                                                                                                            # input/output
+def compute_elo(csv_path="master_nfl_2018_2024_fixed_2.csv", output_path="nfl_elo_history_2018_2024.csv", # using 2018 - 2024 seasons 
+                trace=False, append=False, checkpoint_path=None):
+    """Replay games into an Elo history CSV and save an end-state checkpoint
+       and per-week rating snapshots next to it. With append=True only games
+       after the checkpoint are replayed and their rows appended to the
+       existing history."""
+    df = columnar.read_table(csv_path)
+    df = df.sort_values(by=["year", "week", "id"]).reset_index(drop=True)
+
+    if checkpoint_path is None:
+        checkpoint_path = checkpoint_path_for(output_path)
+    snapshot_path = snapshot_path_for(output_path)
+
+    if append and os.path.exists(checkpoint_path) and os.path.exists(output_path):
+        # Only replay games newer than the checkpoint and append their rows
+        state = load_checkpoint(checkpoint_path)
+        season_end = season_end_mask(df)
+        new = games_after(df, state["last_game"])
+        if not new.any():
+            print(f"No games after {state['last_game']['id']}, {output_path} is up to date")
+            return pd.DataFrame()
+
+        df_new = df[new].reset_index(drop=True)
+        history, state, snapshots = replay_games(df_new, state, season_end[new])
+        if os.path.exists(snapshot_path):
+            earlier, _ = load_snapshots(snapshot_path)
+            snapshots = combine_snapshots(earlier, snapshots, len(state["teams"]))
+
+        hist_df = history_to_frame(history, df_new, state["teams"], trace=True)
+        if columnar.is_columnar(output_path):
+            existing = columnar.read_table(output_path)
+            hist_df = hist_df.reindex(columns=existing.columns)
+            columnar.write_table(pd.concat([existing, hist_df], ignore_index=True), output_path)
+        else:
+            columns = pd.read_csv(output_path, nrows=0).columns
+            hist_df = hist_df.reindex(columns=columns)
+            hist_df.to_csv(output_path, mode="a", header=False, index=False)
+        print(f"Appended {len(df_new)} games to {output_path}")
+    else:
+        history, state, snapshots = replay_games(df)
+
+        hist_df = history_to_frame(history, df, state["teams"], trace=trace)
+        columnar.write_table(hist_df, output_path)
+        print(f"Saved Elo history to {output_path}")
+
+    save_checkpoint(state, checkpoint_path)
+    save_snapshots(snapshots, state["teams"], snapshot_path)
     return hist_df
 
 
 if __name__ == "__main__":
-    compute_elo()
+    parser = argparse.ArgumentParser(description="Replay game results into an Elo history CSV")
+    parser.add_argument("--log-level", default="WARNING", help="DEBUG shows every game, INFO shows caps/clamps")
+    parser.add_argument("--trace", action="store_true", help="Add mult/adj/raw_change/capped/clamped columns")
+    parser.add_argument("--append", action="store_true", help="Only process games newer than the saved checkpoint")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=args.log_level.upper(), format="%(message)s")
+    compute_elo(trace=args.trace, append=args.append)
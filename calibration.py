@@ -0,0 +1,245 @@
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+# Calibration of the pre-game win probabilities, fitted on the backtest games.
+#   platt     p_elo -> sigmoid(a * logit(p_elo) + b)
+#   isotonic  p_elo -> monotone step function (pool adjacent violators), interpolated
+#   blend     (p_elo, p_tss) -> sigmoid(w_elo * logit(p_elo) + w_tss * logit(p_tss) + b), the
+#             learned replacement for add_tss_active's plain average of the two edges
+# The fit is saved to calibration.json; apply() is a vectorized numpy transform, so
+# predict/show_prediction calibrate a whole week at once. Reliability bins are
+# running sums (games, sum of predictions, sum of outcomes per bin) that can be added
+# to a batch at a time; update.py keeps the live season's in reliability_bins.json.
+ROOT = os.path.dirname(os.path.abspath(__file__))
+CALIBRATION_FILE = os.path.join(ROOT, "calibration.json")
+BINS_FILE = os.path.join(ROOT, "reliability_bins.json")
+N_BINS = 10
+EPS = 1e-6  # probabilities are kept inside [EPS, 1 - EPS] before taking logits
+ISOTONIC_BOUND = 0.01  # isotonic steps stay inside [0.01, 0.99]; a handful of lopsided games would otherwise pin 0 or 1
+
+
+def logit(p):
+    p = np.clip(np.asarray(p, dtype=float), EPS, 1 - EPS)
+    return np.log(p / (1 - p))
+
+
+def sigmoid(x):
+    return 1 / (1 + np.exp(-x))
+
+
+def fit_logistic(X, y, l2=1e-6, max_iter=50):
+    """Logistic regression weights by Newton's method (ties as y = 0.5 are fine)."""
+    w = np.zeros(X.shape[1])
+    for _ in range(max_iter):
+        p = sigmoid(X @ w)
+        grad = X.T @ (p - y) + l2 * w
+        hess = (X.T * (p * (1 - p))) @ X + l2 * np.eye(X.shape[1])
+        step = np.linalg.solve(hess, grad)
+        w -= step
+        if np.abs(step).max() < 1e-10:
+            break
+    return w
+
+
+def fit_isotonic(p, y):
+    """Non-decreasing fit of y on p (pool adjacent violators). Returns the distinct
+       p values and the fitted probability at each, for np.interp."""
+    x, inverse = np.unique(np.asarray(p, dtype=float), return_inverse=True)
+    sums = np.bincount(inverse, weights=y)
+    counts = np.bincount(inverse).astype(float)
+
+    # Blocks of pooled points: (sum, count, number of distinct x values)
+    block_sum, block_count, block_len = [], [], []
+    for s, c in zip(sums.tolist(), counts.tolist()):
+        block_sum.append(s)
+        block_count.append(c)
+        block_len.append(1)
+        while len(block_sum) > 1 and block_sum[-2] / block_count[-2] > block_sum[-1] / block_count[-1]:
+            s, c, n = block_sum.pop(), block_count.pop(), block_len.pop()
+            block_sum[-1] += s
+            block_count[-1] += c
+            block_len[-1] += n
+    fitted = np.repeat(np.array(block_sum) / np.array(block_count), block_len)
+    return x, np.clip(fitted, ISOTONIC_BOUND, 1 - ISOTONIC_BOUND)
+
+
+def _transform(params, p):
+    if params["method"] == "platt":
+        a, b = params["weights"]
+        return sigmoid(a * logit(p) + b)
+    return np.interp(np.asarray(p, dtype=float), params["x"], params["y"])
+
+
+def apply(calibration, p_elo, p_tss=None):
+    """Calibrated home win probability. Games with a TSS probability use the learned
+       Elo/TSS blend (when one was fitted), the rest the Elo-only calibration."""
+    p_elo = np.asarray(p_elo, dtype=float)
+    out = _transform(calibration["elo"], p_elo)
+    blend = calibration.get("blend")
+    if p_tss is not None and blend is not None:
+        p_tss = np.asarray(p_tss, dtype=float)
+        both = ~np.isnan(p_elo) & ~np.isnan(p_tss)
+        w_elo, w_tss, b = blend["weights"]
+        out = np.where(both, sigmoid(w_elo * logit(p_elo) + w_tss * logit(p_tss) + b), out)
+    return out
+
+
+# === Reliability bins ===
+
+def new_bins(n_bins=N_BINS):
+    return {"n": [0] * n_bins, "sum_p": [0.0] * n_bins, "sum_y": [0.0] * n_bins}
+
+
+def add_to_bins(bins, p, y):
+    """Add a batch of (prediction, outcome) pairs to the running bin sums."""
+    p, y = np.asarray(p, dtype=float), np.asarray(y, dtype=float)
+    keep = ~np.isnan(p) & ~np.isnan(y)
+    p, y = p[keep], y[keep]
+    n_bins = len(bins["n"])
+    idx = np.minimum((p * n_bins).astype(int), n_bins - 1)
+    bins["n"] = (np.array(bins["n"]) + np.bincount(idx, minlength=n_bins)).tolist()
+    bins["sum_p"] = (np.array(bins["sum_p"]) + np.bincount(idx, weights=p, minlength=n_bins)).tolist()
+    bins["sum_y"] = (np.array(bins["sum_y"]) + np.bincount(idx, weights=y, minlength=n_bins)).tolist()
+    return bins
+
+
+def bins_table(bins):
+    """Reliability table: games, mean predicted and observed rate per bin."""
+    n = np.array(bins["n"], dtype=float)
+    n_bins = len(n)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return pd.DataFrame({
+            "bin_low": np.arange(n_bins) / n_bins,
+            "bin_high": np.arange(1, n_bins + 1) / n_bins,
+            "games": n.astype(int),
+            "mean_p": np.array(bins["sum_p"]) / n,
+            "observed": np.array(bins["sum_y"]) / n,
+        })
+
+
+def expected_calibration_error(bins):
+    n = np.array(bins["n"], dtype=float)
+    gap = np.abs(np.array(bins["sum_p"]) - np.array(bins["sum_y"]))  # n * |mean_p - observed|
+    return gap.sum() / n.sum() if n.sum() else np.nan
+
+
+def load_bins(path=BINS_FILE):
+    if not os.path.exists(path):
+        return new_bins()
+    with open(path) as f:
+        return json.load(f)
+
+
+def record_results(p, y, path=BINS_FILE):
+    """Add finished games (home win probability, home result 1/0.5/0) to the live bins."""
+    bins = load_bins(path)
+    add_to_bins(bins, p, y)
+    with open(path, "w") as f:
+        json.dump(bins, f, indent=1)
+    return bins
+
+
+# === Fitting ===
+
+def fit(games, method="platt"):
+    """Fit the Elo calibration (platt or isotonic) and, where games have a TSS
+       probability, the Elo/TSS blend. `games` is a backtest frame (expected_win,
+       tss_home, tss_away, home_win)."""
+    import backtest
+
+    y = games["home_win"].to_numpy(dtype=float)
+    p_elo = games["expected_win"].to_numpy(dtype=float)
+    if method == "platt":
+        elo = {"method": "platt",
+               "weights": fit_logistic(np.column_stack([logit(p_elo), np.ones(len(p_elo))]), y).tolist()}
+    elif method == "isotonic":
+        x, fitted = fit_isotonic(p_elo, y)
+        elo = {"method": "isotonic", "x": x.tolist(), "y": fitted.tolist()}
+    else:
+        raise ValueError(f"Unknown calibration method {method!r} (platt or isotonic)")
+
+    blend = None
+    p_tss = np.asarray(backtest.tss_model(games), dtype=float)
+    both = ~np.isnan(p_tss)
+    if both.sum() >= 100:  # too few games with TSS to learn weights from otherwise
+        X = np.column_stack([logit(p_elo[both]), logit(p_tss[both]), np.ones(both.sum())])
+        blend = {"weights": fit_logistic(X, y[both]).tolist(), "games": int(both.sum())}
+
+    return {"elo": elo, "blend": blend, "games": len(games),
+            "seasons": sorted(int(year) for year in games["year"].unique())}
+
+
+def evaluate(calibration, games):
+    """log-loss, Brier and ECE of the raw and calibrated probabilities on games,
+       plus their reliability bins."""
+    import backtest
+
+    y = games["home_win"].to_numpy(dtype=float)
+    p_raw = games["expected_win"].to_numpy(dtype=float)
+    p_cal = apply(calibration, p_raw, backtest.tss_model(games))
+    report, bins = {}, {}
+    for name, p in (("raw", p_raw), ("calibrated", p_cal)):
+        clipped = np.clip(p, EPS, 1 - EPS)
+        bins[name] = add_to_bins(new_bins(), p, y)
+        report[name] = {
+            "log_loss": float(-np.mean(y * np.log(clipped) + (1 - y) * np.log(1 - clipped))),
+            "brier": float(np.mean((p - y) ** 2)),
+            "ece": float(expected_calibration_error(bins[name])),
+        }
+    return report, bins
+
+
+def save(calibration, path=CALIBRATION_FILE):
+    with open(path, "w") as f:
+        json.dump(calibration, f, indent=1)
+
+
+def load(path=CALIBRATION_FILE):
+    """The saved calibration, or None if none has been fitted."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+if __name__ == "__main__":
+    import backtest
+
+    parser = argparse.ArgumentParser(description="Fit the win probability calibration on the backtest games")
+    parser.add_argument("--method", default="platt", choices=["platt", "isotonic"])
+    parser.add_argument("--live", action="store_true", help="Only show the live season's reliability bins")
+    parser.add_argument("--holdout", type=int, help="Fit on earlier seasons and report on this one")
+    args = parser.parse_args()
+
+    if args.live:
+        bins = load_bins()
+        print(f"Live season reliability ({sum(bins['n'])} games, ECE {expected_calibration_error(bins):.4f}):")
+        print(bins_table(bins).to_string(index=False, float_format="%.3f"))
+        raise SystemExit
+
+    games = backtest.add_tss(backtest.pregame_frame())
+    train, test = games, games
+    if args.holdout:
+        train, test = games[games["year"] < args.holdout], games[games["year"] == args.holdout]
+
+    start = time.perf_counter()
+    calibration = fit(train, args.method)
+    elapsed = time.perf_counter() - start
+
+    report, bins = evaluate(calibration, test)
+    calibration["reliability"] = bins
+    save(calibration)
+    print(f"✅ Fitted {args.method} on {len(train)} games in {elapsed * 1000:.0f} ms -> {CALIBRATION_FILE}")
+    if calibration["blend"]:
+        w_elo, w_tss, b = calibration["blend"]["weights"]
+        print(f"   Elo/TSS blend: {w_elo:.3f} * logit(elo) + {w_tss:.3f} * logit(tss) + {b:.3f}")
+    label = f"season {args.holdout}" if args.holdout else "fit games"
+    for name, metrics in report.items():
+        print(f"   {name:<11} on {label}: log-loss {metrics['log_loss']:.4f}, "
+              f"Brier {metrics['brier']:.4f}, ECE {metrics['ece']:.4f}")
+    print(bins_table(bins["calibrated"]).to_string(index=False, float_format="%.3f"))
@@ -0,0 +1,106 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import rating_store
+
+# Typed columnar copies of the game and Elo history csvs, stored as NumPy .npz:
+#   text columns    -> categorical (integer codes + sorted categories): team, id, type, winner, date
+#   integer columns -> int16 where the values fit (year, week, scores)
+#   float columns   -> float32 (ratings, expected_win)
+# read_table()/write_table() pick the format from the extension, so every reader
+# takes either file. `python columnar.py file.csv` converts, `python columnar.py file.npz`
+# exports back to csv. A .ratings path is handed to rating_store (the per-team
+# memory-mapped Elo history).
+FORMAT_VERSION = 1
+
+
+def _int_dtype(values):
+    for dtype in (np.int16, np.int32):
+        info = np.iinfo(dtype)
+        if values.size == 0 or (values.min() >= info.min and values.max() <= info.max):
+            return dtype
+    return np.int64
+
+
+def is_columnar(path):
+    return str(path).endswith(".npz") or rating_store.is_rating_store(path)
+
+
+def write_table(df, path):
+    """Save a DataFrame as typed columns in an .npz (a .csv path writes csv)."""
+    if not is_columnar(path):
+        df.to_csv(path, index=False)
+        return
+    if rating_store.is_rating_store(path):
+        rating_store.write_history(df, path)
+        return
+
+    arrays = {"columns": np.array([str(c) for c in df.columns]), "version": np.array(FORMAT_VERSION)}
+    for i, col in enumerate(df.columns):
+        series = df[col]
+        key = f"col{i}"
+        if pd.api.types.is_bool_dtype(series):
+            arrays[key] = series.to_numpy(dtype=bool)
+        elif pd.api.types.is_integer_dtype(series):
+            values = series.to_numpy()
+            arrays[key] = values.astype(_int_dtype(values))
+        elif pd.api.types.is_float_dtype(series):
+            arrays[key] = series.to_numpy(dtype=np.float32)
+        else:
+            cat = series.astype("category")
+            arrays[key + "_codes"] = cat.cat.codes.to_numpy()
+            arrays[key + "_categories"] = np.array([str(c) for c in cat.cat.categories], dtype=str)
+
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, **arrays)
+    os.replace(tmp, path)
+
+
+def read_table(path, columns=None):
+    """Load a table written by write_table (or any csv) as a DataFrame."""
+    if not is_columnar(path):
+        return pd.read_csv(path, usecols=columns)
+    if rating_store.is_rating_store(path):
+        return rating_store.read_table(path, columns)
+
+    data = {}
+    with np.load(path, allow_pickle=False) as z:
+        for i, col in enumerate(z["columns"].tolist()):
+            if columns is not None and col not in columns:
+                continue
+            key = f"col{i}"
+            if key in z.files:
+                data[col] = z[key]
+            else:
+                data[col] = pd.Categorical.from_codes(z[key + "_codes"], z[key + "_categories"])
+    return pd.DataFrame(data)
+
+
+def columnar_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".npz"
+
+
+def convert(csv_path, npz_path=None):
+    """csv -> typed .npz next to it. Returns the new path."""
+    npz_path = npz_path or columnar_path(csv_path)
+    write_table(pd.read_csv(csv_path), npz_path)
+    return npz_path
+
+
+def export_csv(npz_path, csv_path=None):
+    """.npz -> <name>_export.csv (ratings keep float32 precision, so the
+       original float64 csv is never overwritten by default)."""
+    csv_path = csv_path or os.path.splitext(npz_path)[0] + "_export.csv"
+    read_table(npz_path).to_csv(csv_path, index=False)
+    return csv_path
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or ["master_nfl_2000_2016_fixed.csv", "master_nfl_2018_2024_fixed_2.csv",
+                             "nfl_elo_history_2018_2024.csv"]
+    for path in paths:
+        out = export_csv(path) if is_columnar(path) else convert(path)
+        print(f"✅ {path} -> {out}")
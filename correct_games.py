@@ -0,0 +1,122 @@
+import pandas as pd
+import numpy as np
+import os
+
+import columnar
+from calc_elo import (
+    history_to_frame, load_checkpoint, load_snapshots, combine_snapshots,
+    state_from_snapshot, replay_games, season_end_mask, save_checkpoint,
+    save_snapshots, checkpoint_path_for, snapshot_path_for,
+)
+
+GAME_COLUMNS = ["home-team", "home-score", "away-team", "away-score", "date"]
+
+
+def apply_corrections(df_games, df_fix):
+    """Overwrite the corrected fields of each game (matched on id) and recompute winner.
+       Returns the corrected games and the ids that actually changed."""
+    df_games = df_games.copy()
+    changed_ids = []
+
+    for _, fix in df_fix.iterrows():
+        rows = df_games.index[df_games["id"] == fix["id"]]
+        if rows.empty:
+            raise ValueError(f"Unknown game id in corrections: {fix['id']}")
+        row = rows[0]
+        before = df_games.loc[row].copy()
+
+        for col in GAME_COLUMNS:
+            if col in fix.index and pd.notna(fix[col]):
+                value = int(fix[col]) if col.endswith("score") else fix[col]
+                df_games.at[row, col] = value
+
+        game = df_games.loc[row]
+        if game["home-score"] > game["away-score"]:
+            df_games.at[row, "winner"] = game["home-team"]
+        elif game["away-score"] > game["home-score"]:
+            df_games.at[row, "winner"] = game["away-team"]
+        else:
+            df_games.at[row, "winner"] = "Tie"
+
+        if not df_games.loc[row].equals(before):
+            changed_ids.append(fix["id"])
+
+    return df_games, changed_ids
+
+
+def correct_games(corrections_path, csv_path="master_nfl_2018_2024_fixed_2.csv",
+                  output_path="nfl_elo_history_2018_2024.csv"):
+    """Amend historical games and replay only from the earliest affected week,
+       starting from that week's stored rating snapshot. Rewrites the games
+       csv, history, checkpoint and snapshots, and returns the per-team
+       change in current Elo."""
+    df = pd.read_csv(csv_path)
+    df_fix = pd.read_csv(corrections_path)
+
+    df, changed_ids = apply_corrections(df, df_fix)
+    if not changed_ids:
+        print("Corrections match the existing games, nothing to replay")
+        return pd.DataFrame(columns=["team", "elo_old", "elo_new", "change"])
+
+    df_games = df
+    df = df.sort_values(by=["year", "week", "id"]).reset_index(drop=True)
+    checkpoint_path = checkpoint_path_for(output_path)
+    snapshot_path = snapshot_path_for(output_path)
+    old_state = load_checkpoint(checkpoint_path)
+    snapshots, snap_teams = load_snapshots(snapshot_path)
+
+    # Earliest affected week and its start-of-week snapshot
+    changed = df[df["id"].isin(changed_ids)]
+    first = changed.sort_values(by=["year", "week"]).iloc[0]
+    year, week = first["year"], first["week"]
+    match = np.flatnonzero((snapshots["year"] == year) & (snapshots["week"] == week))
+    if not len(match):
+        raise ValueError(f"No rating snapshot for {year} W{week} in {snapshot_path}")
+    index = match[0]
+
+    tail = ((df["year"] > year) | ((df["year"] == year) & (df["week"] >= week))).to_numpy()
+    df_tail = df[tail].reset_index(drop=True)
+    print(f"Replaying {len(df_tail)} games from {year} W{week} ({len(changed_ids)} corrected)")
+
+    state = state_from_snapshot(snapshots, snap_teams, index)
+    history, state, new_snapshots = replay_games(df_tail, state, season_end_mask(df)[tail])
+
+    # Keep history rows before the affected week, replace the rest
+    if columnar.is_columnar(output_path):
+        hist_old = columnar.read_table(output_path)
+    else:
+        hist_old = pd.read_csv(output_path, float_precision="round_trip")  # kept rows stay bit-exact
+    keep = (hist_old["year"] < year) | ((hist_old["year"] == year) & (hist_old["week"] < week))
+    hist_tail = history_to_frame(history, df_tail, state["teams"], trace=True)
+    hist_tail = hist_tail.reindex(columns=hist_old.columns)
+    hist_df = pd.concat([hist_old[keep], hist_tail], ignore_index=True)
+
+    earlier = {key: value[:index] for key, value in snapshots.items()}
+    snapshots = combine_snapshots(earlier, new_snapshots, len(state["teams"]))
+
+    df_games.to_csv(csv_path, index=False)
+    columnar.write_table(hist_df, output_path)
+    save_checkpoint(state, checkpoint_path)
+    save_snapshots(snapshots, state["teams"], snapshot_path)
+
+    # Report which teams' current ratings moved
+    old = pd.Series(old_state["ratings"], index=old_state["teams"])
+    new = pd.Series(state["ratings"], index=state["teams"])
+    report = pd.DataFrame({"elo_old": old, "elo_new": new})
+    report["change"] = report["elo_new"] - report["elo_old"]
+    report = report[np.abs(report["change"]) > 1e-9].rename_axis("team").reset_index()  # not replay noise
+    report = report.reindex(report["change"].abs().sort_values(ascending=False).index)
+
+    print(f"Updated {csv_path}, {output_path} ({len(report)} teams changed)")
+    for _, row in report.iterrows():
+        print(f"  {row['team']}: {row['elo_old']:.1f} -> {row['elo_new']:.1f} ({row['change']:+.1f})")
+    return report
+
+
+if __name__ == "__main__":
+    # corrections csv: id plus any of home-team, home-score, away-team, away-score, date
+    corrections = input("Corrections csv: ").strip()
+    if not os.path.exists(corrections):
+        print(f"❌ {corrections} not found")
+    else:
+        correct_games(corrections)
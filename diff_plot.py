@@ -1,37 +1,41 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
-def plot_matchup_diff(csv_path="matchup_elo_diff_2018_2024.csv", output_dir="diff_plots"):
-    df = pd.read_csv(csv_path)
+import render
+import matplotlib.pyplot as plt
 
-    # Ensure sorted order
-    df = df.sort_values(by=["team", "year"])
+def draw_matchup_diff(team_df, team):
+    fig = plt.figure(figsize=(10, 5))
+    plt.plot(team_df["year"], team_df["avg_matchup_diff"], marker="o", label=team, color="blue")
 
-    os.makedirs(output_dir, exist_ok=True)
+    # Add horizontal reference line at -4.8
+    plt.axhline(y=-4.8, color="red", linestyle="--", alpha=0.7, label="Ref: -4.8")
 
-    for team in df["team"].unique():
-        team_df = df[df["team"] == team]
+    plt.title(f"Avg Matchup Elo Difference: {team} (2018–2024)")
+    plt.xlabel("Year")
+    plt.ylabel("Avg Matchup Elo Difference")
+    plt.grid(alpha=0.3, linestyle="--")
+    plt.legend()
+    plt.tight_layout()
+    return fig
 
-        plt.figure(figsize=(10, 5))
-        plt.plot(team_df["year"], team_df["avg_matchup_diff"], marker="o", label=team, color="blue")
 
-        # Add horizontal reference line at -4.8
-        plt.axhline(y=-4.8, color="red", linestyle="--", alpha=0.7, label="Ref: -4.8")
+def plot_matchup_diff(csv_path="matchup_elo_diff_2018_2024.csv", output_dir="diff_plots", workers=None):
+    df = pd.read_csv(csv_path)
 
-        plt.title(f"Avg Matchup Elo Difference: {team} (2018–2024)")
-        plt.xlabel("Year")
-        plt.ylabel("Avg Matchup Elo Difference")
-        plt.grid(alpha=0.3, linestyle="--")
-        plt.legend()
+    # Ensure sorted order
+    df = df.sort_values(by=["team", "year"])
 
-        # Save plot
-        out_path = os.path.join(output_dir, f"{team.replace(' ', '_')}_diff.png")
-        plt.tight_layout()
-        plt.savefig(out_path, dpi=300)
-        plt.close()
+    jobs = [{
+        "path": os.path.join(output_dir, f"{team.replace(' ', '_')}_diff.png"),
+        "draw": draw_matchup_diff,
+        "data": {"team_df": df[df["team"] == team]},
+        "style": {"team": team},
+        "savefig": {"dpi": 300},
+    } for team in df["team"].unique()]
+    rendered, skipped = render.render_figures(jobs, workers=workers)
 
-    print(f"✅ Saved matchup diff plots for all teams to {output_dir}/")
+    print(f"✅ Saved matchup diff plots for all teams to {output_dir}/ ({rendered} rendered, {skipped} unchanged)")
 
 
 if __name__ == "__main__":
@@ -1,16 +1,18 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
-def plot_team_elo(df, team_name, output_dir="team_elo_plots_2018_2024"): # change dir name here 
-    team_df = df[df["team"] == team_name].copy()
-    team_df = team_df.sort_values(by=["year", "week", "id"])
+import columnar
+import rating_store
+import render
+import matplotlib.pyplot as plt
 
-    min_year = df["year"].min()
+def draw_team_elo(team_df, team_name, min_year, max_year):
+    team_df = team_df.sort_values(by=["year", "week", "id"])
     team_df["season_week"] = (team_df["year"] - min_year) * 23 + team_df["week"].astype(str).astype(int, errors="ignore")
 
-    plt.figure(figsize=(14, 6))
-    plt.plot(team_df["season_week"], team_df["elo_after"], color="blue", linewidth=2, label=team_name)
+    fig = plt.figure(figsize=(14, 6))
+    line = render.downsample(team_df, "elo_after")
+    plt.plot(line["season_week"], line["elo_after"], color="blue", linewidth=2, label=team_name)
 
     # Mark regression points
     regressions = team_df[team_df["type"] == "regression"]
@@ -27,7 +29,7 @@ def plot_team_elo(df, team_name, output_dir="team_elo_plots_2018_2024"): # chang
     # Add horizontal reference line at 1502
     plt.axhline(y=1502, color="red", linestyle="--", alpha=0.5, label="1502 Reference")
 
-    plt.title(f"Elo Rating History: {team_name} ({df['year'].min()}–{df['year'].max()})")
+    plt.title(f"Elo Rating History: {team_name} ({min_year}–{max_year})")
     plt.xlabel("Timeline (season weeks)")
     plt.ylabel("Elo Rating")
     plt.ylim(1000, 2000)
@@ -35,19 +37,42 @@ def plot_team_elo(df, team_name, output_dir="team_elo_plots_2018_2024"): # chang
     plt.legend()
 
     plt.tight_layout()
-    os.makedirs(output_dir, exist_ok=True)
-    plt.savefig(os.path.join(output_dir, f"{team_name.replace(' ', '_')}_elo.png"), dpi=300)
-    plt.close()
+    return fig
 
 
-def plot_all_teams(csv_path="nfl_elo_history_2018_2024.csv", output_dir="team_elo_plots_2018_2024"): # change the dir name and file (csv) that is needed to do the years
-    df = pd.read_csv(csv_path)
+def team_elo_job(df, team_name, output_dir, min_year=None, max_year=None):
+    """Render job for one team; df is the history (or just that team's rows, with
+       the history's year range given)."""
+    return {
+        "path": os.path.join(output_dir, f"{team_name.replace(' ', '_')}_elo.png"),
+        "draw": draw_team_elo,
+        "data": {"team_df": df[df["team"] == team_name]},
+        "style": {"team_name": team_name,
+                  "min_year": int(df["year"].min()) if min_year is None else min_year,
+                  "max_year": int(df["year"].max()) if max_year is None else max_year},
+        "savefig": {"dpi": 300},
+    }
+
+
+def plot_team_elo(df, team_name, output_dir="team_elo_plots_2018_2024"): # change dir name here 
+    render.render_figures([team_elo_job(df, team_name, output_dir)], workers=1)
+
 
-    for team in df["team"].unique():
-        print(f"Generating plot for {team}...")
-        plot_team_elo(df, team, output_dir=output_dir)
+def plot_all_teams(csv_path="nfl_elo_history_2018_2024.csv", output_dir="team_elo_plots_2018_2024", # change the dir name and file (csv) that is needed to do the years
+                   workers=None):
+    if rating_store.is_rating_store(csv_path):
+        # Each team's timeline is sliced from the mapped file on its own
+        history = rating_store.open_history(csv_path)
+        years = history["years"]
+        jobs = [team_elo_job(rating_store.to_frame(history, rating_store.team_records(history, team)),
+                             team, output_dir, years[0], years[-1])
+                for team in history["teams"]]
+    else:
+        df = columnar.read_table(csv_path)
+        jobs = [team_elo_job(df, team, output_dir) for team in df["team"].unique()]
+    rendered, skipped = render.render_figures(jobs, workers=workers)
 
-    print(f"Saved all team Elo plots to {output_dir}/")
+    print(f"Saved all team Elo plots to {output_dir}/ ({rendered} rendered, {skipped} unchanged)")
 
 
 if __name__ == "__main__":
@@ -1,39 +1,78 @@
 import pandas as pd
 
-def generate_elo_summaries(csv_path="nfl_elo_history_2018_2024.csv"): # input
-    df = pd.read_csv(csv_path)
+import columnar
 
-    # Only consider actual games
-    games = df[df["type"] == "game"].copy()
-
-    # 1. Matchup Elo Differences
-    diffs = []
-    for _, row in games.iterrows():
-        year, team, elo, game_id = row["year"], row["team"], row["elo_after"], row["id"]
+MATCHUP_FILE = "matchup_elo_diff_2018_2024.csv"
+PROFILE_FILE = "team_elo_profiles_2018_2024.csv"
 
-        # opponent Elo = same game_id, different team
-        opp_rows = games[(games["id"] == game_id) & (games["team"] != team)]
-        if not opp_rows.empty:
-            opp_elo = opp_rows["elo_after"].values[0]
 
-            # Signed difference (positive = stronger than opponent, negative = weaker)
-            diff = elo - opp_elo
-            diffs.append((year, team, diff))
+def season_summaries(games):
+    """Matchup Elo differences and team Elo profiles for a frame of game rows."""
+    # 1. Matchup Elo Differences
+    # Pair the two rows of each game id; the opponent is the other team's row
+    rows = games[["id", "year", "team", "elo_after"]].reset_index(drop=True)
+    pairs = rows.reset_index().merge(rows[["id", "team", "elo_after"]], on="id", suffixes=("", "_opp"))
+    pairs = (pairs[pairs["team"] != pairs["team_opp"]]
+             .drop_duplicates(subset="index")
+             .sort_values("index"))
 
-    matchup_df = pd.DataFrame(diffs, columns=["year", "team", "elo_diff"])
-    matchup_summary = matchup_df.groupby(["year", "team"])["elo_diff"].mean().reset_index()
+    # Signed difference (positive = stronger than opponent, negative = weaker)
+    pairs["elo_diff"] = pairs["elo_after"] - pairs["elo_after_opp"]
+    matchup_summary = pairs.groupby(["year", "team"])["elo_diff"].mean().reset_index()
     matchup_summary.rename(columns={"elo_diff": "avg_matchup_diff"}, inplace=True)
 
-    matchup_summary.to_csv("matchup_elo_diff_2018_2024.csv", index=False) # output 1
-
-
     # 2. Team Elo Profiles
     team_summary = (
         games.groupby(["year", "team"])["elo_after"]
         .agg(avg_elo="mean", max_elo="max", min_elo="min")
         .reset_index()
     )
-    team_summary.to_csv("team_elo_profiles_2018_2024.csv", index=False) # output 2
+    return matchup_summary, team_summary
+
+
+def generate_elo_summaries(csv_path="nfl_elo_history_2018_2024.csv", # input
+                           matchup_file=MATCHUP_FILE, profile_file=PROFILE_FILE):
+    df = columnar.read_table(csv_path, columns=["id", "year", "team", "elo_after", "type"])
+
+    # Only consider actual games
+    games = df[df["type"] == "game"]
+
+    matchup_summary, team_summary = season_summaries(games)
+    matchup_summary.to_csv(matchup_file, index=False) # output 1
+    team_summary.to_csv(profile_file, index=False) # output 2
+
+
+def generate_elo_summaries_streaming(csv_path="nfl_elo_history_2018_2024.csv",
+                                     matchup_file=MATCHUP_FILE, profile_file=PROFILE_FILE,
+                                     chunksize=10000):
+    """Same outputs as generate_elo_summaries, reading the history in chunks and
+       holding at most one season (plus one chunk) in memory. The history must be
+       in year order, as calc_elo.py writes it."""
+    first = True
+    pending = []  # rows of the season being read
+
+    def flush():
+        nonlocal first
+        season = pd.concat(pending)
+        matchup_summary, team_summary = season_summaries(season[season["type"] == "game"])
+        matchup_summary.to_csv(matchup_file, index=False, mode="w" if first else "a", header=first)
+        team_summary.to_csv(profile_file, index=False, mode="w" if first else "a", header=first)
+        first = False
+        pending.clear()
+
+    last_year = None
+    for chunk in pd.read_csv(csv_path, chunksize=chunksize):
+        for year, part in chunk.groupby("year", sort=False):
+            if last_year is not None and year < last_year:
+                raise ValueError(f"{csv_path} is not in year order ({year} after {last_year})")
+            if last_year is not None and year != last_year:
+                flush()
+            pending.append(part)
+            last_year = year
+
+    if pending:
+        flush()
+
 
 if __name__ == "__main__":
     generate_elo_summaries()
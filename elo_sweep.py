@@ -0,0 +1,164 @@
+import pandas as pd
+import numpy as np
+import itertools
+import time
+
+import backtest
+from calc_elo import INITIAL_ELO, HOME_FIELD_ADV, ALPHA, get_k_factor, season_end_mask
+
+# Same games as the backtest; backtest.load_games swaps the home/away columns of
+# the files that still have them reversed
+GAME_FILES = backtest.GAME_FILES
+
+# Current hand-picked values (calc_elo.py)
+DEFAULT_PARAMS = {
+    "home_adv": HOME_FIELD_ADV,
+    "alpha": ALPHA,
+    "k_scale": 1.0,          # multiplies the whole get_k_factor schedule
+    "k_playoff_scale": 1.0,  # extra multiplier on playoff weeks (19+)
+    "mult_cap": 1.75,
+    "surprise_cap": 3.0,
+    "swing_cap": 50.0,
+    "regression": 0.75,
+}
+
+# ~14k configurations around the defaults, wide enough that the best configs on
+# the 2000-2024 games sit inside the grid. surprise_cap nearly always binds
+# (2.2 / (p * (1 - p)) >= 8.8), so it acts as one more K scale alongside k_scale.
+DEFAULT_GRID = {
+    "home_adv": [25, 35, 45, 55, 65, 85],
+    "alpha": [0.3, 0.5, 0.7, 0.9],
+    "k_scale": [0.5, 0.75, 1.0, 1.25],
+    "k_playoff_scale": [1.0, 1.5],
+    "mult_cap": [1.75, 2.5, 3.5],
+    "surprise_cap": [2.0, 3.0, 4.0],
+    "swing_cap": [50.0, 60.0],
+    "regression": [0.3, 0.45, 0.6, 0.75],
+}
+
+def load_games(csv_paths=GAME_FILES):
+    return backtest.load_games(csv_paths)
+
+
+def build_grid(grid=DEFAULT_GRID):
+    """Cartesian product of the grid values as a DataFrame (one row per config)."""
+    params = {**{k: [v] for k, v in DEFAULT_PARAMS.items()}, **grid}
+    rows = itertools.product(*params.values())
+    return pd.DataFrame(list(rows), columns=list(params.keys()))
+
+
+def _game_rounds(home, away, weeks, years, season_end):
+    """Split sorted games into rounds of consecutive games in the same week with
+       no team playing twice, so each round can be applied as one array update.
+       A round always ends on a season-end game."""
+    bounds = [0]
+    in_round = set()
+    for i in range(len(home)):
+        new_week = i > bounds[-1] and (weeks[i] != weeks[i - 1] or years[i] != years[i - 1])
+        if new_week or home[i] in in_round or away[i] in in_round:
+            bounds.append(i)
+            in_round = set()
+        in_round.update((home[i], away[i]))
+        if season_end[i]:
+            bounds.append(i + 1)
+            in_round = set()
+    if bounds[-1] != len(home):
+        bounds.append(len(home))
+    return sorted(set(bounds))
+
+
+def sweep(df_games, configs, burn_in_seasons=1):
+    """Replay every game once for all configs at the same time.
+       Ratings are a (configs x teams) array; each round of games is one set of
+       array operations across both configs and games. Returns configs with
+       log_loss, brier and accuracy of the home expected_win, scored after the
+       first burn_in_seasons seasons. Ties count toward log-loss and Brier but not
+       accuracy, as in backtest.py."""
+    codes, teams = pd.factorize(pd.concat([df_games["home-team"], df_games["away-team"]]))
+    n_games = len(df_games)
+    home, away = codes[:n_games], codes[n_games:]
+    years = df_games["year"].to_numpy()
+    weeks = df_games["week"].to_numpy()
+    hs = df_games["home-score"].to_numpy(dtype=np.float64)
+    as_ = df_games["away-score"].to_numpy(dtype=np.float64)
+    season_end = season_end_mask(df_games)
+
+    outcome = np.where(hs > as_, 1.0, np.where(hs < as_, 0.0, 0.5))
+    n_scores = np.clip(np.abs(hs - as_) / 7, 1, 3.5)
+    k_base = np.array([get_k_factor(w) for w in weeks], dtype=np.float64)
+    playoff = weeks > 18
+    scored = years >= np.unique(years)[min(burn_in_seasons, len(np.unique(years)) - 1)]
+    decided = scored & (outcome != 0.5)
+
+    # Parameters as column vectors so they broadcast against (configs x games)
+    col = {name: configs[name].to_numpy(dtype=np.float64)[:, None] for name in DEFAULT_PARAMS}
+
+    n_configs = len(configs)
+    ratings = np.full((n_configs, len(teams)), float(INITIAL_ELO))
+    log_loss = np.zeros(n_configs)
+    brier = np.zeros(n_configs)
+    correct = np.zeros(n_configs)
+
+    bounds = _game_rounds(home, away, weeks, years, season_end)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        h, a = home[start:stop], away[start:stop]
+        r_home, r_away = ratings[:, h], ratings[:, a]
+
+        diff = np.clip((r_away - (r_home + col["home_adv"])) / 400, -10, 10)
+        exp_home = 1 / (1 + 10 ** diff)
+
+        s = outcome[start:stop]
+        mult = np.minimum(1 + col["alpha"] * (n_scores[start:stop] - 1), col["mult_cap"])
+        adj = np.minimum(2.2 / (0.001 + (exp_home * (1 - exp_home))), col["surprise_cap"])
+        k = k_base[start:stop] * col["k_scale"] * np.where(playoff[start:stop], col["k_playoff_scale"], 1.0)
+
+        change = np.clip(k * mult * adj * (s - exp_home), -col["swing_cap"], col["swing_cap"])
+        ratings[:, h] = r_home + change
+        ratings[:, a] = r_away - change
+
+        keep = scored[start:stop]
+        if keep.any():
+            p, s_k = exp_home[:, keep], s[keep]
+            log_loss -= (s_k * np.log(p) + (1 - s_k) * np.log(1 - p)).sum(axis=1)
+            brier += ((p - s_k) ** 2).sum(axis=1)
+            correct += ((p >= 0.5) == (s_k == 1))[:, s_k != 0.5].sum(axis=1)
+
+        # Season regression after the Super Bowl
+        if season_end[stop - 1]:
+            ratings = col["regression"] * ratings + (1 - col["regression"]) * INITIAL_ELO
+
+    n_scored = int(scored.sum())
+    results = configs.copy()
+    results["log_loss"] = log_loss / n_scored
+    results["brier"] = brier / n_scored
+    results["accuracy"] = correct / int(decided.sum())
+    return results
+
+
+def run_sweep(csv_paths=GAME_FILES, grid=DEFAULT_GRID, output_path="elo_sweep_results.csv",
+              chunk_size=20000):
+    df_games = load_games(csv_paths)
+    configs = build_grid(grid)
+
+    t0 = time.perf_counter()
+    chunks = [sweep(df_games, configs.iloc[i:i + chunk_size].reset_index(drop=True))
+              for i in range(0, len(configs), chunk_size)]
+    results = pd.concat(chunks, ignore_index=True)
+    elapsed = time.perf_counter() - t0
+
+    results = results.sort_values(by=["log_loss", "brier"]).reset_index(drop=True)
+    results.insert(0, "rank", np.arange(1, len(results) + 1))
+    results.to_csv(output_path, index=False)
+
+    print(f"✅ Swept {len(configs)} configs over {len(df_games)} games in {elapsed:.1f}s -> {output_path}")
+    print(results.head(10).to_string(index=False))
+
+    is_default = np.all([np.isclose(results[k], v) for k, v in DEFAULT_PARAMS.items()], axis=0)
+    if is_default.any():
+        row = results[is_default].iloc[0]
+        print(f"\nCurrent parameters: rank {int(row['rank'])}, log_loss={row['log_loss']:.4f}, brier={row['brier']:.4f}")
+    return results
+
+
+if __name__ == "__main__":
+    run_sweep()
@@ -1,8 +1,38 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import render
+import matplotlib.pyplot as plt
+
+def draw_team_trend(group, team):
+    fig = plt.figure(figsize=(8, 5))
+    line = render.downsample(group, "elo")
+    plt.plot(line['week'], line['elo'], marker="o", label=team)
+    plt.title(f"{team} Elo Change Over Season")
+    plt.xlabel("Week")
+    plt.ylabel("Elo")
+    plt.grid(True, linestyle="--", alpha=0.6)
+    plt.legend()
+    return fig
+
+
+def draw_all_teams(df):
+    fig = plt.figure(figsize=(12, 8))
+    for team, group in df.groupby("team"):
+        line = render.downsample(group, "elo")
+        plt.plot(line['week'], line['elo'], label=team, alpha=0.7)
+    plt.title("All Teams Elo Change Over Season")
+    plt.xlabel("Week")
+    plt.ylabel("Elo")
+    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left', fontsize="small")
+    plt.grid(True, linestyle="--", alpha=0.6)
+    plt.tight_layout()
+    return fig
+
 
-def plot_elo_trends(csv_file, output_dir="elo_charts"):
+def plot_elo_trends(csv_file, output_dir="elo_charts", workers=None):
     """
     For each team, plot Elo trend over the season (Week 0 onward).
     Also generates a collective chart of all teams.
@@ -12,35 +42,24 @@ def plot_elo_trends(csv_file, output_dir="elo_charts"):
 
     # Ensure Elo values: use elo_before for Week 0, then elo_after otherwise
     df['elo'] = df['elo_after'].fillna(df['elo_before'])
-
-    # Create output directory
-    os.makedirs(output_dir, exist_ok=True)
+    df = df[["team", "week", "elo"]]
 
     # Individual team plots
-    for team, group in df.groupby("team"):
-        plt.figure(figsize=(8, 5))
-        plt.plot(group['week'], group['elo'], marker="o", label=team)
-        plt.title(f"{team} Elo Change Over Season")
-        plt.xlabel("Week")
-        plt.ylabel("Elo")
-        plt.grid(True, linestyle="--", alpha=0.6)
-        plt.legend()
-        fname = f"{team.replace(' ', '_').lower()}_ec.png"
-        plt.savefig(os.path.join(output_dir, fname), bbox_inches="tight")
-        plt.close()
+    jobs = [{
+        "path": os.path.join(output_dir, f"{team.replace(' ', '_').lower()}_ec.png"),
+        "draw": draw_team_trend,
+        "data": {"group": group},
+        "style": {"team": team},
+        "savefig": {"bbox_inches": "tight"},
+    } for team, group in df.groupby("team")]
 
     # Collective plot
-    plt.figure(figsize=(12, 8))
-    for team, group in df.groupby("team"):
-        plt.plot(group['week'], group['elo'], label=team, alpha=0.7)
-    plt.title("All Teams Elo Change Over Season")
-    plt.xlabel("Week")
-    plt.ylabel("Elo")
-    plt.legend(bbox_to_anchor=(1.05, 1), loc='upper left', fontsize="small")
-    plt.grid(True, linestyle="--", alpha=0.6)
-    plt.tight_layout()
-    plt.savefig(os.path.join(output_dir, "all_teams_ec.png"))
-    plt.close()
+    jobs.append({
+        "path": os.path.join(output_dir, "all_teams_ec.png"),
+        "draw": draw_all_teams,
+        "data": {"df": df},
+    })
+    return render.render_figures(jobs, workers=workers)
 
 if __name__ == "__main__":
     # Example usage
@@ -0,0 +1,37 @@
+import lxml.html
+
+# Single-pass parser for the game_summaries blocks on pro-football-reference week pages.
+# Each game is a "teams" table: a date row, then the away (top) and home (bottom) rows
+# with the team name in the first cell and the score, if played, in the second.
+GAME_TABLES = (
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' game_summaries ')]"
+    "//table[not(contains(concat(' ', normalize-space(@class), ' '), ' stats '))]"
+)
+
+
+def _cell_text(row, index):
+    cells = row.xpath("./td|./th")
+    if len(cells) <= index:
+        return ""
+    return " ".join(cells[index].text_content().split())
+
+
+def _score(text):
+    return int(text) if text.isdigit() else None
+
+
+def parse_game_summaries(html):
+    """Return one (date, away_team, away_score, home_team, home_score) tuple per
+       game in page order. Scores are None for games without a final score."""
+    tree = lxml.html.fromstring(html)
+    games = []
+    for table in tree.xpath(GAME_TABLES):
+        rows = table.xpath(".//tr")
+        if len(rows) < 3:
+            continue
+        games.append((
+            _cell_text(rows[0], 0),
+            _cell_text(rows[1], 0), _score(_cell_text(rows[1], 1)),
+            _cell_text(rows[2], 0), _score(_cell_text(rows[2], 1)),
+        ))
+    return games
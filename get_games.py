@@ -1,98 +1,171 @@
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-from io import StringIO
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import threading
 import os
 import time
 
-def scrape_matchups(url: str, year: int, week: int):
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/115.0 Safari/537.36"
-        )
-    }
-
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
-
-    game_blocks = soup.find_all("div", class_="game_summaries")
-
+import page_cache
+from game_summaries import parse_game_summaries
+
+BASE_URL = "https://www.pro-football-reference.com/years/{year}/week_{week}.htm"
+HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/115.0 Safari/537.36"
+    )
+}
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TokenBucket:
+    """Thread-safe token bucket: `rate` requests per second, bursts up to `capacity`."""
+
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+def fetch_page(session, url, bucket=None, retries=4, backoff=2.0):
+    """GET a page through the rate limiter, retrying transient failures with
+       exponential backoff. Returns None for a 404 (week does not exist)."""
+    for attempt in range(retries + 1):
+        if bucket:
+            bucket.acquire()
+        try:
+            response = session.get(url, headers=HEADERS, timeout=30)
+            if response.status_code == 404:
+                return None
+            if response.status_code not in RETRY_STATUS:
+                response.raise_for_status()
+                return response.text
+            error = requests.HTTPError(f"{response.status_code} for {url}")
+        except (requests.ConnectionError, requests.Timeout) as e:
+            error = e
+
+        if attempt < retries:
+            time.sleep(backoff * 2 ** attempt)
+    raise error
+
+
+def parse_matchups(html: str, year: int, week: int):
     games = []
-    game_id = 1
-
-    for block in game_blocks:
-        # Skip stats tables
-        tables = [
-            t for t in block.find_all("table")
-            if "stats" not in t.get("class", [])
-        ]
-
-        for table in tables:
-            df = pd.read_html(StringIO(str(table)))[0]
-
-            date = df.iloc[0, 0]
-            team1 = df.iloc[1, 0]
-            score1 = int(df.iloc[1, 1])
-            team2 = df.iloc[2, 0]
-            score2 = int(df.iloc[2, 1])
-
-            if score1 > score2:
-                winner = team1
-            elif score2 > score1:
-                winner = team2
-            else:
-                winner = "Tie"
-
-            games.append({
-                "id": f"{year}-{week}-{game_id}",
-                "year": year,
-                "week": week,
-                "home-team": team2,      # FIX: home is the bottom row
-                "home-score": score2,
-                "away-team": team1,      # FIX: away is the top row
-                "away-score": score1,
-                "winner": winner,
-                "date": date
-            })
-            game_id += 1
-
-    return games
-
 
-if __name__ == "__main__":
-    all_games = []
-    os.makedirs("nfl_csvs", exist_ok=True)
+    for game_id, (date, team1, score1, team2, score2) in enumerate(parse_game_summaries(html), start=1):
+        if score1 is None or score2 is None:
+            raise ValueError(f"no final score for {team1} at {team2}")
+
+        if score1 > score2:
+            winner = team1
+        elif score2 > score1:
+            winner = team2
+        else:
+            winner = "Tie"
+
+        games.append({
+            "id": f"{year}-{week}-{game_id}",
+            "year": year,
+            "week": week,
+            "home-team": team2,      # FIX: home is the bottom row
+            "home-score": score2,
+            "away-team": team1,      # FIX: away is the top row
+            "away-score": score1,
+            "winner": winner,
+            "date": date
+        })
 
-    for year in range(2000, 2017):  # 2018–2024
-        year_games = []
-        print(f"Scraping {year} season...")
+    return games
 
-        for week in range(1, 23):  # Weeks 1–22
-            url = f"https://www.pro-football-reference.com/years/{year}/week_{week}.htm"
-            print(f"  Week {week} ...", end=" ")
 
+def scrape_matchups(url: str, year: int, week: int, session=None):
+    session = session or requests.Session()
+    html = page_cache.get_page(url, lambda: fetch_page(session, url))
+    if html is None:
+        raise requests.HTTPError(f"404 for {url}")
+    return parse_matchups(html, year, week)
+
+
+def _part_path(out_dir, year, week):
+    return os.path.join(out_dir, "parts", f"nfl_{year}_week_{week}.csv")
+
+
+def backfill(years=range(2000, 2017), weeks=range(1, 23), out_dir="nfl_csvs",
+             base_url=BASE_URL, workers=4, rate=1 / 3, retries=4, backoff=2.0, resume=True):
+    """Scrape every (year, week) page concurrently under one request budget
+       (`rate` requests/second, default ~20/minute) and pooled session.
+       Each finished week is saved to out_dir/parts/, so a rerun resumes from
+       the weeks that have not completed yet (resume=False re-parses every
+       week, from the page cache where possible). Returns all games scraped."""
+    os.makedirs(os.path.join(out_dir, "parts"), exist_ok=True)
+    todo = [(y, w) for y in years for w in weeks
+            if not (resume and os.path.exists(_part_path(out_dir, y, w)))]
+    print(f"{len(todo)} weeks to scrape ({len(years) * len(weeks) - len(todo)} already done)")
+
+    session = requests.Session()
+    session.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+    session.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=workers))
+    bucket = TokenBucket(rate)
+
+    def scrape_week(year, week):
+        url = base_url.format(year=year, week=week)
+        html = page_cache.get_page(url, lambda: fetch_page(session, url, bucket, retries, backoff))
+        return [] if html is None else parse_matchups(html, year, week)
+
+    failed = []
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        futures = {pool.submit(scrape_week, y, w): (y, w) for y, w in todo}
+        for future in as_completed(futures):
+            year, week = futures[future]
             try:
-                week_games = scrape_matchups(url, year, week)
-                year_games.extend(week_games)
-                print(f"{len(week_games)} games")
+                week_games = future.result()
             except Exception as e:
-                print(f"skipped ({e})")
-
-            # Throttle requests: ~1 every 3 seconds (20/minute safe)
-            time.sleep(3)
+                print(f"  {year} Week {week} failed ({e})")
+                failed.append((year, week))
+                continue
+
+            # Written only once complete, so an interrupted run can resume here
+            part = _part_path(out_dir, year, week)
+            pd.DataFrame(week_games, columns=["id", "year", "week", "home-team", "home-score",
+                                              "away-team", "away-score", "winner", "date"]
+                         ).to_csv(part + ".tmp", index=False)
+            os.replace(part + ".tmp", part)
+            print(f"  {year} Week {week}: {len(week_games)} games")
+
+    if failed:
+        print(f"❌ {len(failed)} weeks failed, rerun to resume: {sorted(failed)}")
+
+    # Combine finished weeks into per-year CSVs and one master CSV
+    all_games = []
+    for year in years:
+        parts = [_part_path(out_dir, year, w) for w in weeks if os.path.exists(_part_path(out_dir, year, w))]
+        df_year = pd.concat([pd.read_csv(p) for p in parts], ignore_index=True) if parts else pd.DataFrame()
+        df_year.to_csv(os.path.join(out_dir, f"nfl_{year}.csv"), index=False)
+        print(f"Saved {out_dir}/nfl_{year}.csv ({len(df_year)} games)")
+        all_games.append(df_year)
 
-        # Save per-year CSV
-        df_year = pd.DataFrame(year_games)
-        df_year.to_csv(f"nfl_csvs/nfl_{year}.csv", index=False)
-        print(f"Saved nfl_csvs/nfl_{year}.csv ({len(df_year)} games)")
+    df_all = pd.concat(all_games, ignore_index=True)
+    master = f"master_nfl_{min(years)}_{max(years)}.csv"
+    df_all.to_csv(master, index=False)
+    print(f"Saved {master} ({len(df_all)} total games)")
+    return df_all
 
-        all_games.extend(year_games)
 
-    # Save one master CSV
-    df_all = pd.DataFrame(all_games)
-    df_all.to_csv("nfl_2018_2024.csv", index=False)
-    print(f"Saved master_nfl_2000_2016.csv ({len(df_all)} total games)")
-# note that the above scrapes the 2000 - 2016 seasons from the nfl 
\ No newline at end of file
+if __name__ == "__main__":
+    backfill(range(2000, 2017))  # 2000 - 2016 seasons
+# note that the above scrapes the 2000 - 2016 seasons from the nfl
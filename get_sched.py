@@ -1,9 +1,10 @@
 import requests
-from bs4 import BeautifulSoup
 import pandas as pd
-from io import StringIO
 import time
 
+import page_cache
+from game_summaries import parse_game_summaries
+
 def scrape_schedule(year=2025, weeks=18, output_path="schedule.csv"):
     headers = {
         "User-Agent": (
@@ -19,32 +20,22 @@ def scrape_schedule(year=2025, weeks=18, output_path="schedule.csv"):
         url = f"https://www.pro-football-reference.com/years/{year}/week_{week}.htm"
         print(f"Scraping Week {week}: {url}")
 
-        response = requests.get(url, headers=headers)
-        response.raise_for_status()
-        soup = BeautifulSoup(response.text, "html.parser")
-
-        game_blocks = soup.find_all("div", class_="game_summaries")
-
-        for block in game_blocks:
-            tables = [t for t in block.find_all("table") if "stats" not in t.get("class", [])]
-
-            for table in tables:
-                df = pd.read_html(StringIO(str(table)))[0]
-
-                # Row 0 col 0 = date, Row 1 = away team, Row 2 = home team
-                date = df.iloc[0, 0]
-                away_team = df.iloc[1, 0]
-                home_team = df.iloc[2, 0]
-
-                games.append({
-                    "week": week,
-                    "date": date,
-                    "home team": home_team,
-                    "away team": away_team
-                })
-
-        # polite scraping delay
-        time.sleep(3)
+        def fetch():
+            response = requests.get(url, headers=headers)
+            response.raise_for_status()
+            time.sleep(3)  # polite scraping delay, only when we hit the site
+            return response.text
+
+        html = page_cache.get_page(url, fetch)
+
+        # Top row = away team, bottom row = home team
+        for date, away_team, _, home_team, _ in parse_game_summaries(html):
+            games.append({
+                "week": week,
+                "date": date,
+                "home team": home_team,
+                "away team": away_team
+            })
 
     # Save all weeks into one CSV
     df_games = pd.DataFrame(games)
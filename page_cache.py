@@ -0,0 +1,131 @@
+import datetime
+import gzip
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+
+# Raw HTML cache shared by every scraper.
+#   page_cache/objects/ab/abcd...html.gz  page bodies, named by sha256 of the content
+#   page_cache/index.jsonl                one line per fetch: url, fetched_at, sha256, status
+# NFL_PAGE_CACHE_OFFLINE=1 serves everything from the cache and never touches the network.
+CACHE_DIR = os.environ.get("NFL_PAGE_CACHE",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), "page_cache"))
+
+MINUTE = 60
+HOUR = 60 * MINUTE
+NEVER = None  # max_age that never expires
+
+PFR_WEEK = re.compile(r"pro-football-reference\.com/years/(\d{4})/week_(\d+)\.htm")
+TEAMRANKINGS = re.compile(r"teamrankings\.com/")
+TEAMRANKINGS_DATE = re.compile(r"teamrankings\.com/.*[?&]date=(\d{4}-\d{2}-\d{2})")
+
+_lock = threading.Lock()
+_index = None
+
+
+class OfflineCacheMiss(LookupError):
+    pass
+
+
+def is_offline():
+    return os.environ.get("NFL_PAGE_CACHE_OFFLINE", "") not in ("", "0")
+
+
+def _season_kickoff(year):
+    """Thursday after Labor Day (first Monday of September)."""
+    sept1 = datetime.date(year, 9, 1)
+    labor_day = sept1 + datetime.timedelta(days=(7 - sept1.weekday()) % 7)
+    return labor_day + datetime.timedelta(days=3)
+
+
+def max_age_for(url, now=None):
+    """Freshness policy by page type (seconds, or NEVER)."""
+    now = now or datetime.datetime.now()
+    week_page = PFR_WEEK.search(url)
+    if week_page:
+        year, week = int(week_page.group(1)), int(week_page.group(2))
+        # A week is settled a week after it ends (playoff byes included)
+        settled = _season_kickoff(year) + datetime.timedelta(days=7 * week + 7)
+        return NEVER if now.date() > settled else 10 * MINUTE
+    dated = TEAMRANKINGS_DATE.search(url)
+    if dated:
+        # A table as of a past date (backfill) no longer changes
+        as_of = datetime.date.fromisoformat(dated.group(1))
+        return NEVER if now.date() > as_of + datetime.timedelta(days=7) else 6 * HOUR
+    if TEAMRANKINGS.search(url):
+        return 6 * HOUR  # season stat tables refresh after each week
+    return 1 * HOUR
+
+
+def _object_path(digest):
+    return os.path.join(CACHE_DIR, "objects", digest[:2], digest + ".html.gz")
+
+
+def _load_index():
+    global _index
+    if _index is None:
+        _index = {}
+        path = os.path.join(CACHE_DIR, "index.jsonl")
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    entry = json.loads(line)
+                    _index[entry["url"]] = entry  # later fetches win
+    return _index
+
+
+def lookup(url):
+    """Latest cache entry for url, or None."""
+    with _lock:
+        return _load_index().get(url)
+
+
+def read_entry(entry):
+    if entry["sha256"] is None:
+        return None  # cached "page does not exist"
+    with gzip.open(_object_path(entry["sha256"]), "rt", encoding="utf-8") as f:
+        return f.read()
+
+
+def store(url, html, status=200):
+    """Save a fetched page (html=None for a 404) and record the fetch."""
+    digest = None
+    if html is not None:
+        digest = hashlib.sha256(html.encode("utf-8")).hexdigest()
+        path = _object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with gzip.open(path + ".tmp", "wt", encoding="utf-8") as f:
+                f.write(html)
+            os.replace(path + ".tmp", path)
+
+    entry = {"url": url, "fetched_at": time.time(), "sha256": digest, "status": status}
+    with _lock:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        with open(os.path.join(CACHE_DIR, "index.jsonl"), "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        _load_index()[url] = entry
+    return entry
+
+
+def get_page(url, fetch, max_age="policy"):
+    """Return the page for url from the cache if it is fresh enough, otherwise
+       call fetch() (returning the HTML, or None for a missing page) and cache it.
+       Offline mode returns whatever is cached, however old."""
+    if max_age == "policy":
+        max_age = max_age_for(url)
+
+    entry = lookup(url)
+    if entry is not None:
+        fresh = max_age is NEVER or time.time() - entry["fetched_at"] <= max_age
+        if fresh or is_offline():
+            return read_entry(entry)
+    if is_offline():
+        raise OfflineCacheMiss(f"{url} is not in the page cache ({CACHE_DIR})")
+
+    html = fetch()
+    store(url, html, 200 if html is not None else 404)
+    return html
@@ -0,0 +1,301 @@
+import argparse
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+# Runs the scripts as one dependency-tracked pipeline.
+# Each stage lists the files/folders it reads and writes (paths from the repo root,
+# folders end in "/") and the python it runs, inside the folder the script expects.
+# Inputs include the local modules the script imports. "optional" inputs count toward
+# the fingerprint and the stage order but may be missing (the script copes without).
+# A stage re-runs only when the fingerprint of its inputs (script included) changed
+# since its last successful run or one of its outputs is missing. Stages whose
+# inputs are ready run in parallel, so the Elo and TSS chains and the plots overlap.
+# Scrape stages hit the network, so they only run when named or with --scrape;
+# otherwise their saved outputs are used as they are.
+ROOT = os.path.dirname(os.path.abspath(__file__))
+STATE_FILE = os.path.join(ROOT, ".pipeline_state.json")
+LOG_DIR = os.path.join(ROOT, "pipeline_logs")
+
+# Local modules backtest.py imports (directly or through them), for its stages' inputs
+BACKTEST_MODULES = ["calc_elo.py", "columnar.py", "rating_store.py", "team_registry.py", "prediction/active_store.py",
+                    "team_strength/add_tss_active.py", "team_strength/calc_tss.py",
+                    "team_strength/stat_warehouse.py"]
+
+STAGES = [
+    # === Elo chain ===
+    {"name": "get_games", "cwd": ".", "scrape": True,
+     "inputs": ["get_games.py", "game_summaries.py", "page_cache.py"],
+     "outputs": ["master_nfl_2000_2016.csv"],
+     "run": "import get_games; get_games.backfill(range(2000, 2017))"},
+    {"name": "normalize_names", "cwd": ".",
+     "inputs": ["name.py", "team_registry.py", "master_nfl_2000_2016.csv"],
+     "outputs": ["master_nfl_2000_2016_fixed.csv"],
+     "run": "import name; name.normalize_team_names()"},
+    {"name": "swap_teams", "cwd": ".",
+     "inputs": ["swap_teams.py", "master_nfl_2018_2024_fixed.csv"],
+     "outputs": ["master_nfl_2018_2024_fixed_2.csv"],
+     "run": "import swap_teams"},
+    {"name": "calc_elo", "cwd": ".",
+     "inputs": ["calc_elo.py", "columnar.py", "rating_store.py", "master_nfl_2018_2024_fixed_2.csv"],
+     "outputs": ["nfl_elo_history_2018_2024.csv", "nfl_elo_history_2018_2024_checkpoint.json",
+                 "nfl_elo_history_2018_2024_snapshots.npz"],
+     "run": "import calc_elo; calc_elo.compute_elo()"},
+    {"name": "columnar", "cwd": ".",
+     "inputs": ["columnar.py", "rating_store.py", "master_nfl_2000_2016_fixed.csv", "master_nfl_2018_2024_fixed_2.csv",
+                "nfl_elo_history_2018_2024.csv"],
+     "outputs": ["master_nfl_2000_2016_fixed.npz", "master_nfl_2018_2024_fixed_2.npz",
+                 "nfl_elo_history_2018_2024.npz"],
+     "run": "import runpy; runpy.run_path('columnar.py', run_name='__main__')"},
+    {"name": "rating_store", "cwd": ".",
+     "inputs": ["rating_store.py", "nfl_elo_history_2018_2024.csv"],
+     "outputs": ["nfl_elo_history_2018_2024.ratings"],
+     "run": "import runpy; runpy.run_path('rating_store.py', run_name='__main__')"},
+    {"name": "elo_profile", "cwd": ".",
+     "inputs": ["elo_profile.py", "columnar.py", "rating_store.py", "nfl_elo_history_2018_2024.csv"],
+     "outputs": ["matchup_elo_diff_2018_2024.csv", "team_elo_profiles_2018_2024.csv"],
+     "run": "import elo_profile; elo_profile.generate_elo_summaries()"},
+    {"name": "win_report", "cwd": ".",
+     "inputs": ["win_report.py", "render.py", "columnar.py", "rating_store.py", "nfl_elo_history_2018_2024.csv"],
+     "outputs": ["expected_win_reports/team_overall_expected_win_pct.csv",
+                 "expected_win_reports/team_yearly_expected_win_pct.csv",
+                 "expected_win_reports/league_yearly_expected_win_pct.csv",
+                 "expected_win_reports/team_plots/"],
+     "run": "import win_report; win_report.team_expected_win_percentages()"},
+    {"name": "elo_plot", "cwd": ".",
+     "inputs": ["elo_plot.py", "render.py", "columnar.py", "rating_store.py", "nfl_elo_history_2018_2024.csv"],
+     "outputs": ["team_elo_plots_2018_2024/"],
+     "run": "import elo_plot; elo_plot.plot_all_teams()"},
+    {"name": "diff_plot", "cwd": ".",
+     "inputs": ["diff_plot.py", "render.py", "matchup_elo_diff_2018_2024.csv"],
+     "outputs": ["diff_plots/"],
+     "run": "import diff_plot; diff_plot.plot_matchup_diff()"},
+    {"name": "backtest", "cwd": ".",
+     "inputs": ["backtest.py", *BACKTEST_MODULES, "master_nfl_2000_2016_fixed.csv",
+                "master_nfl_2018_2024_fixed_2.csv"],
+     "optional": ["team_strength/tss_history.csv"],
+     "outputs": ["backtest_reports/"],
+     "run": "import backtest; backtest.backtest()"},
+    {"name": "calibration", "cwd": ".",
+     "inputs": ["calibration.py", "backtest.py", *BACKTEST_MODULES, "master_nfl_2000_2016_fixed.csv",
+                "master_nfl_2018_2024_fixed_2.csv"],
+     "optional": ["team_strength/tss_history.csv"],
+     "outputs": ["calibration.json"],
+     "run": "import runpy; runpy.run_path('calibration.py', run_name='__main__')"},
+
+    # === TSS chain ===
+    {"name": "scrape_tables", "cwd": "team_strength", "scrape": True,
+     "inputs": ["team_strength/scrape_tables.py", "team_strength/stat_warehouse.py", "page_cache.py",
+                "team_registry.py"],
+     "outputs": ["team_strength/scraped_csvs_2025/", "team_strength/stat_warehouse.db"],
+     "run": "import runpy; runpy.run_path('scrape_tables.py', run_name='__main__')"},
+    {"name": "calc_tss", "cwd": "team_strength",
+     "inputs": ["team_strength/calc_tss.py", "team_strength/stat_warehouse.py", "team_registry.py",
+                "team_strength/scraped_csvs_2025/"],
+     # scored from the warehouse when there is one, otherwise from the csv folder
+     "optional": ["team_strength/stat_warehouse.db"],
+     "outputs": ["team_strength/scraped_csvs_2025/team_strength_scores.csv",
+                 "team_strength/scraped_csvs_2025/team_strength_scores_by_year.csv",
+                 "team_strength/tss_history.csv"],
+     "run": "import calc_tss; calc_tss.main()"},
+
+    # === Weekly prediction (only with --week) ===
+    {"name": "add_tss_active", "cwd": "team_strength", "weekly": True,
+     "inputs": ["team_strength/add_tss_active.py", "prediction/active_store.py", "team_registry.py",
+                "team_strength/scraped_csvs_2025/team_strength_scores.csv", "prediction/schedule.csv",
+                # the store itself, as exported by predict/update (the .db changes in its WAL first)
+                "prediction/nfl_elo_active.csv"],
+     "outputs": ["prediction/nfl_elo_active.db", "prediction/nfl_elo_active.csv"],
+     "run": "import add_tss_active, active_store; add_tss_active.add_tss_to_active({week}); "
+            "active_store.export_csv(active_store.connect())"},
+    {"name": "show_prediction", "cwd": "prediction", "weekly": True,
+     "inputs": ["prediction/show_prediction.py", "calibration.py", "prediction/active_store.py",
+                "prediction/nfl_elo_active.csv", "prediction/schedule.csv"],
+     "optional": ["calibration.json"],
+     "outputs": ["prediction/week_reports/week_{week}_predictions.csv"],
+     "run": "import show_prediction; show_prediction.show_predictions({week})"},
+]
+
+
+def resolve_stages(week=None):
+    """Stage list for this run with {week} filled in (weekly stages need a week)."""
+    stages = []
+    for stage in STAGES:
+        if stage.get("weekly") and week is None:
+            continue
+        stage = dict(stage)
+        for key in ("inputs", "optional", "outputs"):
+            stage[key] = [path.format(week=week) for path in stage.get(key, [])]
+        stage["run"] = stage["run"].format(week=week)
+        stages.append(stage)
+    return stages
+
+
+def dependencies(stages):
+    """stage name -> names of the stages that write one of its inputs."""
+    writers = {}
+    for stage in stages:
+        for path in stage["outputs"]:
+            writers[path] = stage["name"]
+
+    deps = {}
+    for stage in stages:
+        deps[stage["name"]] = set()
+        for path in stage["inputs"] + stage["optional"]:
+            for output, writer in writers.items():
+                # a folder output covers files inside it and vice versa
+                if writer != stage["name"] and (path == output or path.startswith(output)
+                                                or output.startswith(path) and path.endswith("/")):
+                    deps[stage["name"]].add(writer)
+    return deps
+
+
+def _hash_path(h, path, exclude=()):
+    full = os.path.join(ROOT, path)
+    h.update(path.encode())
+    if os.path.isdir(full):
+        for folder, subdirs, files in os.walk(full):
+            subdirs.sort()
+            for name in sorted(files):
+                file_path = os.path.relpath(os.path.join(folder, name), ROOT)
+                if not name.startswith(".") and file_path not in exclude:
+                    _hash_path(h, file_path)
+    elif os.path.exists(full):
+        with open(full, "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                h.update(block)
+    else:
+        h.update(b"<missing>")
+
+
+def fingerprint(stage):
+    """Hash of the stage's command and input files (its own outputs left out)."""
+    h = hashlib.sha256(stage["run"].encode())
+    for path in stage["inputs"] + stage["optional"]:
+        _hash_path(h, path, exclude=set(stage["outputs"]))
+    return h.hexdigest()
+
+
+def load_state():
+    if os.path.exists(STATE_FILE):
+        with open(STATE_FILE) as f:
+            return json.load(f)
+    return {}
+
+
+def _missing(paths):
+    return [p for p in paths if not os.path.exists(os.path.join(ROOT, p))]
+
+
+def run_stage(stage):
+    """Run one stage in a fresh interpreter, logging to pipeline_logs/<stage>.log."""
+    os.makedirs(LOG_DIR, exist_ok=True)
+    cwd = os.path.join(ROOT, stage["cwd"])
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join([cwd, ROOT, os.path.join(ROOT, "prediction"),
+                                                        os.environ.get("PYTHONPATH", "")]))
+    with open(os.path.join(LOG_DIR, f"{stage['name']}.log"), "w") as log:
+        result = subprocess.run([sys.executable, "-c", stage["run"]], cwd=cwd, env=env,
+                                stdout=log, stderr=subprocess.STDOUT, stdin=subprocess.DEVNULL)
+    return result.returncode
+
+
+def run_pipeline(targets=None, week=None, workers=4, force=False, dry_run=False, scrape=False):
+    """Run the stale stages needed for `targets` (default: every stage).
+       Returns {stage: (status, seconds)}."""
+    stages = {stage["name"]: stage for stage in resolve_stages(week)}
+    deps = dependencies(stages.values())
+
+    # targets plus everything upstream of them
+    wanted, todo = set(), list(targets or stages)
+    while todo:
+        name = todo.pop()
+        if name not in stages:
+            raise ValueError(f"Unknown stage {name!r} (stages: {', '.join(stages)})")
+        if name not in wanted:
+            wanted.add(name)
+            todo.extend(deps[name])
+
+    state = load_state()
+    report = {}
+    pending = [name for name in stages if name in wanted]
+    running = {}
+
+    def ready(name):
+        return all(dep in report for dep in deps[name] & wanted)
+
+    def start(pool, name):
+        stage = stages[name]
+        if stage.get("scrape") and not (scrape or name in (targets or ())):
+            report[name] = ("not scraped", 0.0)
+            return
+        if any(report[dep][0] in ("failed", "blocked") for dep in deps[name] & wanted):
+            report[name] = ("blocked", 0.0)
+            return
+        missing_inputs = _missing(stage["inputs"])
+        if missing_inputs:
+            # Source files that nothing here produces: keep whatever outputs exist
+            status = "missing inputs" if _missing(stage["outputs"]) else "kept"
+            report[name] = (status, 0.0)
+            print(f"⚠️ {name}: {status} ({', '.join(missing_inputs)} not found)")
+            return
+        digest = fingerprint(stage)
+        if not force and state.get(name) == digest and not _missing(stage["outputs"]):
+            report[name] = ("fresh", 0.0)
+            return
+        if dry_run:
+            report[name] = ("would run", 0.0)
+            return
+        print(f"▶ {name}")
+        running[pool.submit(lambda: (time.perf_counter(), run_stage(stage), time.perf_counter()))] = (name, digest)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        while pending or running:
+            for name in [n for n in pending if ready(n)]:
+                pending.remove(name)
+                start(pool, name)
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, digest = running.pop(future)
+                began, code, ended = future.result()
+                if code == 0:
+                    # Fingerprint taken before the run, so edits made meanwhile still count;
+                    # a stage that updates one of its inputs in place (the active store) is
+                    # fingerprinted after, or its own write would make it stale
+                    if set(stages[name]["inputs"] + stages[name]["optional"]) & set(stages[name]["outputs"]):
+                        digest = fingerprint(stages[name])
+                    state[name] = digest
+                    report[name] = ("ran", ended - began)
+                    print(f"✅ {name} ({ended - began:.1f}s)")
+                else:
+                    report[name] = ("failed", ended - began)
+                    print(f"❌ {name} failed (exit {code}), see {os.path.join(LOG_DIR, name + '.log')}")
+            with open(STATE_FILE, "w") as f:
+                json.dump(state, f, indent=1, sort_keys=True)
+
+    print("\nStage               Status          Time")
+    for name in stages:
+        if name in report:
+            status, seconds = report[name]
+            print(f"{name:<20}{status:<16}{seconds:6.1f}s")
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the stale stages of the Elo / TSS pipeline")
+    parser.add_argument("stages", nargs="*", help="Stages to bring up to date (default: all)")
+    parser.add_argument("--week", type=int, help="Also run the weekly TSS + prediction stages")
+    parser.add_argument("--workers", type=int, default=4, help="Stages run at once")
+    parser.add_argument("--force", action="store_true", help="Re-run stages even if their inputs are unchanged")
+    parser.add_argument("--dry-run", action="store_true", help="Only show which stages would run")
+    parser.add_argument("--scrape", action="store_true", help="Also run the scrape stages (network)")
+    args = parser.parse_args()
+
+    report = run_pipeline(args.stages or None, week=args.week, workers=args.workers,
+                          force=args.force, dry_run=args.dry_run, scrape=args.scrape)
+    sys.exit(1 if any(status == "failed" for status, _ in report.values()) else 0)
@@ -0,0 +1,142 @@
+import sqlite3
+import os
+from contextlib import contextmanager
+
+import pandas as pd
+
+# Active season state: one row per (year, week, team) in SQLite.
+# nfl_elo_active.csv is kept as an export for scripts/plots that read the csv.
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nfl_elo_active.db")
+CSV_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "nfl_elo_active.csv")
+
+KEY = ["year", "week", "team"]
+COLUMNS = ["year", "week", "team", "elo_before", "elo_after", "expected_win", "type", "result",
+           "tss_win_prob", "tss_edge", "total_edge"]
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS active (
+    year INTEGER NOT NULL,
+    week INTEGER NOT NULL,
+    team TEXT NOT NULL,
+    elo_before REAL,
+    elo_after REAL,
+    expected_win REAL,
+    type TEXT,
+    result TEXT,
+    tss_win_prob REAL,
+    tss_edge REAL,
+    total_edge REAL,
+    PRIMARY KEY (year, week, team)
+);
+CREATE INDEX IF NOT EXISTS active_team ON active (team, year, week);
+"""
+
+
+def connect(db_path=DB_FILE, csv_path=CSV_FILE):
+    """Open the store (WAL, waits on locks held by other writers).
+       A new store is seeded from the csv if one exists."""
+    is_new = not os.path.exists(db_path)
+    conn = sqlite3.connect(db_path, timeout=30, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA busy_timeout=30000")
+    conn.executescript(SCHEMA)
+    if is_new and csv_path and os.path.exists(csv_path):
+        import_csv(conn, csv_path)
+    return conn
+
+
+@contextmanager
+def transaction(conn):
+    """Write transaction; BEGIN IMMEDIATE takes the write lock up front so
+       concurrent read-modify-write runs serialize instead of racing."""
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    conn.execute("COMMIT")
+
+
+def _clean(value):
+    return None if pd.isna(value) else value.item() if hasattr(value, "item") else value
+
+
+def upsert_rows(conn, rows, columns=None, keep_types=()):
+    """Insert rows or update only the given columns of existing (year, week, team) rows.
+       Existing rows whose type is in keep_types (e.g. "game") are left as they are."""
+    df = pd.DataFrame(rows)
+    if df.empty:
+        return 0
+    columns = [c for c in (columns or df.columns) if c in COLUMNS and c not in KEY]
+    names = KEY + columns
+    updates = ", ".join(f"{c} = excluded.{c}" for c in columns) or "year = excluded.year"
+    sql = (f"INSERT INTO active ({', '.join(names)}) VALUES ({', '.join('?' * len(names))}) "
+           f"ON CONFLICT (year, week, team) DO UPDATE SET {updates}")
+    if keep_types:
+        sql += f" WHERE active.type IS NULL OR active.type NOT IN ({', '.join('?' * len(keep_types))})"
+    values = [[_clean(v) for v in row] + list(keep_types) for row in df[names].itertuples(index=False)]
+    conn.executemany(sql, values)
+    return len(values)
+
+
+def read_rows(conn, year=None, week=None):
+    """Active rows as a DataFrame (optionally one year/week), in insertion order."""
+    where, params = [], []
+    if year is not None:
+        where.append("year = ?")
+        params.append(int(year))
+    if week is not None:
+        where.append("week = ?")
+        params.append(int(week))
+    sql = f"SELECT {', '.join(COLUMNS)} FROM active"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY year, week, rowid"
+    return pd.read_sql_query(sql, conn, params=params)
+
+
+def latest_elos(conn):
+    """Each team's most recent Elo: elo_after if set, else elo_before."""
+    rows = conn.execute("""
+        SELECT team, COALESCE(elo_after, elo_before) FROM (
+            SELECT team, elo_after, elo_before,
+                   ROW_NUMBER() OVER (PARTITION BY team ORDER BY year DESC, week DESC) AS rn
+            FROM active)
+        WHERE rn = 1
+    """).fetchall()
+    return dict(rows)
+
+
+def parse_weeks(text):
+    """'5' -> [5], '1-18' -> [1..18], 'all' -> None (every week).
+       Raises ValueError otherwise."""
+    text = text.strip().lower()
+    if text == "all":
+        return None
+    if "-" in text:
+        first, last = (int(part) for part in text.split("-", 1))
+        return list(range(first, last + 1))
+    return [int(text)]
+
+
+def import_csv(conn, csv_path=CSV_FILE):
+    """Load an existing active csv; repeated (year, week, team) rows keep the last one."""
+    df = pd.read_csv(csv_path)
+    df = df.drop_duplicates(subset=KEY, keep="last")
+    with transaction(conn):
+        upsert_rows(conn, df.reindex(columns=COLUMNS))
+    return len(df)
+
+
+def export_csv(conn, csv_path=CSV_FILE):
+    """Write the whole store as the legacy nfl_elo_active.csv."""
+    df = read_rows(conn)
+    df.to_csv(csv_path, index=False)
+    return df
+
+
+if __name__ == "__main__":
+    conn = connect()
+    df = export_csv(conn)
+    print(f"✅ Exported {len(df)} rows from {DB_FILE} to {CSV_FILE}")
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from email.utils import formatdate
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+import requests
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import page_cache
+from game_summaries import parse_game_summaries
+import active_store
+from update import WEEK_URL, final_results, apply_week_results
+
+# Game-day poller: re-checks the current week page and applies each game to the
+# active store as soon as it is final. Ratings are provisional until the week is done.
+POLL_INTERVAL = 120  # seconds between checks
+HEADERS = {"User-Agent": "Mozilla/5.0"}
+
+
+def fetch_if_changed(session, url, seen):
+    """Conditional GET. `seen` holds the previous response's etag, last_modified
+       and content digest and is updated in place. Returns the page html, or None
+       if it has not changed (304, or same content from a server without validators)."""
+    headers = dict(HEADERS)
+    if seen.get("etag"):
+        headers["If-None-Match"] = seen["etag"]
+    if seen.get("last_modified"):
+        headers["If-Modified-Since"] = seen["last_modified"]
+
+    response = session.get(url, headers=headers, timeout=30)
+    if response.status_code == 304:
+        return None
+    response.raise_for_status()
+
+    seen["etag"] = response.headers.get("ETag")
+    seen["last_modified"] = response.headers.get("Last-Modified")
+    digest = hashlib.sha256(response.content).hexdigest()
+    if digest == seen.get("digest"):
+        return None
+    seen["digest"] = digest
+    return response.text
+
+
+def print_provisional(teams):
+    elos = active_store.latest_elos(active_store.connect())
+    for team in sorted(teams):
+        print(f"   {team}: {elos[team]:.1f} (provisional)")
+
+
+def poll_week(year, week, url=None, interval=POLL_INTERVAL, max_polls=None, session=None, cache=None):
+    """Poll the week page until every game on it is final and applied (or max_polls
+       checks), applying newly final games as they appear. Pages are kept in the page
+       cache when `cache` is true (default: only for the real pro-football-reference
+       page, not a local replay). Returns the number applied."""
+    url = url or WEEK_URL.format(year=year, week=week)
+    session = session or requests.Session()
+    if cache is None:
+        cache = page_cache.PFR_WEEK.search(url) is not None
+    seen = {}
+    done = set()
+    pending = {}  # (home, away) -> final result not applied yet, retried every poll
+    games = results = []
+    applied_total = 0
+    polls = 0
+
+    while True:
+        polls += 1
+        try:
+            html = fetch_if_changed(session, url, seen)
+        except requests.RequestException as e:
+            print(f"⚠️ Poll {polls} failed ({e}), retrying")
+            html = None
+
+        if html is not None:
+            if cache:
+                page_cache.store(url, html)
+            games = parse_game_summaries(html)
+            results = final_results(html)
+            pending.update({(r[0], r[2]): r for r in results if (r[0], r[2]) not in done})
+
+        if pending:
+            applied, skipped = apply_week_results(year, week, list(pending.values()))
+            applied_total += len(applied)
+            if len(applied):
+                print_provisional(set(applied["home"]) | set(applied["away"]))
+            # Games skipped for lack of a prediction row stay pending
+            finished = pd.concat([applied[["home", "away"]],
+                                  skipped.loc[skipped["reason"] == "already updated", ["home", "away"]]])
+            for game in zip(finished["home"], finished["away"]):
+                done.add(game)
+                pending.pop(game, None)
+
+        status = f"{len(results)}/{len(games)} games final" if html is not None else "no change"
+        print(f"Poll {polls}: {status}" + (f", {len(pending)} waiting for a prediction row" if pending else ""))
+        if games and len(results) == len(games) and not pending:
+            print(f"✅ Week {week} complete, {applied_total} games applied while polling")
+            return applied_total
+
+        if max_polls is not None and polls >= max_polls:
+            return applied_total
+        time.sleep(interval)
+
+
+def replay_server(snapshots, port=0, validators=True):
+    """Local stand-in for the week page: each GET serves the next snapshot (the
+       last one repeats). With validators=False no ETag/Last-Modified is sent, so
+       the poller falls back to comparing content hashes. Returns (server, url);
+       call server.shutdown() when finished."""
+    state = {"next": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                index = min(state["next"], len(snapshots) - 1)
+                state["next"] += 1
+            body = snapshots[index].encode("utf-8")
+            etag = '"' + hashlib.sha256(body).hexdigest()[:16] + '"'
+
+            if validators and self.headers.get("If-None-Match") == etag:
+                self.send_response(304)
+                self.end_headers()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            if validators:
+                self.send_header("ETag", etag)
+                self.send_header("Last-Modified", formatdate(usegmt=True))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/week.htm"
+
+
+if __name__ == "__main__":
+    try:
+        week = int(input("Enter week number to poll: "))
+    except ValueError:
+        print("❌ Invalid input. Please enter a valid week number.")
+    else:
+        poll_week(2025, week)
+        active_store.export_csv(active_store.connect())
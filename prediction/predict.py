@@ -1,10 +1,16 @@
 import pandas as pd
 import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import columnar
+import rating_store
+import calibration
+import active_store
 
 # Parameters
 HISTORY_FILE = "../nfl_elo_history_2018_2024.csv"
 SCHEDULE_FILE = "schedule.csv"
-ACTIVE_FILE = "nfl_elo_active.csv"
 HOME_FIELD_ADV = 65
 
 # Expected score function
@@ -19,9 +25,15 @@ def expected_score(rating_a, rating_b, home_adv=0, is_home=True):
 
 
 def init_active_file():
-    """Initialize nfl_elo_active.csv with 2024 regression values."""
-    df_hist = pd.read_csv(HISTORY_FILE)
-    last_year = df_hist["year"].max()
+    """Initialize the active store with 2024 regression values."""
+    if rating_store.is_rating_store(HISTORY_FILE):
+        # Only the last season's records are read from the mapped file
+        history = rating_store.open_history(HISTORY_FILE)
+        last_year = history["years"][-1]
+        df_hist = rating_store.to_frame(history, rating_store.season_records(history, last_year))
+    else:
+        df_hist = columnar.read_table(HISTORY_FILE)
+        last_year = df_hist["year"].max()
     regressions = df_hist[(df_hist["year"] == last_year) & (df_hist["type"] == "regression")]
 
     if regressions.empty:
@@ -39,31 +51,24 @@ def init_active_file():
             "type": "regression_start",
             "result": None
         })
-    df_active = pd.DataFrame(rows)
-    df_active.to_csv(ACTIVE_FILE, index=False)
-    print(f"✅ Initialized {ACTIVE_FILE} with 2025 baselines from {last_year} regression")
+    conn = active_store.connect()
+    with active_store.transaction(conn):
+        active_store.upsert_rows(conn, rows)
+    print(f"✅ Initialized {active_store.DB_FILE} with 2025 baselines from {last_year} regression")
 
 
-def get_current_elos():
-    """Load latest Elo ratings for each team from active file.
+def get_current_elos(conn=None):
+    """Load latest Elo ratings for each team from the active store.
        Prefer elo_after if available, otherwise fallback to elo_before."""
-    df_active = pd.read_csv(ACTIVE_FILE)
-
-    # Get each team's most recent row
-    latest = df_active.sort_values(by=["year", "week"]).groupby("team").tail(1)
-
-    # Prefer elo_after if it's not NaN, else fallback to elo_before
-    latest["current_elo"] = latest["elo_after"].combine_first(latest["elo_before"])
-
-    return dict(zip(latest["team"], latest["current_elo"]))
+    return active_store.latest_elos(conn or active_store.connect())
 
 
 def predict_week(week: int):
-    """Predict all games in a given week and append to active file."""
-    if not os.path.exists(ACTIVE_FILE):
+    """Predict all games in a given week and upsert them into the active store."""
+    conn = active_store.connect()
+    if not conn.execute("SELECT 1 FROM active LIMIT 1").fetchone():
         init_active_file()
 
-    current_elos = get_current_elos()
     df_sched = pd.read_csv(SCHEDULE_FILE)
     week_games = df_sched[df_sched["week"] == week]
 
@@ -71,59 +76,71 @@ def predict_week(week: int):
         print(f"No games found for Week {week} in {SCHEDULE_FILE}")
         return
 
-    df_active = pd.read_csv(ACTIVE_FILE)
-
-    print(f"\n📅 Week {week} Predictions\n{'-'*50}")
-    rows = []
-    for _, game in week_games.iterrows():
-        home = game["home team"]
-        away = game["away team"]
-
-        if home not in current_elos or away not in current_elos:
-            print(f"Skipping {home} vs {away} (missing Elo)")
-            continue
-
-        r_home = current_elos[home]
-        r_away = current_elos[away]
-
-        exp_home = expected_score(r_home, r_away, HOME_FIELD_ADV, True)
-        exp_away = 1 - exp_home
-
-        print(f"{home} ({r_home:.1f}) vs {away} ({r_away:.1f})")
-        print(f"   {home} win chance: {exp_home*100:.2f}%")
-        print(f"   {away} win chance: {exp_away*100:.2f}%\n")
-
-        rows.append({
-            "year": 2025,
-            "week": week,
-            "team": home,
-            "elo_before": r_home,
-            "elo_after": None,  # left blank until update.py processes result
-            "expected_win": exp_home,
-            "type": "prediction",
-            "result": None
-        })
-        rows.append({
-            "year": 2025,
-            "week": week,
-            "team": away,
-            "elo_before": r_away,
-            "elo_after": None,
-            "expected_win": exp_away,
-            "type": "prediction",
-            "result": None
-        })
-
+    fitted = calibration.load()
+
+    # Ratings, played games and the write in one transaction, so a result applied
+    # meanwhile is neither predicted from stale Elos nor overwritten
+    with active_store.transaction(conn):
+        current_elos = get_current_elos(conn)
+        played = set(active_store.read_rows(conn, 2025, week).query("type == 'game'")["team"])
+
+        print(f"\n📅 Week {week} Predictions\n{'-'*50}")
+        rows = []
+        for _, game in week_games.iterrows():
+            home = game["home team"]
+            away = game["away team"]
+
+            if home not in current_elos or away not in current_elos:
+                print(f"Skipping {home} vs {away} (missing Elo)")
+                continue
+            if home in played or away in played:
+                print(f"Skipping {home} vs {away} (already played)")
+                continue
+
+            r_home = current_elos[home]
+            r_away = current_elos[away]
+
+            exp_home = expected_score(r_home, r_away, HOME_FIELD_ADV, True)
+            exp_away = 1 - exp_home
+
+            print(f"{home} ({r_home:.1f}) vs {away} ({r_away:.1f})")
+            print(f"   {home} win chance: {exp_home*100:.2f}%")
+            print(f"   {away} win chance: {exp_away*100:.2f}%")
+            if fitted:
+                cal_home = float(calibration.apply(fitted, exp_home))
+                print(f"   calibrated: {home} {cal_home*100:.2f}%, {away} {(1 - cal_home)*100:.2f}%")
+            print("")
+
+            rows.append({
+                "year": 2025,
+                "week": week,
+                "team": home,
+                "elo_before": r_home,
+                "elo_after": None,  # left blank until update.py processes result
+                "expected_win": exp_home,
+                "type": "prediction",
+                "result": None
+            })
+            rows.append({
+                "year": 2025,
+                "week": week,
+                "team": away,
+                "elo_before": r_away,
+                "elo_after": None,
+                "expected_win": exp_away,
+                "type": "prediction",
+                "result": None
+            })
+
+        active_store.upsert_rows(conn, rows, keep_types=["game"])  # finished games stay as they are
     if rows:
-        df_new = pd.DataFrame(rows)
-        df_active = pd.concat([df_active, df_new], ignore_index=True)
-        df_active.to_csv(ACTIVE_FILE, index=False)
-        print(f"✅ Predictions for Week {week} saved to {ACTIVE_FILE}")
+        print(f"✅ Predictions for Week {week} saved to {active_store.DB_FILE}")
 
 
 if __name__ == "__main__":
     try:
         week = int(input("Enter week number (1-18): "))
         predict_week(week)
+        active_store.export_csv(active_store.connect())
     except ValueError:
         print("❌ Invalid input. Please enter a number between 1 and 18.")
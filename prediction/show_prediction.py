@@ -1,85 +1,108 @@
 import pandas as pd
+import numpy as np
 import os
+import sys
 
-def show_predictions(week, 
-                     schedule_file="schedule.csv",
-                     active_file="nfl_elo_active.csv",
-                     output_dir="week_reports"):
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import calibration
+import active_store
+
+REPORT_COLUMNS = ["elo_before", "expected_win", "tss_win_prob", "tss_edge", "total_edge"]
+
+
+def _team_line(team, row, side):
+    return (f"{team}: Elo={row[f'elo_before_{side}']:.1f}, "
+            f"ExpWin={row[f'expected_win_{side}']:.1%}, "
+            f"TSS Prob={row[f'tss_win_prob_{side}']:.1%}, "
+            f"TSS Edge={row[f'tss_edge_{side}']:+.1%}, "
+            f"Total Edge={row[f'total_edge_{side}']:+.1%}"
+            + (f", Calibrated={row[f'calibrated_win_{side}']:.1%}" if f"calibrated_win_{side}" in row else ""))
+
+
+def show_season(weeks=None,
+                schedule_file="schedule.csv",
+                year=2025,
+                output_dir="week_reports"):
+    """Print and export the predictions of the given weeks (default: the whole
+       schedule) from one read of the active rows and one schedule merge; each week
+       still gets its own week_<n>_predictions.csv."""
     # Load files
     df_sched = pd.read_csv(schedule_file)
-    df_active = pd.read_csv(active_file)
-
-    # Filter schedule to chosen week
-    week_sched = df_sched[df_sched["week"] == week]
-    if week_sched.empty:
-        print(f"❌ No schedule found for week {week}")
-        return
-
-    # Collect rows for CSV export
-    report_rows = []
-
-    print(f"\n==================== Week {week} Predictions ====================")
-    for _, game in week_sched.iterrows():
-        home = game["home team"]
-        away = game["away team"]
-
-        try:
-            row_home = df_active[(df_active["week"] == week) & (df_active["team"] == home)].iloc[-1]
-            row_away = df_active[(df_active["week"] == week) & (df_active["team"] == away)].iloc[-1]
-        except IndexError:
-            print(f"⚠️ Missing data for {home} vs {away}, skipping")
+    df_active = active_store.read_rows(active_store.connect(), year)
+
+    # Filter schedule to chosen weeks
+    if weeks is not None:
+        for week in weeks:
+            if not (df_sched["week"] == week).any():
+                print(f"❌ No schedule found for week {week}")
+        df_sched = df_sched[df_sched["week"].isin(list(weeks))]
+
+    # Latest active row of each team per week, joined to both sides of every game
+    latest = df_active.drop_duplicates(subset=["week", "team"], keep="last")[["week", "team"] + REPORT_COLUMNS]
+    games = df_sched[["week", "home team", "away team"]].rename(
+        columns={"home team": "home", "away team": "away"}).reset_index(drop=True)
+    for side in ("home", "away"):
+        games = games.merge(latest.assign(found=True).rename(
+            columns={"team": side, "found": f"found_{side}", **{c: f"{c}_{side}" for c in REPORT_COLUMNS}}),
+            on=["week", side], how="left")
+    games["ok"] = games["found_home"].notna() & games["found_away"].notna()
+
+    # Calibrated win chance (Elo/TSS blend) when a calibration has been fitted
+    fitted = calibration.load()
+    columns = REPORT_COLUMNS
+    if fitted:
+        games["calibrated_win_home"] = calibration.apply(fitted, games["expected_win_home"],
+                                                         games["tss_win_prob_home"])
+        games["calibrated_win_away"] = 1 - games["calibrated_win_home"]
+        columns = REPORT_COLUMNS + ["calibrated_win"]
+
+    written = []
+    for week, week_games in games.groupby("week", sort=False):
+        print(f"\n==================== Week {week} Predictions ====================")
+        for game in week_games.to_dict("records"):
+            home, away = game["home"], game["away"]
+            if not game["ok"]:
+                print(f"⚠️ Missing data for {home} vs {away}, skipping")
+                continue
+
+            print("--------------------------------------------------")
+            print(f"{home} vs {away}")
+            print("--------------------------------------------------")
+            print(_team_line(home, game, "home"))
+            print(_team_line(away, game, "away"))
+            print("")
+        print("==================================================\n")
+
+        # Two report rows per game (home, then away)
+        ok = week_games[week_games["ok"]]
+        if ok.empty:
             continue
+        report = pd.concat([
+            pd.DataFrame({"week": week, "matchup": ok["home"] + " vs " + ok["away"], "team": ok[side],
+                          **{c: ok[f"{c}_{side}"] for c in columns},
+                          "order": 2 * np.arange(len(ok)) + i})
+            for i, side in enumerate(("home", "away"))
+        ]).sort_values("order").drop(columns="order")
 
-        print("--------------------------------------------------")
-        print(f"{home} vs {away}")
-        print("--------------------------------------------------")
-        print(f"{home}: Elo={row_home['elo_before']:.1f}, "
-              f"ExpWin={row_home['expected_win']:.1%}, "
-              f"TSS Prob={row_home.get('tss_win_prob', float('nan')):.1%}, "
-              f"TSS Edge={row_home.get('tss_edge', float('nan')):+.1%}, "
-              f"Total Edge={row_home.get('total_edge', float('nan')):+.1%}")
-        print(f"{away}: Elo={row_away['elo_before']:.1f}, "
-              f"ExpWin={row_away['expected_win']:.1%}, "
-              f"TSS Prob={row_away.get('tss_win_prob', float('nan')):.1%}, "
-              f"TSS Edge={row_away.get('tss_edge', float('nan')):+.1%}, "
-              f"Total Edge={row_away.get('total_edge', float('nan')):+.1%}")
-        print("")
-
-        # Append rows for export
-        report_rows.append({
-            "week": week,
-            "matchup": f"{home} vs {away}",
-            "team": home,
-            "elo_before": row_home["elo_before"],
-            "expected_win": row_home["expected_win"],
-            "tss_win_prob": row_home.get("tss_win_prob", None),
-            "tss_edge": row_home.get("tss_edge", None),
-            "total_edge": row_home.get("total_edge", None),
-        })
-        report_rows.append({
-            "week": week,
-            "matchup": f"{home} vs {away}",
-            "team": away,
-            "elo_before": row_away["elo_before"],
-            "expected_win": row_away["expected_win"],
-            "tss_win_prob": row_away.get("tss_win_prob", None),
-            "tss_edge": row_away.get("tss_edge", None),
-            "total_edge": row_away.get("total_edge", None),
-        })
-
-    print("==================================================\n")
-
-    # Save CSV
-    if report_rows:
+        # Save CSV
         os.makedirs(output_dir, exist_ok=True)
         output_file = os.path.join(output_dir, f"week_{week}_predictions.csv")
-        pd.DataFrame(report_rows).to_csv(output_file, index=False)
+        report.to_csv(output_file, index=False)
+        written.append(output_file)
         print(f"✅ Exported predictions to {output_file}")
+    return written
+
+
+def show_predictions(week, 
+                     schedule_file="schedule.csv",
+                     year=2025,
+                     output_dir="week_reports"):
+    return show_season([week], schedule_file, year, output_dir)
 
 
 if __name__ == "__main__":
     try:
-        week = int(input("Enter week number to show predictions: "))
-        show_predictions(week)
+        weeks = active_store.parse_weeks(input("Enter week number to show predictions (e.g. 5, 1-18 or all): "))
+        show_season(weeks)
     except ValueError:
         print("❌ Invalid input. Please enter a valid week number.")
@@ -0,0 +1,290 @@
+import pandas as pd
+import numpy as np
+import os
+import sys
+from multiprocessing import Pool, shared_memory
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import team_registry
+from predict import get_current_elos, SCHEDULE_FILE, HOME_FIELD_ADV
+import active_store
+
+# Parameters
+GAMES_FILE = "../master_nfl_2018_2024_fixed_2.csv"  # historical margins of victory
+CHUNK_SIZE = 25_000     # sims per chunk, each chunk gets its own seed
+K_FACTOR = 20           # regular season
+ALPHA = 0.3
+ELO_BINS = np.arange(1000, 2205, 5)  # final Elo histogram edges
+
+DIVISIONS = team_registry.DIVISIONS  # team ids follow this order
+PLAYOFF_WILDCARDS = 3
+
+
+# === Vectorized Elo rules (same as update.py, one value per simulation) ===
+def expected_score(rating_a, rating_b, home_adv=0):
+    diff = np.clip((rating_b - (rating_a + home_adv)) / 400, -10, 10)
+    return 1 / (1 + 10 ** diff)
+
+
+def score_multiplier(score_diff, alpha=ALPHA, cap=1.75):
+    n_scores = np.clip(score_diff / 7, 1, 3.5)
+    return np.minimum(1 + alpha * (n_scores - 1), cap)
+
+
+def surprise_factor(expected, cap=3.0):
+    return np.minimum(2.2 / (0.001 + (expected * (1 - expected))), cap)
+
+
+def load_season_state(schedule_file=SCHEDULE_FILE):
+    """Teams, current Elo, record so far and the not-yet-played schedule games."""
+    teams = team_registry.NAMES.tolist()
+
+    elos = get_current_elos()
+    start_elos = np.array([elos[team] for team in teams], dtype=np.float64)
+
+    # One row per team-week
+    df_active = active_store.read_rows(active_store.connect())
+    year = df_active["year"].max()
+    played = (df_active[(df_active["year"] == year) & (df_active["type"] == "game")]
+              .drop_duplicates(subset=["week", "team"], keep="last"))
+    wins = np.zeros(len(teams))
+    ties = np.zeros(len(teams))
+    for result, counts in [("W", wins), ("T", ties)]:
+        ids = team_registry.to_ids(played.loc[played["result"] == result, "team"])
+        counts += np.bincount(ids, minlength=len(teams))
+
+    df_sched = pd.read_csv(schedule_file)
+    played_keys = set(zip(played["week"], played["team"]))
+    remaining = df_sched[[(w, h) not in played_keys for w, h in zip(df_sched["week"], df_sched["home team"])]]
+    home = team_registry.to_ids(remaining["home team"]).astype(np.int64)
+    away = team_registry.to_ids(remaining["away team"]).astype(np.int64)
+
+    return {
+        "year": int(year),
+        "teams": teams,
+        "start_elos": start_elos,
+        "wins": wins,
+        "ties": ties,
+        "home": home,
+        "away": away,
+    }
+
+
+def load_margins(games_file=GAMES_FILE):
+    """Empirical margins of victory to draw simulated scores from."""
+    df = pd.read_csv(games_file)
+    margins = (df["home-score"] - df["away-score"]).abs().to_numpy(dtype=np.float64)
+    return margins[margins > 0]
+
+
+def _division_index(teams):
+    return np.array([[teams.index(team) for team in division] for division in DIVISIONS.values()])
+
+
+def empty_totals(n_teams, max_wins):
+    return {
+        "n_sims": 0,
+        "wins_hist": np.zeros((n_teams, max_wins + 1), dtype=np.int64),
+        "elo_hist": np.zeros((n_teams, len(ELO_BINS) - 1), dtype=np.int64),
+        "elo_sum": np.zeros(n_teams),
+        "elo_sq_sum": np.zeros(n_teams),
+        "division": np.zeros(n_teams, dtype=np.int64),
+        "playoffs": np.zeros(n_teams, dtype=np.int64),
+    }
+
+
+def merge_totals(total, part):
+    """Add one chunk's counts into the running totals."""
+    for key, value in part.items():
+        total[key] = total[key] + value
+    return total
+
+
+def simulate_chunk(state, margins, n_sims, seed):
+    """Play every remaining game for n_sims seasons at once (one array op per
+       game across all sims) and return count/sum totals for the chunk."""
+    rng = np.random.default_rng(seed)
+    teams = state["teams"]
+    n_teams = len(teams)
+
+    ratings = np.tile(state["start_elos"], (n_sims, 1))
+    wins = np.tile(state["wins"], (n_sims, 1))
+
+    for h, a in zip(state["home"], state["away"]):
+        r_home, r_away = ratings[:, h], ratings[:, a]
+        exp_home = expected_score(r_home, r_away, HOME_FIELD_ADV)
+
+        home_won = rng.random(n_sims) < exp_home
+        margin = margins[rng.integers(0, len(margins), n_sims)]
+
+        change = K_FACTOR * score_multiplier(margin) * surprise_factor(exp_home) * (home_won - exp_home)
+        change = np.clip(change, -50, 50)
+        ratings[:, h] = r_home + change
+        ratings[:, a] = r_away - change
+        wins[:, h] += home_won
+        wins[:, a] += ~home_won
+
+    # Standings: ties count half, final Elo breaks remaining ties
+    standing = wins + 0.5 * state["ties"] + ratings * 1e-6
+    divisions = _division_index(teams)
+
+    div_winner = np.zeros((n_sims, n_teams), dtype=bool)
+    best = divisions[np.arange(len(divisions)), np.argmax(standing[:, divisions], axis=2)]
+    np.put_along_axis(div_winner, best, True, axis=1)
+
+    playoffs = div_winner.copy()
+    for conference in (divisions[:4].ravel(), divisions[4:].ravel()):
+        open_spots = np.where(div_winner[:, conference], -np.inf, standing[:, conference])
+        wildcard = np.argpartition(-open_spots, PLAYOFF_WILDCARDS - 1, axis=1)[:, :PLAYOFF_WILDCARDS]
+        np.put_along_axis(playoffs, conference[wildcard], True, axis=1)
+
+    max_wins = int(state["wins"].max()) + len(state["home"])
+    win_counts = wins.astype(np.int64)
+    elo_bins = np.clip(np.searchsorted(ELO_BINS, ratings, side="right") - 1, 0, len(ELO_BINS) - 2)
+
+    totals = empty_totals(n_teams, max_wins)
+    totals["n_sims"] = n_sims
+    for t in range(n_teams):
+        totals["wins_hist"][t] = np.bincount(win_counts[:, t], minlength=max_wins + 1)[:max_wins + 1]
+        totals["elo_hist"][t] = np.bincount(elo_bins[:, t], minlength=len(ELO_BINS) - 1)
+    totals["elo_sum"] = ratings.sum(axis=0)
+    totals["elo_sq_sum"] = (ratings ** 2).sum(axis=0)
+    totals["division"] = div_winner.sum(axis=0)
+    totals["playoffs"] = playoffs.sum(axis=0)
+    return totals
+
+
+def chunk_seeds(n_sims, seed=None, chunk_size=CHUNK_SIZE):
+    """Fixed-size chunks with independent seeds spawned from one root seed."""
+    sizes = [chunk_size] * (n_sims // chunk_size)
+    if n_sims % chunk_size:
+        sizes.append(n_sims % chunk_size)
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    return list(zip(sizes, seeds))
+
+
+# === Multi-process sharding ===
+SHARED_ARRAYS = ["start_elos", "wins", "ties", "home", "away"]
+_worker = {}
+
+
+def _share_arrays(arrays):
+    """Copy arrays into shared memory blocks; returns (blocks, specs to attach by name)."""
+    blocks, specs = [], {}
+    for key, array in arrays.items():
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[:] = array
+        blocks.append(block)
+        specs[key] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def _attach_worker(specs, teams):
+    """Pool initializer: map the shared schedule/ratings once per worker, no copies."""
+    views = {}
+    for key, (name, shape, dtype) in specs.items():
+        if sys.version_info >= (3, 13):
+            block = shared_memory.SharedMemory(name=name, track=False)  # parent owns cleanup
+        else:
+            block = shared_memory.SharedMemory(name=name)
+        _worker.setdefault("blocks", []).append(block)
+        views[key] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    _worker["margins"] = views.pop("margins")
+    _worker["state"] = {**views, "teams": teams}
+
+
+def _run_chunk(task):
+    size, seed = task
+    return simulate_chunk(_worker["state"], _worker["margins"], size, seed)
+
+
+def simulate_chunks(state, margins, tasks, workers=1):
+    """Run (size, seed) chunks, sharded over a process pool when workers > 1.
+       Totals are merged in chunk order, so results for a seed do not depend
+       on the number of workers."""
+    max_wins = int(state["wins"].max()) + len(state["home"])
+    totals = empty_totals(len(state["teams"]), max_wins)
+
+    if workers <= 1:
+        for size, seed in tasks:
+            totals = merge_totals(totals, simulate_chunk(state, margins, size, seed))
+        return totals
+
+    arrays = {key: np.asarray(state[key]) for key in SHARED_ARRAYS}
+    arrays["margins"] = margins
+    blocks, specs = _share_arrays(arrays)
+    try:
+        with Pool(workers, initializer=_attach_worker, initargs=(specs, state["teams"])) as pool:
+            for part in pool.imap(_run_chunk, tasks):
+                totals = merge_totals(totals, part)
+    finally:
+        for block in blocks:
+            block.close()
+            block.unlink()
+    return totals
+
+
+def _percentile_from_hist(hist, values, q):
+    cdf = np.cumsum(hist, axis=1) / hist.sum(axis=1, keepdims=True)
+    return values[np.argmax(cdf >= q, axis=1)]
+
+
+def summarize(state, totals):
+    """Per-team wins/Elo distribution and division/playoff odds."""
+    n = totals["n_sims"]
+    wins_hist = totals["wins_hist"]
+    win_values = np.arange(wins_hist.shape[1])
+    elo_mid = (ELO_BINS[:-1] + ELO_BINS[1:]) / 2
+    elo_mean = totals["elo_sum"] / n
+
+    summary = pd.DataFrame({
+        "team": state["teams"],
+        "division": [name for name, division in DIVISIONS.items() for _ in division],
+        "start_elo": state["start_elos"],
+        "current_wins": state["wins"],
+        "mean_wins": (wins_hist * win_values).sum(axis=1) / n,
+        "wins_p10": _percentile_from_hist(wins_hist, win_values, 0.10),
+        "wins_p50": _percentile_from_hist(wins_hist, win_values, 0.50),
+        "wins_p90": _percentile_from_hist(wins_hist, win_values, 0.90),
+        "mean_final_elo": elo_mean,
+        "final_elo_std": np.sqrt(np.maximum(totals["elo_sq_sum"] / n - elo_mean ** 2, 0)),
+        "final_elo_p10": _percentile_from_hist(totals["elo_hist"], elo_mid, 0.10),
+        "final_elo_p90": _percentile_from_hist(totals["elo_hist"], elo_mid, 0.90),
+        "division_odds": totals["division"] / n,
+        "playoff_odds": totals["playoffs"] / n,
+    })
+    wins_dist = pd.DataFrame(wins_hist / n, columns=[f"wins_{w}" for w in win_values])
+    wins_dist.insert(0, "team", state["teams"])
+    return summary, wins_dist
+
+
+def simulate_season(n_sims=100_000, seed=None, output_dir="season_sims", workers=1):
+    """Monte Carlo the rest of the season from the current active Elo ratings.
+       workers > 1 shards the chunks over a process pool (workers=None: all cores)."""
+    state = load_season_state()
+    margins = load_margins()
+    workers = workers or os.cpu_count()
+    print(f"Simulating {len(state['home'])} remaining games x {n_sims} seasons on {workers} worker(s)...")
+
+    totals = simulate_chunks(state, margins, chunk_seeds(n_sims, seed), workers)
+
+    summary, wins_dist = summarize(state, totals)
+
+    os.makedirs(output_dir, exist_ok=True)
+    summary.to_csv(os.path.join(output_dir, f"season_{state['year']}_summary.csv"), index=False)
+    wins_dist.to_csv(os.path.join(output_dir, f"season_{state['year']}_wins_distribution.csv"), index=False)
+
+    print(summary.sort_values("playoff_odds", ascending=False)
+          [["team", "mean_wins", "wins_p10", "wins_p90", "mean_final_elo", "division_odds", "playoff_odds"]]
+          .to_string(index=False, float_format=lambda x: f"{x:.3f}"))
+    print(f"✅ Saved season simulation to {output_dir}/")
+    return summary, wins_dist
+
+
+if __name__ == "__main__":
+    try:
+        n_sims = int(input("Number of simulations (e.g. 100000): ") or 100_000)
+    except ValueError:
+        print("❌ Invalid input. Please enter a whole number.")
+    else:
+        simulate_season(n_sims, workers=None)
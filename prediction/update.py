@@ -1,135 +1,118 @@
 import pandas as pd
+import numpy as np
 import requests
-from bs4 import BeautifulSoup
-from io import StringIO
-import time
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import page_cache
+import calibration
+from game_summaries import parse_game_summaries
+import active_store
 
 # Parameters
-ACTIVE_FILE = "nfl_elo_active.csv"
 HOME_FIELD_ADV = 65
+ALPHA = 0.3         # scaling factor for the number-of-scores multiplier
+MULT_CAP = 1.75     # largest score multiplier
+SURPRISE_CAP = 3.0  # largest surprise factor
+SWING_CAP = 50      # largest rating change from one game
 
-# === Elo functions ===
-def expected_score(rating_a, rating_b, home_adv=0, is_home=True):
-    if is_home:
-        ra = rating_a + home_adv
-        rb = rating_b
-    else:
-        ra = rating_a
-        rb = rating_b + home_adv
-    return 1 / (1 + 10 ** ((rb - ra) / 400))
+# === Scrape results from PFR ===
+WEEK_URL = "https://www.pro-football-reference.com/years/{year}/week_{week}.htm"
 
 
-def score_multiplier(score_diff, alpha=0.3, cap=1.75):
-    n_scores = min(score_diff / 7, 3.5)
-    if n_scores < 1:
-        n_scores = 1
-    return min(1 + alpha * (n_scores - 1), cap)
+def final_results(html, verbose=False):
+    """(home, home_score, away, away_score, date) for every game on a week page
+       that has a final score."""
+    results = []
+    for date, away_team, away_score, home_team, home_score in parse_game_summaries(html):
+        if away_score is None or home_score is None:
+            if verbose:
+                print(f"⚠️ Skipping {away_team} at {home_team} — no final score yet.")
+            continue
+        results.append((home_team, home_score, away_team, away_score, date))
+    return results
 
 
-def surprise_factor(expected, cap=3.0):
-    val = 2.2 / (0.001 + (expected * (1 - expected)))
-    return min(val, cap)
+def scrape_week_results(year, week):
+    url = WEEK_URL.format(year=year, week=week)
+    print(f"Scraping results for Week {week}...")
 
+    def fetch():
+        resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
+        resp.raise_for_status()
+        return resp.text
 
-def update_elo(rating_a, rating_b, score_a, score_b, is_home_a, k_factor=20):
-    exp_a = expected_score(rating_a, rating_b, HOME_FIELD_ADV, is_home_a)
+    html = page_cache.get_page(url, fetch)
+    return final_results(html, verbose=True)
 
-    if score_a > score_b:
-        s_a, s_b = 1, 0
-    elif score_a < score_b:
-        s_a, s_b = 0, 1
-    else:
-        s_a, s_b = 0.5, 0.5
 
-    diff = abs(score_a - score_b)
-    mult = score_multiplier(diff)
-    adj = surprise_factor(exp_a)
+def update_elo_batch(home_elo, away_elo, home_score, away_score, k_factor=20):
+    """Elo update for a whole week of games at once (arrays, home team first)."""
+    exp_home = 1 / (1 + 10 ** ((away_elo - (home_elo + HOME_FIELD_ADV)) / 400))
+    s_home = np.where(home_score > away_score, 1.0, np.where(home_score < away_score, 0.0, 0.5))
 
-    change_a = k_factor * mult * adj * (s_a - exp_a)
-    if abs(change_a) > 50:  # cap swings
-        change_a = max(min(change_a, 50), -50)
-    change_b = -change_a
+    n_scores = np.maximum(np.minimum(np.abs(home_score - away_score) / 7, 3.5), 1)
+    mult = np.minimum(1 + ALPHA * (n_scores - 1), MULT_CAP)
+    adj = np.minimum(2.2 / (0.001 + (exp_home * (1 - exp_home))), SURPRISE_CAP)
 
-    return rating_a + change_a, rating_b + change_b, exp_a
+    change = np.clip(k_factor * mult * adj * (s_home - exp_home), -SWING_CAP, SWING_CAP)  # cap swings
+    return home_elo + change, away_elo - change, exp_home
 
 
-# === Scrape results from PFR ===
-def scrape_week_results(year, week):
-    url = f"https://www.pro-football-reference.com/years/{year}/week_{week}.htm"
-    print(f"Scraping results for Week {week}...")
-    resp = requests.get(url, headers={"User-Agent": "Mozilla/5.0"})
-    resp.raise_for_status()
-    soup = BeautifulSoup(resp.text, "html.parser")
-
-    game_blocks = soup.find_all("div", class_="game_summaries")
-    results = []
-
-    for block in game_blocks:
-        tables = [t for t in block.find_all("table") if "stats" not in t.get("class", [])]
-        for table in tables:
-            df = pd.read_html(StringIO(str(table)))[0]
+def apply_results(df_week, results, year, week):
+    """Join a week's results to its active rows by team and update every new game
+       in one batch. Returns (rows to write, applied games, skipped games)."""
+    games = pd.DataFrame(results, columns=["home", "home_score", "away", "away_score", "date"])
+    rows = df_week.drop_duplicates(subset="team", keep="last").set_index("team")
 
-            date = df.iloc[0, 0]
-            away_team = df.iloc[1, 0]
-            home_team = df.iloc[2, 0]
+    games["home_elo"] = games["home"].map(rows["elo_before"]).astype(float)
+    games["away_elo"] = games["away"].map(rows["elo_before"]).astype(float)
+    done = games["home"].map(rows["type"]).eq("game") | games["away"].map(rows["type"]).eq("game")
+    missing = games["home_elo"].isna() | games["away_elo"].isna()
 
-            # Safely parse scores
-            try:
-                away_score = int(df.iloc[1, 1])
-                home_score = int(df.iloc[2, 1])
-            except (ValueError, TypeError):
-                print(f"⚠️ Skipping {away_team} at {home_team} — no final score yet.")
-                continue
+    skipped = games[done | missing].assign(reason=np.where(done[done | missing], "already updated",
+                                                           "no prediction row"))
+    games = games[~(done | missing)]
 
-            results.append((home_team, home_score, away_team, away_score, date))
-            time.sleep(2)
+    new_home, new_away, exp_home = update_elo_batch(games["home_elo"].to_numpy(), games["away_elo"].to_numpy(),
+                                                    games["home_score"].to_numpy(), games["away_score"].to_numpy())
+    games = games.assign(new_home=new_home, new_away=new_away, exp_home=exp_home)
+    margin = np.sign(games["home_score"] - games["away_score"])
+    result = {1: "W", -1: "L", 0: "T"}
 
-    return results
+    updates = pd.concat([
+        pd.DataFrame({"team": games["home"], "elo_after": games["new_home"], "result": margin.map(result)}),
+        pd.DataFrame({"team": games["away"], "elo_after": games["new_away"], "result": (-margin).map(result)}),
+    ], ignore_index=True).assign(year=year, week=week, type="game")
+    return updates, games, skipped
 
 
 def update_week(year=2025, week=1):
-    df_active = pd.read_csv(ACTIVE_FILE)
-    results = scrape_week_results(year, week)
-
-    for home, hs, away, as_, date in results:
-        # Check if already updated
-        already_done = df_active[
-            (df_active["year"] == year) &
-            (df_active["week"] == week) &
-            (df_active["team"] == home) &
-            (df_active["type"] == "game")
-        ]
-        if not already_done.empty:
-            print(f"Skipping {home} vs {away}, already updated.")
-            continue
-
-        # Get Elo before game from predictions
-        latest_home = df_active[(df_active["year"] == year) & (df_active["week"] == week) & (df_active["team"] == home)]["elo_before"].iloc[0]
-        latest_away = df_active[(df_active["year"] == year) & (df_active["week"] == week) & (df_active["team"] == away)]["elo_before"].iloc[0]
-
-        # Update Elo
-        new_home, new_away, exp_home = update_elo(latest_home, latest_away, hs, as_, True)
+    return apply_week_results(year, week, scrape_week_results(year, week))
 
-        # Update prediction rows in place
-        df_active.loc[(df_active["year"] == year) & (df_active["week"] == week) & (df_active["team"] == home),
-                      ["elo_after", "type", "result"]] = [
-                          new_home,
-                          "game",
-                          "W" if hs > as_ else ("L" if hs < as_ else "T")
-                      ]
 
-        df_active.loc[(df_active["year"] == year) & (df_active["week"] == week) & (df_active["team"] == away),
-                      ["elo_after", "type", "result"]] = [
-                          new_away,
-                          "game",
-                          "W" if as_ > hs else ("L" if as_ < hs else "T")
-                      ]
+def apply_week_results(year, week, results):
+    """Write any not-yet-applied results for the week to the active store."""
+    # Only this week's rows are read and written, under the store's write lock
+    conn = active_store.connect()
+    with active_store.transaction(conn):
+        df_week = active_store.read_rows(conn, year, week)
+        updates, applied, skipped = apply_results(df_week, results, year, week)
+        active_store.upsert_rows(conn, updates, ["elo_after", "type", "result"])
 
-        print(f"{home} {hs} - {as_} {away} | New Elo: {home} {new_home:.1f}, {away} {new_away:.1f}")
+    # Live reliability bins: each game's pre-game home win chance against the result
+    if len(applied):
+        margin = np.sign(applied["home_score"] - applied["away_score"]).to_numpy(dtype=float)
+        calibration.record_results(applied["exp_home"], (margin + 1) / 2)
 
-    # Always save back to CSV
-    df_active.to_csv(ACTIVE_FILE, index=False)
-    print(f"✅ Week {week} results updated in {ACTIVE_FILE}")
+    for g in applied.itertuples():
+        print(f"{g.home} {g.home_score} - {g.away_score} {g.away} | "
+              f"New Elo: {g.home} {g.new_home:.1f}, {g.away} {g.new_away:.1f}")
+    for g in skipped.itertuples():
+        print(f"Skipping {g.home} vs {g.away}, {g.reason}.")
+    print(f"✅ Week {week}: {len(applied)} games applied, {len(skipped)} skipped in {active_store.DB_FILE}")
+    return applied, skipped
 
 
 if __name__ == "__main__":
@@ -139,3 +122,4 @@ if __name__ == "__main__":
         print("❌ Invalid input. Please enter a valid week number.")
     else:
         update_week(2025, week)
+        active_store.export_csv(active_store.connect())
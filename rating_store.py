@@ -0,0 +1,199 @@
+import json
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Binary Elo history (.ratings): fixed-width records grouped by team, with an
+# offset index, so a reader memory-maps the file and slices one team's timeline
+# or one season without parsing the rest.
+#   [magic 8 bytes][header length uint64][json header][index][records]
+# The header holds the record dtype, the team and category lists and the seasons;
+# the index is an int64 (teams x seasons + 1) array of record offsets, so team t's
+# records for season s are records[index[t, s]:index[t, s + 1]] and its whole
+# timeline records[index[t, 0]:index[t, -1]]. Inside a team, records keep the
+# history's order (chronological); the _row field puts a full read back in file order.
+# Columns are stored as they are in the history: numbers and bools at their own
+# width (ratings stay float64), team as an int32 code, text with up to MAX_CATEGORIES
+# values (type, date) as int16 codes, other text (id) as fixed-width bytes.
+MAGIC = b"NFLELO\x00\x01"
+FORMAT_VERSION = 1
+ALIGN = 8
+MAX_CATEGORIES = 4096  # text columns with more distinct values (id) are stored as bytes
+
+
+def is_rating_store(path):
+    return str(path).endswith(".ratings")
+
+
+def store_path(csv_path):
+    return os.path.splitext(csv_path)[0] + ".ratings"
+
+
+def _pad(n):
+    return -n % ALIGN
+
+
+def write_history(df, path):
+    """Save an Elo history DataFrame (one row per team per game/regression) as a .ratings file."""
+    team_codes, teams = pd.factorize(df["team"], sort=True)
+    years = np.sort(df["year"].unique())
+    year_codes = np.searchsorted(years, df["year"].to_numpy())
+    order = np.lexsort((np.arange(len(df)), year_codes, team_codes))  # by team, season, then history order
+
+    fields, columns = [("_row", np.int64)], {}
+    categories = {}
+    for col in df.columns:
+        series = df[col]
+        if col == "team":
+            fields.append((col, np.int32))
+            columns[col] = team_codes
+        elif pd.api.types.is_bool_dtype(series) or pd.api.types.is_numeric_dtype(series):
+            fields.append((col, series.dtype.str))
+            columns[col] = series.to_numpy()
+        elif series.nunique() <= MAX_CATEGORIES:
+            codes, values = pd.factorize(series, sort=True)  # missing -> -1
+            fields.append((col, np.int16))
+            columns[col] = codes
+            categories[col] = [str(v) for v in values]
+        else:
+            text = series.fillna("").astype(str).str.encode("utf-8")
+            fields.append((col, f"S{max(1, int(text.str.len().max() or 1))}"))
+            columns[col] = text.to_numpy()
+
+    dtype = np.dtype(fields)
+    records = np.empty(len(df), dtype=dtype)
+    records["_row"] = np.arange(len(df))
+    for col, values in columns.items():
+        records[col] = values
+    records = records[order]
+
+    # index[t, s] = first record of team t in season s (or where it would start)
+    counts = np.zeros((len(teams), len(years)), dtype=np.int64)
+    np.add.at(counts, (team_codes, year_codes), 1)
+    index = np.concatenate([[0], np.cumsum(counts)])[:-1].reshape(counts.shape)
+    index = np.column_stack([index, index[:, -1] + counts[:, -1]]) if len(years) else np.zeros((len(teams), 1))
+
+    header = {
+        "version": FORMAT_VERSION,
+        "columns": [str(c) for c in df.columns],
+        "dtype": [[name, dtype.fields[name][0].str] for name in dtype.names],
+        "rows": len(df),
+        "teams": [str(t) for t in teams],
+        "years": [int(y) for y in years],
+        "categories": categories,
+    }
+    body = json.dumps(header).encode()
+    body += b" " * _pad(len(MAGIC) + 8 + len(body))
+
+    tmp = path + ".tmp"
+    with open(tmp, "wb") as f:
+        f.write(MAGIC)
+        f.write(np.uint64(len(body)).tobytes())
+        f.write(body)
+        f.write(index.astype(np.int64).tobytes())
+        f.write(records.tobytes())
+    os.replace(tmp, path)
+
+
+def open_history(path):
+    """Memory-map a .ratings file. Returns {header, teams, years, index, records};
+       nothing is read until records are sliced."""
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a rating history file")
+        size = int(np.frombuffer(f.read(8), dtype=np.uint64)[0])
+        header = json.loads(f.read(size))
+    if header["version"] != FORMAT_VERSION:
+        raise ValueError(f"{path} is format version {header['version']}, expected {FORMAT_VERSION}")
+
+    n_teams, n_years = len(header["teams"]), len(header["years"])
+    index_offset = len(MAGIC) + 8 + size
+    index = np.memmap(path, dtype=np.int64, mode="r", offset=index_offset, shape=(n_teams, n_years + 1))
+    dtype = np.dtype([(name, code) for name, code in header["dtype"]])
+    data_offset = index_offset + index.nbytes
+    records = (np.memmap(path, dtype=dtype, mode="r", offset=data_offset, shape=(header["rows"],))
+               if header["rows"] else np.empty(0, dtype=dtype))
+    return {"header": header, "teams": header["teams"], "years": header["years"],
+            "index": index, "records": records}
+
+
+def team_records(history, team, years=None):
+    """One team's records (a view of the mapped file), for every season or the given ones."""
+    if team not in history["teams"]:
+        return history["records"][:0]
+    t = history["teams"].index(team)
+    if years is None:
+        return history["records"][history["index"][t, 0]:history["index"][t, -1]]
+    return np.concatenate([history["records"][history["index"][t, s]:history["index"][t, s + 1]]
+                           for s in _season_positions(history, years)] or [history["records"][:0]])
+
+
+def season_records(history, year):
+    """Every team's records for one season (one slice per team)."""
+    return select(history, years=[year])
+
+
+def _season_positions(history, years):
+    return [history["years"].index(int(y)) for y in years if int(y) in history["years"]]
+
+
+def select(history, teams=None, years=None):
+    """Records for the given teams and seasons (all when None), grouped by team;
+       to_frame puts them back in history order."""
+    if teams is None and years is None:
+        return history["records"]
+    team_ids = range(len(history["teams"])) if teams is None else \
+        [history["teams"].index(t) for t in teams if t in history["teams"]]
+    seasons = range(len(history["years"])) if years is None else _season_positions(history, years)
+    index = history["index"]
+    parts = [history["records"][index[t, s]:index[t, s + 1]] for t in team_ids for s in seasons]
+    return np.concatenate(parts) if parts else history["records"][:0]
+
+
+def to_frame(history, records, columns=None):
+    """Records -> DataFrame in history order with the history's columns (or the given ones)."""
+    header = history["header"]
+    columns = [c for c in header["columns"] if columns is None or c in columns]
+    order = np.argsort(records["_row"], kind="stable")  # only the columns read are reordered
+    data = {}
+    for col in columns:
+        values = records[col][order]
+        if col == "team":
+            data[col] = np.array(header["teams"], dtype=object)[values] if len(values) else np.empty(0, dtype=object)
+        elif col in header["categories"]:
+            labels = np.array(header["categories"][col] + [np.nan], dtype=object)
+            data[col] = labels[values]  # code -1 is the trailing NaN
+        elif values.dtype.kind == "S":
+            try:
+                text = values.astype(f"U{values.dtype.itemsize}").astype(object)  # fast path, ascii
+            except UnicodeDecodeError:
+                text = np.char.decode(values, "utf-8").astype(object)
+            text[text == ""] = np.nan
+            data[col] = text
+        else:
+            data[col] = np.asarray(values)
+    return pd.DataFrame(data, columns=columns)
+
+
+def read_table(path, columns=None, teams=None, years=None):
+    """The history (or some teams / seasons of it) as a DataFrame."""
+    history = open_history(path)
+    return to_frame(history, select(history, teams, years), columns)
+
+
+def convert(csv_path, out_path=None):
+    """Elo history csv -> .ratings next to it. Returns the new path."""
+    out_path = out_path or store_path(csv_path)
+    write_history(pd.read_csv(csv_path), out_path)
+    return out_path
+
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or ["nfl_elo_history_2018_2024.csv"]
+    for path in paths:
+        out = convert(path)
+        history = open_history(out)
+        print(f"✅ {path} -> {out} ({history['header']['rows']} records, "
+              f"{len(history['teams'])} teams, {len(history['years'])} seasons)")
@@ -0,0 +1,111 @@
+import hashlib
+import json
+import os
+from multiprocessing import Pool
+
+import matplotlib
+matplotlib.use("Agg")  # no display needed; also safe inside worker processes
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+
+# Shared figure rendering for the plotting scripts.
+# A job is a dict:
+#   path     output png
+#   draw     module-level function draw(**data, **style) that returns a matplotlib figure
+#   data     {name: DataFrame} passed to draw (the slice this figure depends on)
+#   style    extra keyword arguments for draw (titles, reference lines, ...)
+#   savefig  keyword arguments for fig.savefig (dpi, bbox_inches, ...)
+# Each output directory keeps a .render_manifest.json of png -> hash of the job; a
+# job whose hash (data, style, savefig and the draw function's code) matches the
+# last render and whose png still exists is skipped.
+MANIFEST = ".render_manifest.json"
+MAX_POINTS = 2000  # longer series are downsampled before plotting
+
+
+def downsample(df, y, max_points=MAX_POINTS):
+    """Keep at most max_points rows of a series, preserving the min and max of
+       `y` in each bucket so peaks and troughs survive."""
+    if len(df) <= max_points:
+        return df
+    buckets = np.arange(len(df)) * (max_points // 2) // len(df)
+    values = df[y].to_numpy()
+    keep = set()
+    for bucket in np.unique(buckets):
+        rows = np.flatnonzero(buckets == bucket)
+        keep.add(rows[np.nanargmin(values[rows])])
+        keep.add(rows[np.nanargmax(values[rows])])
+    return df.iloc[sorted(keep)]
+
+
+def _code_fingerprint(code, h):
+    """Feed a function's bytecode, names and constants (nested code included) to h."""
+    h.update(code.co_code)
+    h.update(repr(code.co_names).encode())
+    for const in code.co_consts:
+        if hasattr(const, "co_code"):
+            _code_fingerprint(const, h)
+        else:
+            h.update(repr(const).encode())
+
+
+def job_hash(job):
+    h = hashlib.sha256()
+    _code_fingerprint(job["draw"].__code__, h)
+    for name in sorted(job["data"]):
+        frame = job["data"][name]
+        h.update(name.encode())
+        h.update(json.dumps(list(map(str, frame.columns))).encode())
+        h.update(pd.util.hash_pandas_object(frame, index=False).to_numpy().tobytes())
+    h.update(json.dumps(job.get("style", {}), sort_keys=True, default=str).encode())
+    h.update(json.dumps(job.get("savefig", {}), sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+
+def _load_manifest(output_dir):
+    path = os.path.join(output_dir, MANIFEST)
+    if os.path.exists(path):
+        with open(path) as f:
+            return json.load(f)
+    return {}
+
+
+def _render(job):
+    fig = job["draw"](**job["data"], **job.get("style", {}))
+    fig.savefig(job["path"], **job.get("savefig", {}))
+    plt.close(fig)
+    return job["path"]
+
+
+def render_figures(jobs, workers=None, force=False):
+    """Render every job whose inputs changed since its last render, spread over
+       a process pool (workers=None uses every core). Returns (rendered, skipped)."""
+    manifests = {}
+    todo, hashes, skipped = [], {}, 0
+    for job in jobs:
+        output_dir = os.path.dirname(job["path"]) or "."
+        os.makedirs(output_dir, exist_ok=True)
+        manifest = manifests.setdefault(output_dir, _load_manifest(output_dir))
+        name = os.path.basename(job["path"])
+        digest = job_hash(job)
+        if not force and manifest.get(name) == digest and os.path.exists(job["path"]):
+            skipped += 1
+            continue
+        hashes[job["path"]] = digest
+        todo.append(job)
+
+    workers = min(workers or os.cpu_count() or 1, len(todo))
+    if workers > 1:
+        with Pool(workers) as pool:
+            done = pool.map(_render, todo, chunksize=1)
+    else:
+        done = [_render(job) for job in todo]
+
+    for path in done:
+        output_dir = os.path.dirname(path) or "."
+        manifests[output_dir][os.path.basename(path)] = hashes[path]
+    for output_dir, manifest in manifests.items():
+        with open(os.path.join(output_dir, MANIFEST), "w") as f:
+            json.dump(manifest, f, indent=1, sort_keys=True)
+
+    return len(done), skipped
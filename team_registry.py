@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+# Canonical team registry. Every team has a small, stable integer id (its position
+# below, grouped by division) and every spelling the data sources use resolves to it:
+# full names, teamrankings city names, abbreviations and old franchise names.
+# Append new teams at the end so existing ids never change.
+TEAMS = [
+    # (name, city name on teamrankings, abbreviation, division)
+    ("Buffalo Bills", "Buffalo", "BUF", "AFC East"),
+    ("Miami Dolphins", "Miami", "MIA", "AFC East"),
+    ("New England Patriots", "New England", "NE", "AFC East"),
+    ("New York Jets", "NY Jets", "NYJ", "AFC East"),
+    ("Baltimore Ravens", "Baltimore", "BAL", "AFC North"),
+    ("Cincinnati Bengals", "Cincinnati", "CIN", "AFC North"),
+    ("Cleveland Browns", "Cleveland", "CLE", "AFC North"),
+    ("Pittsburgh Steelers", "Pittsburgh", "PIT", "AFC North"),
+    ("Houston Texans", "Houston", "HOU", "AFC South"),
+    ("Indianapolis Colts", "Indianapolis", "IND", "AFC South"),
+    ("Jacksonville Jaguars", "Jacksonville", "JAX", "AFC South"),
+    ("Tennessee Titans", "Tennessee", "TEN", "AFC South"),
+    ("Denver Broncos", "Denver", "DEN", "AFC West"),
+    ("Kansas City Chiefs", "Kansas City", "KC", "AFC West"),
+    ("Las Vegas Raiders", "Las Vegas", "LV", "AFC West"),
+    ("Los Angeles Chargers", "LA Chargers", "LAC", "AFC West"),
+    ("Dallas Cowboys", "Dallas", "DAL", "NFC East"),
+    ("New York Giants", "NY Giants", "NYG", "NFC East"),
+    ("Philadelphia Eagles", "Philadelphia", "PHI", "NFC East"),
+    ("Washington Commanders", "Washington", "WAS", "NFC East"),
+    ("Chicago Bears", "Chicago", "CHI", "NFC North"),
+    ("Detroit Lions", "Detroit", "DET", "NFC North"),
+    ("Green Bay Packers", "Green Bay", "GB", "NFC North"),
+    ("Minnesota Vikings", "Minnesota", "MIN", "NFC North"),
+    ("Atlanta Falcons", "Atlanta", "ATL", "NFC South"),
+    ("Carolina Panthers", "Carolina", "CAR", "NFC South"),
+    ("New Orleans Saints", "New Orleans", "NO", "NFC South"),
+    ("Tampa Bay Buccaneers", "Tampa Bay", "TB", "NFC South"),
+    ("Arizona Cardinals", "Arizona", "ARI", "NFC West"),
+    ("Los Angeles Rams", "LA Rams", "LAR", "NFC West"),
+    ("San Francisco 49ers", "San Francisco", "SF", "NFC West"),
+    ("Seattle Seahawks", "Seattle", "SEA", "NFC West"),
+]
+
+# Names the game files rename to the current one (name.normalize_team_names)
+RENAMES = {
+    "Washington Football Team": "Washington Commanders",
+    "Washington Redskins": "Washington Commanders",
+    "Oakland Raiders": "Las Vegas Raiders",
+}
+
+# Other spellings of the same franchise. Relocated teams keep their own name in the
+# game files (calc_elo rates them separately) but resolve to the franchise id here.
+ALIASES = {
+    **RENAMES,
+    "San Diego Chargers": "Los Angeles Chargers",
+    "St. Louis Rams": "Los Angeles Rams",
+    "OAK": "Las Vegas Raiders",
+    "SD": "Los Angeles Chargers",
+    "STL": "Los Angeles Rams",
+    "LA": "Los Angeles Rams",
+    "JAC": "Jacksonville Jaguars",
+    "WSH": "Washington Commanders",
+}
+
+NAMES = np.array([team[0] for team in TEAMS])
+CITIES = np.array([team[1] for team in TEAMS])
+ABBREVIATIONS = np.array([team[2] for team in TEAMS])
+DIVISION_OF = np.array([team[3] for team in TEAMS])
+DIVISIONS = {division: [name for name, _, _, d in TEAMS if d == division]
+             for division in dict.fromkeys(DIVISION_OF.tolist())}
+N_TEAMS = len(TEAMS)
+
+
+def _key(name):
+    return " ".join(str(name).split()).lower()
+
+
+_IDS = {}
+for _id, (_name, _city, _abbr, _) in enumerate(TEAMS):
+    for _alias in (_name, _city, _abbr):
+        _IDS[_key(_alias)] = _id
+for _alias, _name in ALIASES.items():
+    _IDS[_key(_alias)] = _IDS[_key(_name)]
+
+
+def team_id(name):
+    """Id for any known spelling of a team (KeyError if unknown)."""
+    try:
+        return _IDS[_key(name)]
+    except KeyError:
+        raise KeyError(f"Unknown team {name!r}") from None
+
+
+def to_ids(names, strict=True):
+    """Vectorized name -> id (int16 array). Each distinct spelling is looked up
+       once, so this costs about the same as factorizing the column. Unknown
+       names raise ValueError, or become -1 with strict=False."""
+    codes, uniques = pd.factorize(np.asarray(names, dtype=object), use_na_sentinel=False)
+    lookup = np.array([_IDS.get(_key(u), -1) for u in uniques], dtype=np.int16)
+    if strict and (lookup < 0).any():
+        raise ValueError(f"Unknown teams: {sorted(map(str, uniques[lookup < 0]))}")
+    return lookup[codes] if len(codes) else np.empty(0, dtype=np.int16)
+
+
+def to_names(ids):
+    """Vectorized id -> canonical (current) name."""
+    return NAMES[np.asarray(ids)]
+
+
+def canonical_name(name):
+    return str(NAMES[team_id(name)])
+
+
+def city_name(name):
+    """Short form used in the teamrankings tables (team_strength_scores.csv)."""
+    return str(CITIES[team_id(name)])
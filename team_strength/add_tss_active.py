@@ -1,5 +1,13 @@
 import pandas as pd
+import numpy as np
 import math
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "prediction"))
+import team_registry
+import active_store
 
 # scaling constant (like Elo's 400)
 TSS_SCALE = 150  
@@ -8,122 +16,111 @@ def tss_win_prob(tss_a, tss_b):
     """Logistic function to compute win probability from TSS difference"""
     return 1 / (1 + 10 ** (-(tss_a - tss_b) / TSS_SCALE))
 
-# Explicit mapping from schedule/active team names → team_strength_scores.csv names
-TEAM_MAP = {
-    "Arizona Cardinals": "Arizona",
-    "Atlanta Falcons": "Atlanta",
-    "Baltimore Ravens": "Baltimore",
-    "Buffalo Bills": "Buffalo",
-    "Carolina Panthers": "Carolina",
-    "Chicago Bears": "Chicago",
-    "Cincinnati Bengals": "Cincinnati",
-    "Cleveland Browns": "Cleveland",
-    "Dallas Cowboys": "Dallas",
-    "Denver Broncos": "Denver",
-    "Detroit Lions": "Detroit",
-    "Green Bay Packers": "Green Bay",
-    "Houston Texans": "Houston",
-    "Indianapolis Colts": "Indianapolis",
-    "Jacksonville Jaguars": "Jacksonville",
-    "Kansas City Chiefs": "Kansas City",
-    "Las Vegas Raiders": "Las Vegas",
-    "Los Angeles Chargers": "LA Chargers",
-    "Los Angeles Rams": "LA Rams",
-    "Miami Dolphins": "Miami",
-    "Minnesota Vikings": "Minnesota",
-    "New England Patriots": "New England",
-    "New Orleans Saints": "New Orleans",
-    "New York Giants": "NY Giants",
-    "New York Jets": "NY Jets",
-    "Philadelphia Eagles": "Philadelphia",
-    "Pittsburgh Steelers": "Pittsburgh",
-    "San Francisco 49ers": "San Francisco",
-    "Seattle Seahawks": "Seattle",
-    "Tampa Bay Buccaneers": "Tampa Bay",
-    "Tennessee Titans": "Tennessee",
-    "Washington Commanders": "Washington"
-}
-
 def get_city_name(team_name: str) -> str:
     """Map full team name to the short form used in team_strength_scores.csv"""
-    return TEAM_MAP.get(team_name, team_name)
-
-def add_tss_to_active(week, 
-                      active_file="../prediction/nfl_elo_active.csv",
+    try:
+        return team_registry.city_name(team_name)
+    except KeyError:
+        return team_name
+
+def tss_edges(df_sched, df_active, df_tss):
+    """TSS win prob/edge and total edge for both teams of every scheduled game, from
+       one merge of schedule x TSS x active rows. Returns one row per game with
+       week, home, away, the two teams' TSS and Elo expected win, and the results."""
+    games = df_sched[["week", "home team", "away team"]].rename(
+        columns={"home team": "home", "away team": "away"}).reset_index(drop=True)
+    games["home_id"] = team_registry.to_ids(games["home"])
+    games["away_id"] = team_registry.to_ids(games["away"])
+
+    # TSS indexed by team id (reversed so the first row per team wins)
+    tss_by_id = np.full(team_registry.N_TEAMS, np.nan)
+    tss_ids = team_registry.to_ids(df_tss["Team"], strict=False)
+    tss_by_id[tss_ids[tss_ids >= 0][::-1]] = df_tss["TSS"].to_numpy(dtype=float)[tss_ids >= 0][::-1]
+    games["tss_home"] = tss_by_id[games["home_id"]]
+    games["tss_away"] = tss_by_id[games["away_id"]]
+
+    # Elo expected win of each team's (first) active row that week
+    exp = df_active[["week", "team", "expected_win"]].assign(
+        team_id=team_registry.to_ids(df_active["team"], strict=False))
+    exp = exp[exp["team_id"] >= 0].drop_duplicates(subset=["week", "team_id"], keep="first")
+    for side in ("home", "away"):
+        games = games.merge(exp[["week", "team_id", "expected_win"]].rename(
+            columns={"team_id": f"{side}_id", "expected_win": f"exp_{side}"}), on=["week", f"{side}_id"], how="left")
+
+    # Compute TSS win probs, edges and total edge = average of Elo edge and TSS edge
+    games["prob_home"] = tss_win_prob(games["tss_home"], games["tss_away"])
+    games["prob_away"] = 1 - games["prob_home"]
+    games["edge_home"] = games["prob_home"] - 0.5
+    games["edge_away"] = -games["edge_home"]
+    games["total_home"] = ((games["exp_home"] - 0.5) + games["edge_home"]) / 2
+    games["total_away"] = ((games["exp_away"] - 0.5) + games["edge_away"]) / 2
+    return games
+
+
+def add_tss_to_season(weeks=None,
                       tss_file="scraped_csvs_2025/team_strength_scores.csv",
                       schedule_file="../prediction/schedule.csv",
-                      output_file="../prediction/nfl_elo_active.csv"):
-    # Load files
-    df_active = pd.read_csv(active_file)
+                      year=2025):
+    """Enrich every active row of the given weeks (default: the whole schedule) with
+       the TSS columns: one read, one merge and one write for all of them."""
+    conn = active_store.connect()
     df_tss = pd.read_csv(tss_file)
     df_sched = pd.read_csv(schedule_file)
 
-    # Normalize TSS "Team"
-    df_tss["Team"] = df_tss["Team"].str.strip()
-
-    # Make sure columns exist
-    for col in ["tss_win_prob", "tss_edge", "total_edge"]:
-        if col not in df_active.columns:
-            df_active[col] = None
-
-    # Filter schedule to chosen week
-    week_sched = df_sched[df_sched["week"] == week]
-    if week_sched.empty:
-        print(f"❌ No schedule found for week {week}")
+    if weeks is not None:
+        df_sched = df_sched[df_sched["week"].isin(list(weeks))]
+    if df_sched.empty:
+        print(f"❌ No schedule found for week {', '.join(map(str, weeks or []))}")
         return
+    # Read, merge and write under the store's write lock, so Elo rows updated
+    # meanwhile are not paired with stale expected wins
+    with active_store.transaction(conn):
+        df_active = active_store.read_rows(conn, year)
+        games = tss_edges(df_sched, df_active, df_tss)
+
+        missing_tss = games["tss_home"].isna() | games["tss_away"].isna()
+        missing_exp = ~missing_tss & (games["exp_home"].isna() | games["exp_away"].isna())
+        for game in games.itertuples(index=False):
+            home, away = game.home, game.away
+            if np.isnan(game.tss_home) or np.isnan(game.tss_away):
+                print(f"⚠️ Missing TSS for {home} ({get_city_name(home)}) or {away} ({get_city_name(away)}), skipping")
+            elif np.isnan(game.exp_home) or np.isnan(game.exp_away):
+                print(f"⚠️ Missing Elo expected win for {home} or {away}, skipping")
+            else:
+                print(f"{home} vs {away}: Elo ExpWin {game.exp_home:.1%}/{game.exp_away:.1%}, "
+                      f"TSS {game.prob_home:.1%}/{game.prob_away:.1%}, "
+                      f"Total Edge {game.total_home:+.1%}/{game.total_away:+.1%}")
+
+        # Two rows per game (home, then away) with only the TSS columns
+        ok = games[~missing_tss & ~missing_exp]
+        rows = pd.concat([
+            pd.DataFrame({"year": year, "week": ok["week"], "team": ok[side],
+                          "tss_win_prob": ok[f"prob_{side}"], "tss_edge": ok[f"edge_{side}"],
+                          "total_edge": ok[f"total_{side}"], "order": 2 * np.arange(len(ok)) + i})
+            for i, side in enumerate(("home", "away"))
+        ]).sort_values("order").drop(columns="order")
+
+        # Save updates (only these weeks' TSS columns)
+        active_store.upsert_rows(conn, rows)
+    weeks_done = sorted(games["week"].unique().tolist())
+    label = f"Week {weeks_done[0]}" if len(weeks_done) == 1 else f"Weeks {weeks_done[0]}-{weeks_done[-1]}"
+    print(f"✅ Updated {active_store.DB_FILE} with TSS + total_edge data for {label}")
+    return rows
 
-    # For each game in the schedule
-    for _, game in week_sched.iterrows():
-        home = game["home team"]
-        away = game["away team"]
-
-        city_home = get_city_name(home)
-        city_away = get_city_name(away)
-
-        try:
-            tss_home = df_tss.loc[df_tss["Team"] == city_home, "TSS"].iloc[0]
-            tss_away = df_tss.loc[df_tss["Team"] == city_away, "TSS"].iloc[0]
-        except IndexError:
-            print(f"⚠️ Missing TSS for {home} ({city_home}) or {away} ({city_away}), skipping")
-            continue
 
-        # Compute TSS win probs
-        prob_home = tss_win_prob(tss_home, tss_away)
-        prob_away = 1 - prob_home
-
-        edge_home = prob_home - 0.5
-        edge_away = -edge_home
-
-        # Lookup Elo expected win from active file
-        try:
-            exp_home = df_active.loc[(df_active["year"] == 2025) & (df_active["week"] == week) & (df_active["team"] == home), "expected_win"].iloc[0]
-            exp_away = df_active.loc[(df_active["year"] == 2025) & (df_active["week"] == week) & (df_active["team"] == away), "expected_win"].iloc[0]
-        except IndexError:
-            print(f"⚠️ Missing Elo expected win for {home} or {away}, skipping")
-            continue
-
-        # Compute total edge = average of Elo edge and TSS edge
-        total_home = ((exp_home - 0.5) + edge_home) / 2
-        total_away = ((exp_away - 0.5) + edge_away) / 2
-
-        # Update active file rows
-        df_active.loc[(df_active["year"] == 2025) & (df_active["week"] == week) & (df_active["team"] == home),
-                      ["tss_win_prob", "tss_edge", "total_edge"]] = [prob_home, edge_home, total_home]
-        df_active.loc[(df_active["year"] == 2025) & (df_active["week"] == week) & (df_active["team"] == away),
-                      ["tss_win_prob", "tss_edge", "total_edge"]] = [prob_away, edge_away, total_away]
-
-        print(f"{home} vs {away}: Elo ExpWin {exp_home:.1%}/{exp_away:.1%}, "
-              f"TSS {prob_home:.1%}/{prob_away:.1%}, "
-              f"Total Edge {total_home:+.1%}/{total_away:+.1%}")
-
-    # Save updates
-    df_active.to_csv(output_file, index=False)
-    print(f"✅ Updated {output_file} with TSS + total_edge data for Week {week}")
+def add_tss_to_active(week, 
+                      tss_file="scraped_csvs_2025/team_strength_scores.csv",
+                      schedule_file="../prediction/schedule.csv",
+                      year=2025):
+    return add_tss_to_season([week], tss_file, schedule_file, year)
 
 
 if __name__ == "__main__":
+    # Only the input is checked here, so an unknown team name in the data still raises
     try:
-        week = int(input("Enter week number: "))
-        add_tss_to_active(week)
+        weeks = active_store.parse_weeks(input("Enter week number (e.g. 5, 1-18 or all): "))
     except ValueError:
         print("❌ Invalid input. Please enter a week number.")
+    else:
+        add_tss_to_season(weeks)
+        active_store.export_csv(active_store.connect())
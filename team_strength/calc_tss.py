@@ -1,9 +1,19 @@
 # calc_tss.py
 import pandas as pd
+import numpy as np
 import os
+import re
+import sys
+import warnings
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import team_registry
+import stat_warehouse
 
 YEAR_COL = "2025"
 FOLDER = "./scraped_csvs_2025"   # folder where CSVs are stored
+# Weekly OSS/DSS/TSS of every warehouse snapshot (Season, Snapshot, Team, ...)
+HISTORY_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tss_history.csv")
 
 # =======================
 # Weights
@@ -38,163 +48,277 @@ dss_weights = {
     "opponent_fourth_downs_per_game": 0.6,
 }
 
+# Stat columns (file names without .csv) in matrix order
+OSS_FILES = [
+    "average_team_passer_rating.csv",
+    "rushing_yards_per_game.csv",
+    "fourth_downs_per_game.csv",
+    "qb_sacked_per_game.csv",
+    "third_down_conversion_percentage.csv",
+    "interceptions_thrown_per_game.csv",
+    "rushing_first_downs_per_game.csv",
+    "yards_per_game.csv",
+    "passing_touchdowns_per_game.csv",
+    "rushing_touchdowns_per_game.csv"
+]
+DSS_FILES = [
+    "qb_sacked_per_game.csv",
+    "opponent_interceptions_thrown_per_game.csv",
+    "opponent_fumbles_per_game.csv",
+    "opponent_touchdowns_per_game.csv",
+    "opponent_yards_per_game.csv",
+    "opponent_red_zone_scoring_percentage_td_only.csv",
+    "opponent_fourth_downs_per_game.csv"
+]
+OSS_STATS = [os.path.splitext(f)[0] for f in OSS_FILES]
+DSS_STATS = [os.path.splitext(f)[0] for f in DSS_FILES]
+ALL_STATS = list(dict.fromkeys(OSS_STATS + DSS_STATS))
+SCORE_COLUMNS = ["RawOSS", "Disruption", "Resilience", "RawDSS", "TSS"]
+
+# Identity thresholds on (passing TDs + 1) / (rushing yards + 1)
+PASS_BIAS = 1.2
+RUN_BIAS = 0.8
+
+
+def weight_vector(stats, weights):
+    """Weights dict -> vector over `stats` (0 for stats not in the dict)."""
+    return np.array([weights.get(stat, 0.0) for stat in stats])
+
+
+OSS_BASELINE = weight_vector(OSS_STATS, {k: oss_weights[k] for k in
+                                         ["third_down_conversion_percentage", "yards_per_game", "fourth_downs_per_game"]})
+OSS_PASS = weight_vector(OSS_STATS, {k: oss_weights[k] for k in
+                                     ["passing_touchdowns_per_game", "average_team_passer_rating",
+                                      "interceptions_thrown_per_game", "qb_sacked_per_game", "rushing_touchdowns_per_game"]})
+OSS_RUN = weight_vector(OSS_STATS, {
+    "rushing_yards_per_game": oss_weights["rushing_yards_per_game"],
+    "rushing_first_downs_per_game": oss_weights["rushing_first_downs_per_game"],
+    "rushing_touchdowns_per_game": oss_weights["rushing_touchdowns_per_game_run"],
+    "passing_touchdowns_per_game": oss_weights["passing_touchdowns_per_game_run"],
+    "interceptions_thrown_per_game": oss_weights["interceptions_thrown_per_game"],
+})
+# takeaways bonus = half the weight on the average of INT and fumble z-scores
+DSS_DISRUPTION = weight_vector(DSS_STATS, {
+    "qb_sacked_per_game": dss_weights["qb_sacked_per_game"],
+    "opponent_interceptions_thrown_per_game":
+        dss_weights["opponent_interceptions_thrown_per_game"] + dss_weights["takeaways_bonus"] / 2,
+    "opponent_fumbles_per_game": dss_weights["opponent_fumbles_per_game"] + dss_weights["takeaways_bonus"] / 2,
+})
+DSS_RESILIENCE = weight_vector(DSS_STATS, {k: dss_weights[k] for k in
+                                           ["opponent_touchdowns_per_game", "opponent_yards_per_game",
+                                            "opponent_red_zone_scoring_percentage_td_only",
+                                            "opponent_fourth_downs_per_game"]})
+
 # =======================
 # Helper: Load & Merge CSVs
 # =======================
 
-def load_csvs(file_list, folder=FOLDER):
+def year_columns(df):
+    return [col for col in df.columns if re.fullmatch(r"\d{4}", str(col))]
+
+
+def load_csvs(file_list, folder=FOLDER, years=None):
+    """Merge the stat tables on Team. Returns (teams, years, values) where values is
+       a years x teams x stats array over every year column (or just `years`)."""
     dfs = []
     for file in file_list:
-        path = os.path.join(folder, file)
-        df = pd.read_csv(path)
+        df = pd.read_csv(os.path.join(folder, file))
         stat_name = os.path.splitext(file)[0]
-        df = df[["Team", YEAR_COL]].rename(columns={YEAR_COL: stat_name})
+        file_years = years or year_columns(df)
+        df = df[["Team"] + file_years].rename(columns={y: f"{stat_name} {y}" for y in file_years})
         dfs.append(df)
     data = dfs[0]
     for df in dfs[1:]:
         data = data.merge(df, on="Team")
-    return data
 
-def normalize(df):
-    for col in df.columns:
-        if col != "Team":
-            mean = df[col].mean()
-            std = df[col].std()
-            df[col + "_norm"] = (df[col] - mean) / std
-    return df
+    stats = [os.path.splitext(f)[0] for f in file_list]
+    years = years or sorted({col.rsplit(" ", 1)[1] for col in data.columns[1:]}, reverse=True)
+    missing = np.full(len(data), np.nan)
+    values = np.stack([
+        np.column_stack([data[f"{stat} {year}"].to_numpy(dtype=float) if f"{stat} {year}" in data else missing
+                         for stat in stats])
+        for year in years
+    ])
+    return data["Team"].to_numpy(), years, values
+
+
+def normalize(values):
+    """Z-score each stat across teams (sample std, like pandas), per year."""
+    mean = np.nanmean(values, axis=-2, keepdims=True)
+    std = np.nanstd(values, axis=-2, ddof=1, keepdims=True)
+    return (values - mean) / std
 
 # =======================
 # Offensive Strength Score
 # =======================
 
+def oss_scores(raw, z):
+    """RawOSS for every team (and year) from raw and z-scored OSS stat matrices."""
+    # Identity proxy (no attempts CSVs available)
+    identity_ratio = ((raw[..., OSS_STATS.index("passing_touchdowns_per_game")] + 1) /
+                      (raw[..., OSS_STATS.index("rushing_yards_per_game")] + 1))
+
+    baseline = z @ OSS_BASELINE
+    prod_pass = z @ OSS_PASS
+    prod_run = z @ OSS_RUN
+    production = np.where(identity_ratio > PASS_BIAS, prod_pass,           # pass-leaning
+                          np.where(identity_ratio < RUN_BIAS, prod_run,     # run-leaning
+                                   0.5 * (prod_pass + prod_run)))            # balanced
+    return baseline + production
+
+
 def calc_oss(data):
-    oss_scores = []
-    for _, row in data.iterrows():
-        team = row["Team"]
-
-        # Identity proxy (no attempts CSVs available)
-        pass_bias_indicator = row["passing_touchdowns_per_game"]
-        run_bias_indicator = row["rushing_yards_per_game"]
-        identity_ratio = (pass_bias_indicator + 1) / (run_bias_indicator + 1)
-
-        baseline = (
-            oss_weights["third_down_conversion_percentage"] * row["third_down_conversion_percentage_norm"] +
-            oss_weights["yards_per_game"] * row["yards_per_game_norm"] +
-            oss_weights["fourth_downs_per_game"] * row["fourth_downs_per_game_norm"]
-        )
-
-        if identity_ratio > 1.2:  # pass-leaning
-            production = (
-                oss_weights["passing_touchdowns_per_game"] * row["passing_touchdowns_per_game_norm"] +
-                oss_weights["average_team_passer_rating"] * row["average_team_passer_rating_norm"] +
-                oss_weights["interceptions_thrown_per_game"] * row["interceptions_thrown_per_game_norm"] +
-                oss_weights["qb_sacked_per_game"] * row["qb_sacked_per_game_norm"] +
-                oss_weights["rushing_touchdowns_per_game"] * row["rushing_touchdowns_per_game_norm"]
-            )
-        elif identity_ratio < 0.8:  # run-leaning
-            production = (
-                oss_weights["rushing_yards_per_game"] * row["rushing_yards_per_game_norm"] +
-                oss_weights["rushing_first_downs_per_game"] * row["rushing_first_downs_per_game_norm"] +
-                oss_weights["rushing_touchdowns_per_game_run"] * row["rushing_touchdowns_per_game_norm"] +
-                oss_weights["passing_touchdowns_per_game_run"] * row["passing_touchdowns_per_game_norm"] +
-                oss_weights["interceptions_thrown_per_game"] * row["interceptions_thrown_per_game_norm"]
-            )
-        else:  # balanced
-            prod_pass = (
-                oss_weights["passing_touchdowns_per_game"] * row["passing_touchdowns_per_game_norm"] +
-                oss_weights["average_team_passer_rating"] * row["average_team_passer_rating_norm"] +
-                oss_weights["interceptions_thrown_per_game"] * row["interceptions_thrown_per_game_norm"] +
-                oss_weights["qb_sacked_per_game"] * row["qb_sacked_per_game_norm"] +
-                oss_weights["rushing_touchdowns_per_game"] * row["rushing_touchdowns_per_game_norm"]
-            )
-            prod_run = (
-                oss_weights["rushing_yards_per_game"] * row["rushing_yards_per_game_norm"] +
-                oss_weights["rushing_first_downs_per_game"] * row["rushing_first_downs_per_game_norm"] +
-                oss_weights["rushing_touchdowns_per_game_run"] * row["rushing_touchdowns_per_game_norm"] +
-                oss_weights["passing_touchdowns_per_game_run"] * row["passing_touchdowns_per_game_norm"] +
-                oss_weights["interceptions_thrown_per_game"] * row["interceptions_thrown_per_game_norm"]
-            )
-            production = 0.5 * (prod_pass + prod_run)
-
-        raw_oss = baseline + production
-        oss_scores.append((team, raw_oss))
-
-    return pd.DataFrame(oss_scores, columns=["Team", "RawOSS"])
+    """RawOSS for one year's merged table (stat and stat_norm columns)."""
+    raw = data[OSS_STATS].to_numpy(dtype=float)
+    z = data[[s + "_norm" for s in OSS_STATS]].to_numpy(dtype=float)
+    return pd.DataFrame({"Team": data["Team"].to_numpy(), "RawOSS": oss_scores(raw, z)})
 
 # =======================
 # Defensive Strength Score
 # =======================
 
+def dss_scores(z):
+    """(Disruption, Resilience) for every team (and year) from z-scored DSS stats."""
+    return z @ DSS_DISRUPTION, z @ DSS_RESILIENCE
+
+
 def calc_dss(data):
-    dss_scores = []
-    for _, row in data.iterrows():
-        team = row["Team"]
-
-        disruption = (
-            dss_weights["qb_sacked_per_game"] * row["qb_sacked_per_game_norm"] +
-            dss_weights["opponent_interceptions_thrown_per_game"] * row["opponent_interceptions_thrown_per_game_norm"] +
-            dss_weights["opponent_fumbles_per_game"] * row["opponent_fumbles_per_game_norm"]
-        )
-        disruption += dss_weights["takeaways_bonus"] * (
-            row["opponent_interceptions_thrown_per_game_norm"] + row["opponent_fumbles_per_game_norm"]
-        ) / 2
-
-        resilience = (
-            dss_weights["opponent_touchdowns_per_game"] * row["opponent_touchdowns_per_game_norm"] +
-            dss_weights["opponent_yards_per_game"] * row["opponent_yards_per_game_norm"] +
-            dss_weights["opponent_red_zone_scoring_percentage_td_only"] * row["opponent_red_zone_scoring_percentage_td_only_norm"] +
-            dss_weights["opponent_fourth_downs_per_game"] * row["opponent_fourth_downs_per_game_norm"]
-        )
-
-        raw_dss = disruption + resilience
-        dss_scores.append((team, disruption, resilience, raw_dss))
-
-    return pd.DataFrame(dss_scores, columns=["Team", "Disruption", "Resilience", "RawDSS"])
+    """Disruption/Resilience/RawDSS for one year's merged table."""
+    disruption, resilience = dss_scores(data[[s + "_norm" for s in DSS_STATS]].to_numpy(dtype=float))
+    return pd.DataFrame({"Team": data["Team"].to_numpy(), "Disruption": disruption,
+                         "Resilience": resilience, "RawDSS": disruption + resilience})
 
 # =======================
 # Main Runner
 # =======================
 
-def main():
-    # Offensive files
-    oss_files = [
-        "average_team_passer_rating.csv",
-        "rushing_yards_per_game.csv",
-        "fourth_downs_per_game.csv",
-        "qb_sacked_per_game.csv",
-        "third_down_conversion_percentage.csv",
-        "interceptions_thrown_per_game.csv",
-        "rushing_first_downs_per_game.csv",
-        "yards_per_game.csv",
-        "passing_touchdowns_per_game.csv",
-        "rushing_touchdowns_per_game.csv"
-    ]
-    oss_data = load_csvs(oss_files, folder=FOLDER)
-    oss_data = normalize(oss_data)
-    oss_df = calc_oss(oss_data)
-
-    # Defensive files
-    dss_files = [
-        "qb_sacked_per_game.csv",
-        "opponent_interceptions_thrown_per_game.csv",
-        "opponent_fumbles_per_game.csv",
-        "opponent_touchdowns_per_game.csv",
-        "opponent_yards_per_game.csv",
-        "opponent_red_zone_scoring_percentage_td_only.csv",
-        "opponent_fourth_downs_per_game.csv"
-    ]
-    dss_data = load_csvs(dss_files, folder=FOLDER)
-    dss_data = normalize(dss_data)
-    dss_df = calc_dss(dss_data)
-
-    # Merge OSS + DSS
-    merged = oss_df.merge(dss_df, on="Team")
-    merged["TSS"] = merged["RawOSS"] + merged["RawDSS"]
+def score_years(folder=FOLDER, years=None):
+    """OSS/DSS/TSS for every year column in the scraped tables at once."""
+    oss_teams, years, oss_raw = load_csvs(OSS_FILES, folder, years)
+    dss_teams, dss_years, dss_raw = load_csvs(DSS_FILES, folder, years)
+    dss_raw = dss_raw[[dss_years.index(y) for y in years]]
+
+    raw_oss = oss_scores(oss_raw, normalize(oss_raw))
+    disruption, resilience = dss_scores(normalize(dss_raw))
+
+    frames = []
+    for i, year in enumerate(years):
+        oss_df = pd.DataFrame({"Team": oss_teams, "RawOSS": raw_oss[i]})
+        dss_df = pd.DataFrame({"Team": dss_teams, "Disruption": disruption[i], "Resilience": resilience[i],
+                               "RawDSS": disruption[i] + resilience[i]})
+        merged = oss_df.merge(dss_df, on="Team")
+        merged["TSS"] = merged["RawOSS"] + merged["RawDSS"]
+        frames.append(merged.assign(Year=int(year)))
+    return pd.concat(frames, ignore_index=True)
+
+
+def score_snapshots(conn, seasons=None):
+    """OSS/DSS/TSS per team for every (season, snapshot) in the stat warehouse,
+       from a single read. Teams missing a stat in a snapshot are left out."""
+    df = stat_warehouse.read_stats(conn, ALL_STATS, seasons)
+    groups = df[["season", "snapshot"]].drop_duplicates().reset_index(drop=True)
+    group_idx = df.groupby(["season", "snapshot"], sort=False).ngroup().to_numpy()
+
+    # groups x teams x stats, NaN where a team has no row
+    values = np.full((len(groups), team_registry.N_TEAMS, len(ALL_STATS)), np.nan)
+    values[group_idx, df["team_id"].to_numpy()] = df[ALL_STATS].to_numpy(dtype=float)
+    oss_raw = values[..., [ALL_STATS.index(s) for s in OSS_STATS]]
+    dss_raw = values[..., [ALL_STATS.index(s) for s in DSS_STATS]]
+
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # stats not scraped in a snapshot
+        raw_oss = oss_scores(oss_raw, normalize(oss_raw))
+        disruption, resilience = dss_scores(normalize(dss_raw))
+
+    history = pd.DataFrame({
+        "Season": np.repeat(groups["season"].to_numpy(), team_registry.N_TEAMS),
+        "Snapshot": np.repeat(groups["snapshot"].to_numpy(), team_registry.N_TEAMS),
+        "Team": np.tile(team_registry.CITIES, len(groups)),
+        "RawOSS": raw_oss.ravel(),
+        "Disruption": disruption.ravel(),
+        "Resilience": resilience.ravel(),
+        "RawDSS": (disruption + resilience).ravel(),
+    })
+    history["TSS"] = history["RawOSS"] + history["RawDSS"]
+    return history.dropna(subset=["TSS"]).reset_index(drop=True)
+
+# =======================
+# As-of lookups
+# =======================
+
+def load_timeline(history=None):
+    """team id -> (snapshot dates, TSS) in date order, from tss_history.csv (or a
+       score_snapshots frame). When two seasons share a date the later one wins."""
+    history = pd.read_csv(HISTORY_FILE) if history is None else history
+    history = history.assign(_day=pd.to_datetime(history["Snapshot"]).dt.floor("D")).dropna(subset=["_day"])
+    history = (history.sort_values(["_day", "Season"], kind="stable")
+               .drop_duplicates(subset=["Team", "_day"], keep="last"))
+    ids = team_registry.to_ids(history["Team"])
+    dates = history["_day"].to_numpy().astype("datetime64[D]")
+    tss = history["TSS"].to_numpy(dtype=float)
+    return {team: (dates[ids == team], tss[ids == team]) for team in np.unique(ids).tolist()}
+
+
+def _day(date):
+    return pd.Timestamp(date).to_datetime64().astype("datetime64[D]")
+
+
+def tss_as_of(timeline, team, date):
+    """TSS from the team's last snapshot taken strictly before `date` (NaN if none),
+       i.e. what was known before a game that day. Binary search, O(log n)."""
+    dates, tss = timeline.get(team_registry.team_id(team), (None, None))
+    day = _day(date)
+    if dates is None or np.isnat(day):
+        return np.nan
+    i = np.searchsorted(dates, day, side="left")
+    return tss[i - 1] if i else np.nan
+
+
+def tss_as_of_games(timeline, teams, dates):
+    """tss_as_of for columns of teams and game dates at once."""
+    ids = team_registry.to_ids(teams)
+    days = pd.to_datetime(pd.Series(dates)).to_numpy().astype("datetime64[D]")
+    out = np.full(len(ids), np.nan)
+    for team in np.unique(ids).tolist():
+        if team not in timeline:
+            continue
+        rows = ids == team
+        team_dates, team_tss = timeline[team]
+        i = np.searchsorted(team_dates, days[rows], side="left")  # NaT sorts last: no date, no TSS
+        out[rows] = np.where((i > 0) & ~np.isnat(days[rows]), team_tss[np.maximum(i - 1, 0)], np.nan)
+    return out
+
+# =======================
+# Main Runner
+# =======================
+
+def main(warehouse=stat_warehouse.DB_FILE):
+    conn = stat_warehouse.connect(warehouse) if os.path.exists(warehouse) else None
+    if conn is not None and stat_warehouse.snapshots(conn):
+        # One read of the warehouse: weekly history, latest snapshot of each season
+        history = score_snapshots(conn)
+        if history.empty:
+            # e.g. tables stored under names calc_tss doesn't know; keep the last good scores
+            print(f"❌ No team has every stat in {warehouse}; {FOLDER} left as it was")
+            return
+        history.to_csv(HISTORY_FILE, index=False)
+        print(f"✅ Weekly TSS history saved to {HISTORY_FILE} "
+              f"({history['Snapshot'].nunique()} snapshots, {history['Season'].nunique()} seasons)")
+        latest = history[history["Snapshot"] == history.groupby("Season")["Snapshot"].transform("max")]
+        scores = latest.drop(columns="Snapshot").rename(columns={"Season": "Year"})
+    else:
+        scores = score_years(FOLDER)
+
+    # Every season in the tables, plus the current one in the usual file
+    os.makedirs(FOLDER, exist_ok=True)
+    all_path = os.path.join(FOLDER, "team_strength_scores_by_year.csv")
+    scores[["Year", "Team"] + SCORE_COLUMNS].to_csv(all_path, index=False)
+    merged = scores[scores["Year"] == int(YEAR_COL)].drop(columns="Year")
 
     # Save results
     out_path = os.path.join(FOLDER, "team_strength_scores.csv")
     merged.to_csv(out_path, index=False)
-    print(f"✅ Results saved to {out_path}")
+    print(f"✅ Results saved to {out_path} (all years in {all_path})")
     print(merged.sort_values("TSS", ascending=False).to_string(index=False))
 
 if __name__ == "__main__":
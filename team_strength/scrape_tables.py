@@ -4,14 +4,58 @@ import pandas as pd
 import os
 import time
 import re
+import sys
+import datetime
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import page_cache
+import stat_warehouse
+
+URLS = [
+    # defensive csvs
+    "https://www.teamrankings.com/nfl/stat/rushing-first-downs-per-game",
+    "https://www.teamrankings.com/nfl/stat/opponent-fumbles-per-game",
+    "https://www.teamrankings.com/nfl/stat/takeaways-per-game",
+    "https://www.teamrankings.com/nfl/stat/interceptions-per-game",
+    "https://www.teamrankings.com/nfl/stat/opponent-touchdowns-per-game",
+    "https://www.teamrankings.com/nfl/stat/opponent-yards-per-game",
+    "https://www.teamrankings.com/nfl/stat/opponent-red-zone-scoring-pct",
+    # offensice csvs
+    "https://www.teamrankings.com/nfl/stat/opponent-fourth-downs-per-game",
+    "https://www.teamrankings.com/nfl/stat/points-per-game",
+    "https://www.teamrankings.com/nfl/stat/rushing-yards-per-game",
+    "https://www.teamrankings.com/nfl/stat/fourth-downs-per-game",
+    "https://www.teamrankings.com/nfl/stat/third-down-conversion-pct",
+    "https://www.teamrankings.com/nfl/stat/yards-per-game",
+    "https://www.teamrankings.com/nfl/stat/passing-touchdowns-per-game",
+    "https://www.teamrankings.com/nfl/stat/average-team-passer-rating",
+    "https://www.teamrankings.com/nfl/stat/interceptions-thrown-per-game",
+    "https://www.teamrankings.com/nfl/stat/qb-sacked-per-game",
+    "https://www.teamrankings.com/nfl/stat/rushing-touchdowns-per-game",
+]
+
+# Every teamrankings title reads "NFL Football Stats - NFL Team <stat> | TeamRankings.com"
+TITLE_PREFIX = "nfl_football_stats_nfl_team_"
+TITLE_SUFFIX = "_teamrankings_com"
+
+def stat_name(title: str) -> str:
+    """Page title -> stat name as calc_tss knows it ("third_down_conversion_percentage")."""
+    name = re.sub(r"[^a-z0-9]+", "_", title.lower()).strip("_")
+    if name.startswith(TITLE_PREFIX):
+        name = name[len(TITLE_PREFIX):]
+    if name.endswith(TITLE_SUFFIX):
+        name = name[:-len(TITLE_SUFFIX)]
+    return name
 
 def clean_filename(name: str) -> str:
     """Convert a title into a safe CSV filename."""
-    name = name.lower()
-    name = re.sub(r"[^a-z0-9]+", "_", name)
-    return name.strip("_") + ".csv"
+    return stat_name(name) + ".csv"
 
-def scrape_table(url, output_csv=None, table_id=None):
+def scrape_table(url, output_csv=None, table_id=None, folder="scraped_csvs_2025",
+                 warehouse=None, snapshot=None):
+    """Scrape one stat table with its values parsed to numbers. Saves it as a csv in
+       `folder` (None to skip) and, given a warehouse connection, stores it there as
+       of `snapshot` (default today)."""
     headers = {
         "User-Agent": (
             "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
@@ -21,9 +65,14 @@ def scrape_table(url, output_csv=None, table_id=None):
     }
 
     print(f"Scraping {url} ...")
-    response = requests.get(url, headers=headers)
-    response.raise_for_status()
-    soup = BeautifulSoup(response.text, "html.parser")
+
+    def fetch():
+        response = requests.get(url, headers=headers)
+        response.raise_for_status()
+        time.sleep(3)  # polite delay, only when we hit the site
+        return response.text
+
+    soup = BeautifulSoup(page_cache.get_page(url, fetch), "html.parser")
 
     # Auto-generate filename from page title if none given
     if not output_csv:
@@ -64,63 +113,51 @@ def scrape_table(url, output_csv=None, table_id=None):
     if not headers and rows:
         headers = [f"col{i+1}" for i in range(len(rows[0]))]
 
-    # Convert to DataFrame
-    df = pd.DataFrame(rows, columns=headers)
+    # Convert to DataFrame, numbers parsed ("41.2%" -> 41.2, "--" -> empty)
+    df = stat_warehouse.parse_table(pd.DataFrame(rows, columns=headers))
+
+    if warehouse is not None:
+        snapshot = snapshot or str(datetime.date.today())
+        stat_warehouse.ingest(warehouse, os.path.splitext(output_csv)[0], df, snapshot)
+        print(f"✅ Stored {os.path.splitext(output_csv)[0]} as of {snapshot} in the stat warehouse")
 
-    # Ensure folder exists
-    os.makedirs("scraped_csvs_2025", exist_ok=True)
-    output_path = os.path.join("scraped_csvs_2025", output_csv)
+    if folder:
+        # Ensure folder exists
+        os.makedirs(folder, exist_ok=True)
+        output_path = os.path.join(folder, output_csv)
 
-    # Save CSV
-    df.to_csv(output_path, index=False)
-    print(f"✅ Saved table to {output_path} ({len(df)} rows)")
+        # Save CSV
+        df.to_csv(output_path, index=False)
+        print(f"✅ Saved table to {output_path} ({len(df)} rows)")
 
     return df
 
-    '''
-        "https://www.teamrankings.com/nfl/stat/points-per-game",
-        "https://www.teamrankings.com/nfl/stat/rushing-yards-per-game",
-        "https://www.teamrankings.com/nfl/stat/fourth-downs-per-game",
-        "https://www.teamrankings.com/nfl/stat/third-down-conversion-pct",
-        "https://www.teamrankings.com/nfl/stat/yards-per-game",
-        "https://www.teamrankings.com/nfl/stat/passing-touchdowns-per-game",
-        "https://www.teamrankings.com/nfl/stat/average-team-passer-rating",
-        "https://www.teamrankings.com/nfl/stat/interceptions-thrown-per-game",
-        "https://www.teamrankings.com/nfl/stat/qb-sacked-per-game",
-        "https://www.teamrankings.com/nfl/stat/rushing-touchdowns-per-game",
-        "https://www.teamrankings.com/nfl/stat/rushing-first-downs-per-game"
-        '''
+
+def snapshot_dates(season, today=None):
+    """Weekly snapshot dates of a season: the Tuesday after each week's games,
+       through the Super Bowl, up to today."""
+    today = today or datetime.date.today()
+    kickoff = page_cache._season_kickoff(season)
+    dates = [kickoff + datetime.timedelta(days=5 + 7 * week) for week in range(23)]
+    return [str(date) for date in dates if date <= today]
+
+
+def backfill(seasons, urls=URLS, warehouse=None):
+    """Fill the warehouse with each week's tables for past seasons, using the
+       teamrankings ?date= view of every stat page."""
+    warehouse = warehouse or stat_warehouse.connect()
+    for season in seasons:
+        for date in snapshot_dates(season):
+            for url in urls:
+                try:
+                    scrape_table(f"{url}?date={date}", folder=None, warehouse=warehouse, snapshot=date)
+                except Exception as e:
+                    print(f"❌ Failed to scrape {url} as of {date}: {e}")
 
 if __name__ == "__main__":
-    urls_to_scrape = [
-
-        # defensive csvs
-        "https://www.teamrankings.com/nfl/stat/rushing-first-downs-per-game",
-        "https://www.teamrankings.com/nfl/stat/opponent-fumbles-per-game",
-        "https://www.teamrankings.com/nfl/stat/takeaways-per-game",
-        "https://www.teamrankings.com/nfl/stat/interceptions-per-game",
-        "https://www.teamrankings.com/nfl/stat/opponent-touchdowns-per-game",
-        "https://www.teamrankings.com/nfl/stat/opponent-yards-per-game",
-        "https://www.teamrankings.com/nfl/stat/opponent-red-zone-scoring-pct",
-        # offensice csvs
-        "https://www.teamrankings.com/nfl/stat/opponent-fourth-downs-per-game",
-        "https://www.teamrankings.com/nfl/stat/points-per-game",
-        "https://www.teamrankings.com/nfl/stat/rushing-yards-per-game",
-        "https://www.teamrankings.com/nfl/stat/fourth-downs-per-game",
-        "https://www.teamrankings.com/nfl/stat/third-down-conversion-pct",
-        "https://www.teamrankings.com/nfl/stat/yards-per-game",
-        "https://www.teamrankings.com/nfl/stat/passing-touchdowns-per-game",
-        "https://www.teamrankings.com/nfl/stat/average-team-passer-rating",
-        "https://www.teamrankings.com/nfl/stat/interceptions-thrown-per-game",
-        "https://www.teamrankings.com/nfl/stat/qb-sacked-per-game",
-        "https://www.teamrankings.com/nfl/stat/rushing-touchdowns-per-game",
-        "https://www.teamrankings.com/nfl/stat/rushing-first-downs-per-game"
-        
-    ]
-
-    for url in urls_to_scrape:
+    warehouse = stat_warehouse.connect()
+    for url in URLS:
         try:
-            scrape_table(url)
-            time.sleep(3)  # polite delay
+            scrape_table(url, warehouse=warehouse)
         except Exception as e:
             print(f"❌ Failed to scrape {url}: {e}")
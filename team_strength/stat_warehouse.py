@@ -0,0 +1,140 @@
+import datetime
+import os
+import re
+import sqlite3
+import sys
+
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+import team_registry
+
+# Every scraped teamrankings table in one wide SQLite table, parsed to numbers at ingest:
+#   stats(season, snapshot, team_id, <one REAL column per stat>)
+# snapshot is the date the table was taken (the ?date= of a backfilled page), so each
+# stat is kept as it stood on every scrape date. A stat seen for the first time adds
+# a column. calc_tss reads the whole thing with one query instead of merging csvs.
+DB_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "stat_warehouse.db")
+
+KEY = ["season", "snapshot", "team_id"]
+MISSING = ["", "--", "-", "—", "N/A", "NA", "nan"]  # placeholders teamrankings shows for no data
+STAT_NAME = re.compile(r"^[a-z0-9_]+$")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS stats (
+    season INTEGER NOT NULL,
+    snapshot TEXT NOT NULL,
+    team_id INTEGER NOT NULL,
+    PRIMARY KEY (season, snapshot, team_id)
+);
+"""
+
+
+def connect(db_path=DB_FILE):
+    conn = sqlite3.connect(db_path, timeout=30)
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def season_of(date):
+    """NFL season a date belongs to (January-July games finish the previous season)."""
+    date = pd.Timestamp(date)
+    return date.year if date.month >= 8 else date.year - 1
+
+
+def parse_column(values):
+    """Scraped strings -> float: '41.2%' -> 41.2, '1,234' -> 1234, '--' -> NaN."""
+    text = pd.Series(values, dtype=object).astype(str).str.strip()
+    text = text.str.replace("%", "", regex=False).str.replace(",", "", regex=False)
+    return pd.to_numeric(text.mask(text.isin(MISSING)), errors="raise").astype(float)
+
+
+def parse_table(df):
+    """Typed copy of a scraped table: Rank and Team kept as they are, every other
+       column parsed to numbers."""
+    out = df.copy()
+    for col in df.columns:
+        if col not in ("Rank", "Team"):
+            out[col] = parse_column(df[col]).to_numpy()
+    return out
+
+
+def stat_columns(conn):
+    return [row[1] for row in conn.execute("PRAGMA table_info(stats)") if row[1] not in KEY]
+
+
+def _add_columns(conn, stats):
+    have = set(stat_columns(conn))
+    for stat in stats:
+        if not STAT_NAME.match(stat):
+            raise ValueError(f"Bad stat name {stat!r}")
+        if stat not in have:
+            conn.execute(f"ALTER TABLE stats ADD COLUMN {stat} REAL")
+
+
+def ingest(conn, stat, df, snapshot, seasons=None):
+    """Store one scraped table (raw or parsed) as `stat` for the given snapshot date.
+       Takes the column of the snapshot's own season unless `seasons` says otherwise;
+       other stats of the same rows are left alone. Returns the rows written."""
+    snapshot = str(pd.Timestamp(snapshot).date())
+    table = parse_table(df)
+    seasons = seasons or [season_of(snapshot)]
+    ids = team_registry.to_ids(table["Team"])
+
+    rows = []
+    for season in seasons:
+        if str(season) not in table:
+            continue
+        for team_id, value in zip(ids.tolist(), table[str(season)].tolist()):
+            rows.append((int(season), snapshot, team_id, None if np.isnan(value) else value))
+    with conn:
+        _add_columns(conn, [stat])
+        conn.executemany(f"INSERT INTO stats (season, snapshot, team_id, {stat}) VALUES (?, ?, ?, ?) "
+                         f"ON CONFLICT (season, snapshot, team_id) DO UPDATE SET {stat} = excluded.{stat}",
+                         rows)
+    return len(rows)
+
+
+def import_folder(conn, folder, snapshot, seasons=None):
+    """Load a folder of scraped csvs (scraped_csvs_YYYY) as one snapshot."""
+    count = 0
+    for file in sorted(os.listdir(folder)):
+        if file.endswith(".csv") and not file.startswith("team_strength_scores"):
+            count += ingest(conn, os.path.splitext(file)[0], pd.read_csv(os.path.join(folder, file)),
+                            snapshot, seasons)
+    return count
+
+
+def read_stats(conn, stats=None, seasons=None):
+    """Warehouse rows as a DataFrame ordered by season, snapshot, team id. Stats that
+       were never scraped come back as NaN columns."""
+    have = stat_columns(conn)
+    stats = stats or have
+    sql = f"SELECT {', '.join(KEY + [s for s in stats if s in have])} FROM stats"
+    params = []
+    if seasons is not None:
+        seasons = [int(s) for s in seasons]
+        sql += f" WHERE season IN ({', '.join('?' * len(seasons))})"
+        params = seasons
+    sql += " ORDER BY season, snapshot, team_id"
+    return pd.read_sql_query(sql, conn, params=params).reindex(columns=KEY + list(stats))
+
+
+def snapshots(conn, season=None):
+    """Snapshot dates held (for one season if given), oldest first."""
+    if season is None:
+        rows = conn.execute("SELECT DISTINCT snapshot FROM stats ORDER BY snapshot")
+    else:
+        rows = conn.execute("SELECT DISTINCT snapshot FROM stats WHERE season = ? ORDER BY snapshot",
+                            (int(season),))
+    return [row[0] for row in rows]
+
+
+if __name__ == "__main__":
+    # python stat_warehouse.py scraped_csvs_2025 [snapshot date, default today]
+    folder = sys.argv[1] if len(sys.argv) > 1 else "scraped_csvs_2025"
+    snapshot = sys.argv[2] if len(sys.argv) > 2 else str(datetime.date.today())
+    conn = connect()
+    count = import_folder(conn, folder, snapshot)
+    print(f"✅ Stored {count} team rows from {folder} as of {snapshot} in {DB_FILE}")
@@ -0,0 +1,30 @@
+import os
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(os.path.join(ROOT, "prediction"))
+import active_store
+
+
+def test_upsert_keeps_finished_games(tmp_path):
+    conn = active_store.connect(str(tmp_path / "active.db"), csv_path=None)
+    with active_store.transaction(conn):
+        active_store.upsert_rows(conn, [
+            {"year": 2025, "week": 3, "team": "Buffalo Bills", "elo_before": 1600.0, "elo_after": 1612.0,
+             "type": "game", "result": "W"},
+            {"year": 2025, "week": 3, "team": "Miami Dolphins", "elo_before": 1450.0, "type": "prediction"},
+        ])
+
+    # A late prediction run for the week must not reopen a finished game
+    with active_store.transaction(conn):
+        active_store.upsert_rows(conn, [
+            {"year": 2025, "week": 3, "team": team, "elo_before": 1500.0, "elo_after": None,
+             "type": "prediction", "result": None}
+            for team in ["Buffalo Bills", "Miami Dolphins", "New York Jets"]
+        ], keep_types=["game"])
+
+    rows = active_store.read_rows(conn, 2025, 3).set_index("team")
+    assert rows.loc["Buffalo Bills", ["elo_before", "elo_after", "type", "result"]].tolist() == \
+        [1600.0, 1612.0, "game", "W"]
+    assert rows.loc["Miami Dolphins", "elo_before"] == 1500.0
+    assert rows.loc["New York Jets", "type"] == "prediction"
@@ -0,0 +1,28 @@
+import os
+import sys
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+import calc_elo
+import columnar
+
+GAMES_FILE = os.path.join(ROOT, "master_nfl_2018_2024_fixed_2.csv")
+
+
+def test_append_from_npz_matches_full_replay(tmp_path):
+    games = pd.read_csv(GAMES_FILE)
+    earlier, full = str(tmp_path / "earlier.npz"), str(tmp_path / "games.npz")
+    columnar.write_table(games[games["year"] < 2024], earlier)
+    columnar.write_table(games, full)
+
+    # 2018-2023 first, then only the 2024 games appended from the full .npz
+    calc_elo.compute_elo(earlier, str(tmp_path / "history.csv"))
+    appended = calc_elo.compute_elo(full, str(tmp_path / "history.csv"), append=True)
+    calc_elo.compute_elo(GAMES_FILE, str(tmp_path / "reference.csv"))
+
+    assert set(appended["year"]) == {2024}
+    history = pd.read_csv(tmp_path / "history.csv")
+    reference = pd.read_csv(tmp_path / "reference.csv")
+    pd.testing.assert_frame_equal(history, reference)
@@ -0,0 +1,74 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+sys.path.append(os.path.join(ROOT, "team_strength"))
+import calc_tss
+import scrape_tables
+import stat_warehouse
+import team_registry
+
+
+def stat_page(stat, seed):
+    """A teamrankings-like stat page: title plus a Rank/Team/2025/2024 table."""
+    title = " ".join(word.capitalize() for word in stat.split("_"))
+    values = np.random.default_rng(seed).uniform(1, 50, size=(team_registry.N_TEAMS, 2))
+    rows = "".join(f"<tr><td>{i + 1}</td><td>{team}</td><td>{a:.1f}</td><td>{b:.1f}%</td></tr>"
+                   for i, (team, (a, b)) in enumerate(zip(team_registry.CITIES, values)))
+    return (f"<html><head><title>NFL Football Stats - NFL Team {title} | TeamRankings.com</title></head>"
+            f"<body><table><thead><tr><th>Rank</th><th>Team</th><th>2025</th><th>2024</th></tr></thead>"
+            f"<tbody>{rows}</tbody></table></body></html>")
+
+
+def test_scraped_tables_score(tmp_path, monkeypatch):
+    pages = {f"https://www.teamrankings.com/nfl/stat/{i}": stat_page(stat, i)
+             for i, stat in enumerate(calc_tss.ALL_STATS)}
+    monkeypatch.setattr(scrape_tables.page_cache, "get_page", lambda url, fetch: pages[url])
+
+    warehouse = stat_warehouse.connect(str(tmp_path / "stats.db"))
+    for url in pages:
+        scrape_tables.scrape_table(url, folder=str(tmp_path / "csvs"), warehouse=warehouse,
+                                   snapshot="2025-10-14")
+
+    assert sorted(stat_warehouse.stat_columns(warehouse)) == sorted(calc_tss.ALL_STATS)
+    assert sorted(os.listdir(tmp_path / "csvs")) == sorted(s + ".csv" for s in calc_tss.ALL_STATS)
+    history = calc_tss.score_snapshots(warehouse)
+    assert len(history) == team_registry.N_TEAMS
+    assert np.isfinite(history["TSS"]).all()
+
+
+def test_main_keeps_scores_when_history_is_empty(tmp_path, monkeypatch):
+    monkeypatch.setattr(calc_tss, "FOLDER", str(tmp_path / "csvs"))
+    monkeypatch.setattr(calc_tss, "HISTORY_FILE", str(tmp_path / "tss_history.csv"))
+    os.makedirs(tmp_path / "csvs")
+    scores_file = tmp_path / "csvs" / "team_strength_scores.csv"
+    scores_file.write_text("Team,TSS\nBuffalo,1.0\n")
+
+    # A stat calc_tss doesn't know: snapshots exist but no team can be scored
+    warehouse = str(tmp_path / "stats.db")
+    table = pd.DataFrame({"Team": team_registry.CITIES, "2025": np.arange(team_registry.N_TEAMS)})
+    stat_warehouse.ingest(stat_warehouse.connect(warehouse), "some_other_stat", table, "2025-10-14")
+    calc_tss.main(warehouse)
+
+    assert scores_file.read_text() == "Team,TSS\nBuffalo,1.0\n"
+    assert not os.path.exists(calc_tss.HISTORY_FILE)
+
+
+def test_tss_as_of_never_looks_ahead():
+    history = pd.DataFrame({
+        "Season": [2025, 2025, 2025],
+        "Snapshot": ["2025-09-16", "2025-09-23", "2025-09-30"],
+        "Team": ["Buffalo", "Buffalo", "Buffalo"],
+        "TSS": [1.0, 2.0, 3.0],
+    })
+    timeline = calc_tss.load_timeline(history)
+    dates = ["2025-09-10", "2025-09-16", "2025-09-17", "2025-09-23", "2025-12-01", None, pd.NaT]
+    expected = [np.nan, np.nan, 1.0, 1.0, 3.0, np.nan, np.nan]
+
+    one_by_one = [calc_tss.tss_as_of(timeline, "Buffalo Bills", date) for date in dates]
+    np.testing.assert_array_equal(one_by_one, expected)
+    np.testing.assert_array_equal(calc_tss.tss_as_of_games(timeline, ["BUF"] * len(dates), dates), expected)
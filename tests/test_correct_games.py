@@ -0,0 +1,41 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+import calc_elo
+import columnar
+import correct_games
+
+GAMES_FILE = os.path.join(ROOT, "master_nfl_2018_2024_fixed_2.csv")
+
+
+@pytest.mark.parametrize("history_name", ["history.csv", "history.npz"])
+def test_correction_matches_full_replay(tmp_path, history_name):
+    games = pd.read_csv(GAMES_FILE)
+    games_path, history_path = str(tmp_path / "games.csv"), str(tmp_path / history_name)
+    games.to_csv(games_path, index=False)
+    calc_elo.compute_elo(games_path, history_path)
+
+    # Flip a 2023 result
+    game = games[games["year"] == 2023].iloc[40]
+    fix = pd.DataFrame({"id": [game["id"]], "home-score": [game["away-score"]], "away-score": [game["home-score"]]})
+    fix.to_csv(tmp_path / "fix.csv", index=False)
+    report = correct_games.correct_games(str(tmp_path / "fix.csv"), games_path, history_path)
+
+    calc_elo.compute_elo(games_path, str(tmp_path / "reference.csv"))
+    reference = pd.read_csv(tmp_path / "reference.csv")
+    corrected = columnar.read_table(history_path)
+    assert len(corrected) == len(reference)
+    np.testing.assert_allclose(corrected["elo_after"].to_numpy(dtype=float), reference["elo_after"],
+                               rtol=0, atol=1e-9 if history_name.endswith(".csv") else 1e-2)
+
+    assert {game["home-team"], game["away-team"]} <= set(report["team"])
+    assert (np.abs(report["change"]) > 1e-9).all()
+
+    # Applying the same correction again changes nothing
+    assert correct_games.correct_games(str(tmp_path / "fix.csv"), games_path, history_path).empty
@@ -0,0 +1,93 @@
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.append(ROOT)
+import get_games
+import page_cache
+
+FIXTURES = os.path.join(ROOT, "fixtures", "pfr")
+
+
+@pytest.fixture
+def pfr_server():
+    """Local stand-in for pro-football-reference: the first request for each page
+       is rate limited (429), later ones get the fixture page (404 if there is none)."""
+    requests_seen = []
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            with lock:
+                first = self.path not in requests_seen
+                requests_seen.append(self.path)
+            path = os.path.join(FIXTURES, self.path.strip("/").replace("/", "_"))
+            if first or not os.path.exists(path):
+                self.send_response(429 if first else 404)
+                self.end_headers()
+                return
+            with open(path, "rb") as f:
+                body = f.read()
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield f"http://127.0.0.1:{server.server_address[1]}/{{year}}/week_{{week}}.htm", requests_seen
+    server.shutdown()
+
+
+@pytest.fixture
+def empty_cache(tmp_path, monkeypatch):
+    def reset(name):
+        monkeypatch.setattr(page_cache, "CACHE_DIR", str(tmp_path / name))
+        monkeypatch.setattr(page_cache, "_index", None)
+    reset("cache")
+    monkeypatch.setenv("NFL_PAGE_CACHE_OFFLINE", "0")
+    monkeypatch.chdir(tmp_path)  # master_nfl_*.csv is written to the working directory
+    return reset
+
+
+def test_backfill_retries_and_resumes(tmp_path, pfr_server, empty_cache):
+    base_url, requests_seen = pfr_server
+    out_dir = str(tmp_path / "nfl_csvs")
+
+    games = get_games.backfill([2024], [1, 10], out_dir, base_url=base_url, workers=2, rate=50, backoff=0.01)
+    assert sorted(requests_seen) == ["/2024/week_1.htm"] * 2 + ["/2024/week_10.htm"] * 2  # 429, then 200
+    assert sorted(games["week"].unique()) == [1, 10]
+    assert os.path.exists(tmp_path / "master_nfl_2024_2024.csv")
+
+    # Rerun with week 10 lost and nothing cached: only week 10 is fetched again
+    os.remove(get_games._part_path(out_dir, 2024, 10))
+    empty_cache("cache2")
+    requests_seen.clear()
+    resumed = get_games.backfill([2024], [1, 10], out_dir, base_url=base_url, workers=2, rate=50, backoff=0.01)
+    assert requests_seen == ["/2024/week_10.htm"] * 2
+    assert len(resumed) == len(games)
+
+
+def test_fetch_page_gives_up_after_retries(pfr_server, empty_cache):
+    base_url, requests_seen = pfr_server
+    url = base_url.format(year=2024, week=1)
+    with pytest.raises(get_games.requests.HTTPError):
+        get_games.fetch_page(get_games.requests.Session(), url, retries=0)
+    assert get_games.fetch_page(get_games.requests.Session(), url, retries=0) is not None
+    assert get_games.fetch_page(get_games.requests.Session(), base_url.format(year=1900, week=1)) is None
+
+
+def test_token_bucket_spaces_requests():
+    bucket = get_games.TokenBucket(rate=50)
+    start = time.monotonic()
+    for _ in range(6):
+        bucket.acquire()
+    assert time.monotonic() - start >= 5 / 50 * 0.9  # first token is free, then one per 1/rate
@@ -1,9 +1,39 @@
 import pandas as pd
-import matplotlib.pyplot as plt
 import os
 
-def team_expected_win_percentages(csv_path="nfl_elo_history_2018_2024.csv", output_dir="expected_win_reports"):
-    df = pd.read_csv(csv_path)
+import columnar
+import render
+import matplotlib.pyplot as plt
+
+def draw_team_expected_win(team_df, league_avg, team):
+    fig = plt.figure(figsize=(8, 5))
+    # Team line
+    plt.plot(team_df["year"], team_df["yearly_expected_win_pct"],
+             marker="o", linewidth=2, color="blue", label=team)
+
+    # League average line
+    plt.plot(league_avg["year"], league_avg["league_avg_expected_win_pct"],
+             linestyle="--", color="gray", linewidth=2, label="League Avg")
+
+    plt.title(f"{team} – Yearly Expected Win % (2018–2024)")
+    plt.xlabel("Year")
+    plt.ylabel("Expected Win %")
+    plt.ylim(0.2, 0.8)
+    plt.grid(alpha=0.3, linestyle="--")
+
+    # Annotate games played
+    for _, row in team_df.iterrows():
+        plt.text(row["year"], row["yearly_expected_win_pct"] + 0.01, f"{int(row['games_played'])} gp",
+                 ha="center", fontsize=8, color="gray")
+
+    plt.legend()
+    plt.tight_layout()
+    return fig
+
+
+def team_expected_win_percentages(csv_path="nfl_elo_history_2018_2024.csv", output_dir="expected_win_reports",
+                                  workers=None):
+    df = columnar.read_table(csv_path, columns=["year", "team", "expected_win", "type"])
 
     # Only consider game rows
     games = df[df["type"] == "game"].copy()
@@ -42,37 +72,16 @@ def team_expected_win_percentages(csv_path="nfl_elo_history_2018_2024.csv", outp
 
     # === Visualization: one graph per team ===
     team_dir = os.path.join(output_dir, "team_plots")
-    os.makedirs(team_dir, exist_ok=True)
-
-    for team in yearly["team"].unique():
-        team_df = yearly[yearly["team"] == team]
-
-        plt.figure(figsize=(8, 5))
-        # Team line
-        plt.plot(team_df["year"], team_df["yearly_expected_win_pct"],
-                 marker="o", linewidth=2, color="blue", label=team)
-
-        # League average line
-        plt.plot(league_avg["year"], league_avg["league_avg_expected_win_pct"],
-                 linestyle="--", color="gray", linewidth=2, label="League Avg")
-
-        plt.title(f"{team} – Yearly Expected Win % (2018–2024)")
-        plt.xlabel("Year")
-        plt.ylabel("Expected Win %")
-        plt.ylim(0.2, 0.8)
-        plt.grid(alpha=0.3, linestyle="--")
-
-        # Annotate games played
-        for _, row in team_df.iterrows():
-            plt.text(row["year"], row["yearly_expected_win_pct"] + 0.01, f"{int(row['games_played'])} gp",
-                     ha="center", fontsize=8, color="gray")
-
-        plt.legend()
-        plt.tight_layout()
-        plt.savefig(os.path.join(team_dir, f"{team.replace(' ', '_')}_expected_win_pct.png"), dpi=300)
-        plt.close()
-
-    print(f"📊 Saved individual team plots to {team_dir}/")
+    jobs = [{
+        "path": os.path.join(team_dir, f"{team.replace(' ', '_')}_expected_win_pct.png"),
+        "draw": draw_team_expected_win,
+        "data": {"team_df": yearly[yearly["team"] == team], "league_avg": league_avg},
+        "style": {"team": team},
+        "savefig": {"dpi": 300},
+    } for team in yearly["team"].unique()]
+    rendered, skipped = render.render_figures(jobs, workers=workers)
+
+    print(f"📊 Saved individual team plots to {team_dir}/ ({rendered} rendered, {skipped} unchanged)")
 
     return overall, yearly, league_avg
 